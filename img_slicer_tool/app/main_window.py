@@ -1,27 +1,47 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from array import array
+from typing import Any, Callable, Dict, List, Optional
 
-from PySide6.QtCore import QUrl
-from PySide6.QtGui import QAction, QDesktopServices
+from PySide6.QtCore import QTimer, QUrl
+from PySide6.QtGui import QAction, QCloseEvent, QDesktopServices, QPixmap
 from PySide6.QtWidgets import (
     QFileDialog,
     QHBoxLayout,
     QInputDialog,
     QMainWindow,
     QMessageBox,
+    QProgressBar,
+    QTabBar,
+    QToolButton,
+    QVBoxLayout,
     QWidget,
 )
 
+from models.document_session import DocumentSession, DocumentState
+from models.edit_history import CropApplied, EditCommand, LinesReplaced
 from models.image_document import ImageDocument
 from models.slice_layout import SliceLayout
-from services.crop_service import crop_document_to_new_image
-from services.image_loader import load_image_document
-from services.slice_service import slice_document_to_tiles
+from services.async_loader import AsyncImageLoader, PreviewPrefetcher
+from services.crop_service import apply_crop_operation, crop_document, edited_preview_pixmap, replay_operations
+from services.decoded_image_cache import release_decoded_image
+from services.encoder_profiles import FORMAT_JPEG, FORMAT_LABELS, FORMAT_SOURCE, PROFILE_LABELS
+from services.export_estimator import ExportEstimate, ExportEstimator
+from services.export_jobs import JOB_KIND_PYRAMID, JOB_KIND_SAVE, JOB_KIND_SLICE, ExportScheduler
+from services.image_loader import DecodedPreview, build_image_document
+from services.pyramid_service import DEFAULT_PYRAMID_OVERLAP, DEFAULT_PYRAMID_TILE_SIZE, PYRAMID_LABELS
+from services.slice_service import resolve_slice_encoding
+from services.tile_encoder import plan_tiles
+from services.tile_sinks import CONTAINER_DIRECTORY, CONTAINER_LABELS
+from utils.image_math import grid_line_positions, preview_lines_to_original_boundaries
+from views.filmstrip import FilmstripView, list_folder_images
 from views.image_view import ImageView
 from views.slice_side_panel import SliceSidePanel
 
+# 切割线停止移动后再开始预估，拖动过程中不反复排队。
+ESTIMATE_DELAY_MS = 400
+
 
 class MainWindow(QMainWindow):
     def __init__(self, parent: Optional[QMainWindow] = None) -> None:
@@ -31,12 +51,25 @@ class MainWindow(QMainWindow):
 
         self._image_view = ImageView(self)
         self._slice_panel = SliceSidePanel(self)
+        self._document_tabs = QTabBar(self)
+        self._document_tabs.setObjectName("documentTabs")
+        self._document_tabs.setTabsClosable(True)
+        self._document_tabs.setDocumentMode(True)
+        self._document_tabs.setExpanding(False)
+        self._filmstrip = FilmstripView(self)
+        self._filmstrip.setVisible(False)
         central_widget = QWidget(self)
         central_layout = QHBoxLayout(central_widget)
         central_layout.setContentsMargins(0, 0, 0, 0)
         central_layout.setSpacing(0)
+        view_layout = QVBoxLayout()
+        view_layout.setContentsMargins(0, 0, 0, 0)
+        view_layout.setSpacing(0)
+        view_layout.addWidget(self._document_tabs)
+        view_layout.addWidget(self._image_view, 1)
+        view_layout.addWidget(self._filmstrip)
         central_layout.addWidget(self._slice_panel)
-        central_layout.addWidget(self._image_view, 1)
+        central_layout.addLayout(view_layout, 1)
         self.setCentralWidget(central_widget)
         self._slice_panel.setVisible(False)
         self._slice_panel.set_slice_mode(self._image_view.sliceMode)
@@ -44,6 +77,37 @@ class MainWindow(QMainWindow):
         self._current_document: Optional[ImageDocument] = None
         self._slice_output_root: Optional[str] = None
         self._last_manual_tool = "cross"
+        self._image_loader = AsyncImageLoader(self)
+        self._session = DocumentSession()
+        # 预览被淘汰的文档重新激活时，记录正在为其重建预览的加载请求。
+        self._restore_token: Optional[int] = None
+        self._restore_state: Optional[DocumentState] = None
+        # 胶片条浏览复用同一个标签页：记录该标签页、正在加载的请求与最近请求的路径。
+        self._prefetcher = PreviewPrefetcher(self)
+        self._filmstrip_state: Optional[DocumentState] = None
+        self._filmstrip_token: Optional[int] = None
+        self._filmstrip_path: Optional[str] = None
+        # 导出任务在后台排队执行。裁剪只记录在文档上，保存任务记录正在保存的
+        # 文档，写完后换成新文件的完整预览；失败或取消时未保存的编辑保持不变。
+        self._export_scheduler = ExportScheduler(self)
+        self._save_jobs: Dict[int, ImageDocument] = {}
+        self._progress_job_id: Optional[int] = None
+        self._export_progress = QProgressBar(self)
+        self._export_progress.setMaximumWidth(240)
+        self._export_progress.setVisible(False)
+        self._cancel_export_button = QToolButton(self)
+        self._cancel_export_button.setText("取消导出")
+        self._cancel_export_button.setVisible(False)
+        self.statusBar().addPermanentWidget(self._export_progress)
+        self.statusBar().addPermanentWidget(self._cancel_export_button)
+        # 切图模式下在后台预估当前布局的输出体积与耗时，结果显示在工作栏和确认框中。
+        self._export_estimator = ExportEstimator(self)
+        self._latest_estimate: Optional[ExportEstimate] = None
+        self._slice_confirm_box: Optional[QMessageBox] = None
+        self._estimate_timer = QTimer(self)
+        self._estimate_timer.setSingleShot(True)
+        self._estimate_timer.setInterval(ESTIMATE_DELAY_MS)
+        self._estimate_timer.timeout.connect(self._request_export_estimate)
 
         self._create_actions()
         self._create_menus()
@@ -53,9 +117,35 @@ class MainWindow(QMainWindow):
         self._open_action = QAction("打开图片(&O)", self)
         self._open_action.setShortcut("Ctrl+O")
 
+        self._open_folder_action = QAction("打开文件夹(&D)...", self)
+        self._open_folder_action.setShortcut("Ctrl+Shift+O")
+
+        self._next_image_action = QAction("下一张(&N)", self)
+        self._next_image_action.setShortcut("PgDown")
+
+        self._previous_image_action = QAction("上一张(&P)", self)
+        self._previous_image_action.setShortcut("PgUp")
+
+        self._save_action = QAction("保存(&S)", self)
+        self._save_action.setShortcut("Ctrl+S")
+
+        self._save_as_action = QAction("另存为(&A)...", self)
+        self._save_as_action.setShortcut("Ctrl+Shift+S")
+
+        self._close_document_action = QAction("关闭图片(&W)", self)
+        self._close_document_action.setShortcut("Ctrl+W")
+
         self._exit_action = QAction("退出(&Q)", self)
         self._exit_action.setShortcut("Ctrl+Q")
 
+        self._undo_action = QAction("撤销(&U)", self)
+        self._undo_action.setShortcut("Ctrl+Z")
+        self._undo_action.setEnabled(False)
+
+        self._redo_action = QAction("重做(&R)", self)
+        self._redo_action.setShortcuts(["Ctrl+Shift+Z", "Ctrl+Y"])
+        self._redo_action.setEnabled(False)
+
         self._toggle_slice_mode_action = QAction("切图模式(&S)", self)
         self._toggle_slice_mode_action.setCheckable(True)
         self._toggle_slice_mode_action.setShortcut("S")
@@ -66,38 +156,86 @@ class MainWindow(QMainWindow):
         self._execute_slice_action = QAction("执行切图(&X)", self)
         self._execute_slice_action.setShortcut("Ctrl+Shift+X")
 
+        self._export_pyramid_action = QAction("导出瓦片金字塔(&P)...", self)
+        self._export_pyramid_action.setShortcut("Ctrl+Shift+P")
+
         self._set_slice_output_dir_action = QAction("设置切图保存路径...", self)
 
+        self._cancel_export_action = QAction("取消全部导出任务", self)
+        self._cancel_export_action.setEnabled(False)
+
     def _create_menus(self) -> None:
         menubar = self.menuBar()
         file_menu = menubar.addMenu("文件(&F)")
         file_menu.addAction(self._open_action)
+        file_menu.addAction(self._open_folder_action)
+        file_menu.addAction(self._save_action)
+        file_menu.addAction(self._save_as_action)
+        file_menu.addAction(self._close_document_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self._next_image_action)
+        file_menu.addAction(self._previous_image_action)
         file_menu.addSeparator()
         file_menu.addAction(self._set_slice_output_dir_action)
         file_menu.addSeparator()
         file_menu.addAction(self._exit_action)
 
         edit_menu = menubar.addMenu("编辑(&E)")
+        edit_menu.addAction(self._undo_action)
+        edit_menu.addAction(self._redo_action)
+        edit_menu.addSeparator()
         edit_menu.addAction(self._toggle_slice_mode_action)
 
         slice_menu = menubar.addMenu("切图(&S)")
         slice_menu.addAction(self._generate_grid_action)
         slice_menu.addAction(self._execute_slice_action)
+        slice_menu.addAction(self._export_pyramid_action)
+        slice_menu.addAction(self._cancel_export_action)
 
     def _connect_signals(self) -> None:
         self._open_action.triggered.connect(self.open_image_dialog)
+        self._open_folder_action.triggered.connect(self.open_folder_dialog)
+        self._next_image_action.triggered.connect(lambda: self._step_filmstrip(1))
+        self._previous_image_action.triggered.connect(lambda: self._step_filmstrip(-1))
+        self._save_action.triggered.connect(self._on_save_requested)
+        self._save_as_action.triggered.connect(self._on_save_as_requested)
         self._exit_action.triggered.connect(self.close)
+        self._undo_action.triggered.connect(lambda: self._step_history(undo=True))
+        self._redo_action.triggered.connect(lambda: self._step_history(undo=False))
+        self._close_document_action.triggered.connect(self._on_close_current_document)
+        self._document_tabs.currentChanged.connect(self._on_document_tab_changed)
+        self._document_tabs.tabCloseRequested.connect(self._close_document)
         self._image_view.cropRequested.connect(self._on_crop_requested)
         self._image_view.imageDropped.connect(self._on_image_dropped)
+        self._image_view.imagesDropped.connect(self.open_image_sequence)
+        self._image_view.folderDropped.connect(self.open_folder)
+        self._filmstrip.pathActivated.connect(self._open_filmstrip_path)
         self._image_view.invalidFileDropped.connect(self._on_invalid_drop)
         self._toggle_slice_mode_action.toggled.connect(self._on_toggle_slice_mode)
         self._generate_grid_action.triggered.connect(self._on_generate_grid_from_rows_cols)
         self._execute_slice_action.triggered.connect(self._on_execute_slice)
+        self._export_pyramid_action.triggered.connect(self._on_export_pyramid)
         self._set_slice_output_dir_action.triggered.connect(self._on_set_slice_output_dir)
         self._slice_panel.sliceModeChanged.connect(self._on_slice_work_mode_changed)
         self._slice_panel.gridValueChanged.connect(self._on_grid_values_changed)
         self._slice_panel.lineToolChanged.connect(self._on_line_tool_changed)
         self._slice_panel.executeRequested.connect(self._on_execute_slice)
+        self._slice_panel.encoderSettingsChanged.connect(self._on_encoder_settings_changed)
+        self._image_view.sliceLayoutChanged.connect(self._schedule_export_estimate)
+        self._image_view.lineEdited.connect(self._record_edit)
+        self._export_estimator.estimateReady.connect(self._on_estimate_ready)
+        self._export_estimator.estimateFailed.connect(self._on_estimate_failed)
+        self._image_loader.quickPreviewReady.connect(self._on_quick_preview_ready)
+        self._image_loader.documentReady.connect(self._on_document_loaded)
+        self._image_loader.loadFailed.connect(self._on_load_failed)
+        self._cancel_export_action.triggered.connect(self._export_scheduler.cancel_all)
+        self._cancel_export_button.clicked.connect(self._export_scheduler.cancel_all)
+        self._export_scheduler.jobStarted.connect(self._on_export_started)
+        self._export_scheduler.jobProgress.connect(self._on_export_progress)
+        self._export_scheduler.jobFinished.connect(self._on_export_finished)
+        self._export_scheduler.jobFailed.connect(self._on_export_failed)
+        self._export_scheduler.jobCancelled.connect(self._on_export_cancelled)
+        self._export_scheduler.queueChanged.connect(self._on_export_queue_changed)
 
     def open_image_dialog(self) -> None:
         dialog = QFileDialog(self)
@@ -111,86 +249,533 @@ class MainWindow(QMainWindow):
                 return
             self.load_image(file_paths[0])
 
+    def open_folder_dialog(self) -> None:
+        folder = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
+        if folder:
+            self.open_folder(folder)
+
+    def open_folder(self, folder: str) -> None:
+        paths = list_folder_images(folder)
+        if not paths:
+            QMessageBox.warning(self, "提示", f"文件夹中没有可打开的图片：\n{folder}")
+            return
+        self.open_image_sequence(paths)
+
+    def open_image_sequence(self, paths: List[str]) -> None:
+        """多张图片放入胶片条依次浏览，只打开第一张。"""
+        if len(paths) == 1:
+            self.load_image(paths[0])
+            return
+        self._filmstrip.set_paths(paths)
+        self._filmstrip.setVisible(True)
+        self._open_filmstrip_path(paths[0])
+
     def load_image(self, image_path: str) -> None:
         if not os.path.exists(image_path):
             QMessageBox.warning(self, "错误", "文件不存在")
             return
 
-        try:
-            document: ImageDocument = load_image_document(image_path)
-        except Exception as exc:  # noqa: BLE001 - show friendly error
-            QMessageBox.critical(self, "加载失败", f"加载图片出错：\n{exc}")
+        open_index = self._session.index_of_path(image_path)
+        if open_index is not None:
+            self._activate_document(open_index)
             return
 
-        self._image_view.set_document(document)
-        self._current_document = document
+        self._restore_token = None
+        self._restore_state = None
+        self._image_loader.load(image_path)
+        self.statusBar().showMessage(f"正在加载：{os.path.basename(image_path)} ...")
+
+    def _on_quick_preview_ready(self, _token: int, decoded: DecodedPreview) -> None:
+        self._store_view_state()
+        pixmap = QPixmap.fromImage(decoded.image)
+        self._image_view.show_quick_preview(pixmap, decoded.preview_width, decoded.preview_height)
+        self._current_document = None
+
+    def _on_document_loaded(self, token: int, document: ImageDocument) -> None:
+        if token == self._restore_token and self._restore_state is not None:
+            self._on_preview_restored(self._restore_state, document)
+            return
+
+        if token == self._filmstrip_token:
+            self._place_filmstrip_document(document)
+            return
+
+        self._store_view_state()
+        self._activate_document(self._add_document_tab(document))
+        self._show_loaded_message(document)
+
+    def _add_document_tab(self, document: ImageDocument) -> int:
+        index = self._session.add(document)
+        self._document_tabs.blockSignals(True)
+        self._document_tabs.addTab(self._tab_title(document))
+        self._document_tabs.setTabToolTip(index, document.path)
+        self._document_tabs.blockSignals(False)
+        return index
+
+    def _show_loaded_message(self, document: ImageDocument) -> None:
         self.statusBar().showMessage(
             (
-                f"加载成功：{os.path.basename(image_path)}  "
+                f"加载成功：{os.path.basename(document.path)}  "
                 f"原始尺寸：{document.original_width}x{document.original_height}  "
                 f"预览尺寸：{document.preview_width}x{document.preview_height}"
             ),
             5000,
         )
 
+    def _open_filmstrip_path(self, path: str) -> None:
+        self._filmstrip_path = path
+        self._filmstrip.set_current_path(path)
+        open_index = self._session.index_of_path(path)
+        if open_index is not None:
+            self._filmstrip_token = None
+            self._activate_document(open_index)
+            return
+
+        decoded = self._prefetcher.take(path)
+        if decoded is not None:
+            # 预取命中：直接在 GUI 线程构建文档，无需等待解码。
+            self._image_loader.cancel()
+            self._restore_token = None
+            self._restore_state = None
+            self._place_filmstrip_document(build_image_document(decoded))
+            return
+
+        if not os.path.exists(path):
+            QMessageBox.warning(self, "错误", f"文件不存在：\n{path}")
+            return
+        self._restore_token = None
+        self._restore_state = None
+        self._filmstrip_token = self._image_loader.load(path)
+        self.statusBar().showMessage(f"正在加载：{os.path.basename(path)} ...")
+
+    def _place_filmstrip_document(self, document: ImageDocument) -> None:
+        """胶片条切换的图片替换其专用标签页中的文档，避免为每张图都新开标签。"""
+        self._filmstrip_token = None
+        state = self._filmstrip_state
+        # 带未保存编辑的标签页不被替换，改为新开标签。
+        if state is not None and state in self._session.states and not state.document.has_pending_edits:
+            self._store_view_state()
+            index = self._session.index_of_path(state.document.path)
+            release_decoded_image(state.document)
+            state.document = document
+            state.history.clear()
+            self._reset_line_state(state)
+            self._update_tab(index)
+            self._current_document = None
+        else:
+            self._store_view_state()
+            index = self._add_document_tab(document)
+            self._filmstrip_state = self._session.state_at(index)
+        self._activate_document(index)
+        self._show_loaded_message(document)
+
+    def _step_filmstrip(self, step: int) -> None:
+        current = self._filmstrip_path
+        if current is None or self._filmstrip.row_of(current) is None:
+            state = self._session.active_state
+            current = state.document.path if state is not None else None
+        row = self._filmstrip.row_of(current) if current is not None else None
+        if row is None:
+            return
+        path = self._filmstrip.path_at(row + step)
+        if path is not None:
+            self._open_filmstrip_path(path)
+
+    def _prefetch_filmstrip_neighbors(self, path: str) -> None:
+        row = self._filmstrip.row_of(path)
+        if row is None:
+            return
+        neighbors = [self._filmstrip.path_at(row + 1), self._filmstrip.path_at(row - 1)]
+        self._prefetcher.prefetch(
+            [item for item in neighbors if item is not None and self._session.index_of_path(item) is None]
+        )
+
+    def _on_load_failed(self, token: int, _path: str, message: str) -> None:
+        if token == self._filmstrip_token:
+            self._filmstrip_token = None
+        if token == self._restore_token:
+            self._restore_token = None
+            self._restore_state = None
+        else:
+            # 首帧占位可能已替换掉当前画面，失败时恢复当前文档。
+            active = self._session.active_state
+            if active is not None and active.has_preview and self._current_document is None:
+                self._show_document_state(active)
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "加载失败", f"加载图片出错：\n{message}")
+
+    def _on_document_tab_changed(self, index: int) -> None:
+        if index < 0 or index == self._session.active_index:
+            return
+        self._activate_document(index)
+
+    def _on_close_current_document(self) -> None:
+        index = self._session.active_index
+        if index is not None:
+            self._close_document(index)
+
+    def _activate_document(self, index: int) -> None:
+        self._store_view_state()
+        state = self._session.activate(index)
+        self._document_tabs.blockSignals(True)
+        self._document_tabs.setCurrentIndex(index)
+        self._document_tabs.blockSignals(False)
+        self._update_undo_actions()
+        if self._filmstrip.row_of(state.document.path) is not None:
+            self._filmstrip_path = state.document.path
+            self._filmstrip.set_current_path(state.document.path)
+            self._prefetch_filmstrip_neighbors(state.document.path)
+
+        if not state.has_preview and self._is_save_pending(state.document):
+            # 覆盖保存可能正在替换原文件，等待保存完成后直接显示新文件的预览。
+            self._image_view.clear_document()
+            self._current_document = None
+            self.statusBar().showMessage(f"正在保存：{os.path.basename(state.document.path)} ...")
+            return
+
+        if not state.has_preview:
+            # 预览已因内存预算被丢弃：从磁盘缓存或缩小解码重建。
+            self._image_view.clear_document()
+            self._current_document = None
+            self._restore_state = state
+            self._restore_token = self._image_loader.load(state.document.path)
+            self.statusBar().showMessage(f"正在恢复预览：{os.path.basename(state.document.path)} ...")
+            return
+
+        self._show_document_state(state)
+
+    def _on_preview_restored(self, state: DocumentState, document: ImageDocument) -> None:
+        self._restore_token = None
+        self._restore_state = None
+        if state not in self._session.states:
+            return
+
+        current = state.document
+        if current.has_pending_edits:
+            if current.source_size == (document.original_width, document.original_height):
+                current.preview_pixmap = edited_preview_pixmap(current, document)
+                # 同时找回为撤销裁剪保留的原图预览。
+                state.history.base_document = document
+            else:
+                # 原文件在此期间被外部修改，未保存的裁剪已无法套用。
+                state.document = document
+                state.history.clear()
+                self._reset_line_state(state)
+                self._update_tab(self._session.index_of_document(document))
+                QMessageBox.warning(self, "提示", f"原图已被修改，未保存的裁剪已丢弃：\n{document.path}")
+        elif (current.original_width, current.original_height, current.preview_width, current.preview_height) == (
+            document.original_width,
+            document.original_height,
+            document.preview_width,
+            document.preview_height,
+        ):
+            current.preview_pixmap = document.preview_pixmap
+        else:
+            # 文件在此期间被外部修改，旧切割线与撤销记录已不再适用。
+            state.document = document
+            state.history.clear()
+            self._reset_line_state(state)
+
+        if state is self._session.active_state:
+            self._show_document_state(state)
+            self._update_undo_actions()
+            self.statusBar().clearMessage()
+
+    def _show_document_state(self, state: DocumentState) -> None:
+        document = state.document
+        if self._image_view.sliceMode == "grid" and state.has_line_state:
+            self._image_view.set_grid_size(state.grid_rows, state.grid_cols)
+            self._slice_panel.set_grid_values(state.grid_rows, state.grid_cols)
+        self._image_view.set_document(document)
+        if state.has_line_state:
+            self._image_view.restore_cut_lines(state.horizontal_lines, state.vertical_lines)
+        self._current_document = document
+        self._session.evict_previews()
+
+    def _store_view_state(self) -> None:
+        """把画布上的切割线写回当前文档状态。"""
+        state = self._session.active_state
+        if state is None or self._current_document is not state.document:
+            return
+        state.horizontal_lines, state.vertical_lines = self._image_view.export_cut_lines()
+        state.grid_rows, state.grid_cols = self._image_view.grid_size()
+        state.has_line_state = True
+
+    def _reset_line_state(self, state: DocumentState) -> None:
+        state.horizontal_lines = array("d")
+        state.vertical_lines = array("d")
+        state.has_line_state = False
+
+    def _close_document(self, index: int) -> None:
+        if not (0 <= index < len(self._session)):
+            return
+        if not self._confirm_discard_edits([self._session.state_at(index)]):
+            return
+        was_active = index == self._session.active_index
+        state = self._session.remove(index)
+        release_decoded_image(state.document)
+        if state is self._restore_state:
+            self._image_loader.cancel()
+            self._restore_token = None
+            self._restore_state = None
+        self._document_tabs.blockSignals(True)
+        self._document_tabs.removeTab(index)
+        self._document_tabs.blockSignals(False)
+
+        if not was_active:
+            return
+        if len(self._session) == 0:
+            self._image_view.clear_document()
+            self._current_document = None
+            self._update_undo_actions()
+            return
+        self._current_document = None
+        self._activate_document(min(index, len(self._session) - 1))
+
     def _on_crop_requested(self, x: float, y: float, w: float, h: float) -> None:
-        if self._current_document is None:
+        doc = self._ready_current_document()
+        if doc is None:
             return
 
-        doc = self._current_document
         preview_info = f"预览裁剪区域：{int(w)} x {int(h)} 像素"
         original_info = (
             f"原图尺寸：{doc.original_width} x {doc.original_height} 像素\n"
             f"{preview_info}\n\n"
-            "请选择裁剪保存方式："
+            "仅裁剪时不写入文件，可继续裁剪或切图，保存（Ctrl+S）时一次性写出。"
         )
 
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("确认裁剪")
         msg_box.setText("是否裁剪选中区域？")
         msg_box.setInformativeText(original_info)
-        overwrite_btn = msg_box.addButton("覆盖原图", QMessageBox.AcceptRole)
-        save_as_btn = msg_box.addButton("另存为...", QMessageBox.ActionRole)
-        cancel_btn = msg_box.addButton("取消", QMessageBox.RejectRole)
-        msg_box.setDefaultButton(overwrite_btn)
+        crop_btn = msg_box.addButton("裁剪", QMessageBox.AcceptRole)
+        overwrite_btn = msg_box.addButton("裁剪并覆盖原图", QMessageBox.ActionRole)
+        save_as_btn = msg_box.addButton("裁剪并另存为...", QMessageBox.ActionRole)
+        msg_box.addButton("取消", QMessageBox.RejectRole)
+        msg_box.setDefaultButton(crop_btn)
         msg_box.exec()
 
         clicked_button = msg_box.clickedButton()
-        if clicked_button is cancel_btn:
+        if clicked_button not in (crop_btn, overwrite_btn, save_as_btn):
             return
 
-        preview_rect = (x, y, w, h)
-        if clicked_button is overwrite_btn:
-            target_path = doc.path
-        elif clicked_button is save_as_btn:
-            target_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "裁剪后另存为",
-                doc.path,
-                "Images (*.png *.jpg *.jpeg *.bmp *.tiff)",
-            )
+        target_path = doc.path
+        if clicked_button is save_as_btn:
+            target_path = self._ask_save_path(doc, "裁剪后另存为")
             if not target_path:
                 return
+
+        try:
+            cropped_doc = crop_document(doc, (x, y, w, h))
+        except ValueError as exc:
+            QMessageBox.warning(self, "提示", str(exc))
+            return
+        state = self._session.active_state
+        if state is not None and state.document is doc:
+            if not doc.has_pending_edits:
+                state.history.base_document = doc
+            self._record_edit(CropApplied(cropped_doc.operations[-1], self._image_view.line_snapshot()))
+        self._replace_tab_document(doc, cropped_doc)
+        if clicked_button is crop_btn:
+            self.statusBar().showMessage(
+                f"已裁剪为 {cropped_doc.original_width}x{cropped_doc.original_height}，尚未保存（Ctrl+S 保存）。",
+                5000,
+            )
         else:
+            self._save_document(cropped_doc, target_path)
+
+    def _on_save_requested(self) -> None:
+        doc = self._ready_current_document()
+        if doc is None:
             return
+        if not doc.has_pending_edits:
+            self.statusBar().showMessage("当前图片没有需要保存的编辑。", 4000)
+            return
+        self._save_document(doc, doc.path)
 
-        try:
-            new_doc = crop_document_to_new_image(doc, preview_rect, target_path)
-        except Exception as exc:  # noqa: BLE001
-            QMessageBox.critical(self, "裁剪失败", f"执行裁剪时出错：\n{exc}")
+    def _on_save_as_requested(self) -> None:
+        doc = self._ready_current_document()
+        if doc is None:
             return
+        target_path = self._ask_save_path(doc, "另存为")
+        if target_path:
+            self._save_document(doc, target_path)
 
-        self._current_document = new_doc
-        self._image_view.set_document(new_doc)
+    def _ask_save_path(self, doc: ImageDocument, title: str) -> str:
+        target_path, _ = QFileDialog.getSaveFileName(
+            self,
+            title,
+            doc.path,
+            "Images (*.png *.jpg *.jpeg *.bmp *.tiff)",
+        )
+        return target_path
+
+    def _save_document(self, doc: ImageDocument, target_path: str) -> None:
+        """在后台渲染 doc 的全部编辑并写出；画面已是编辑后的预览，无需等待。"""
+        job_id = self._export_scheduler.submit_save(doc, target_path, profile=self._slice_panel.encoder_profile())
+        self._save_jobs[job_id] = doc
+        self.statusBar().showMessage(f"正在后台保存：{os.path.basename(target_path)}", 4000)
+
+    def _on_save_finished(self, job_id: int, result: object) -> None:
+        saved_doc = self._save_jobs.pop(job_id)
+        _target_path, decoded = result
+        new_doc = build_image_document(decoded)
+        if saved_doc.path != new_doc.path:
+            release_decoded_image(saved_doc)
+        index = self._session.index_of_document(saved_doc)
+        if index is not None:
+            state = self._session.state_at(index)
+            if index == self._session.active_index:
+                self._store_view_state()
+            # 完整预览的尺寸可能与截取的预览不同，按比例换算期间画下的切割线。
+            scale_x = new_doc.preview_width / saved_doc.preview_width
+            scale_y = new_doc.preview_height / saved_doc.preview_height
+            state.horizontal_lines = array("d", (value * scale_y for value in state.horizontal_lines))
+            state.vertical_lines = array("d", (value * scale_x for value in state.vertical_lines))
+            state.document = new_doc
+            # 编辑已写入文件，撤销记录随之失效。
+            state.history.clear()
+            self._update_tab(index)
+            if index == self._session.active_index:
+                self._show_document_state(state)
+                self._update_undo_actions()
+                self._schedule_export_estimate()
         self.statusBar().showMessage(
             (
-                f"裁剪完成：{os.path.basename(new_doc.path)}  "
+                f"保存完成：{os.path.basename(new_doc.path)}  "
                 f"原始尺寸：{new_doc.original_width}x{new_doc.original_height}  "
                 f"预览尺寸：{new_doc.preview_width}x{new_doc.preview_height}"
             ),
             5000,
         )
 
+    def _replace_tab_document(self, old_doc: ImageDocument, new_doc: ImageDocument) -> None:
+        index = self._session.index_of_document(old_doc)
+        if index is None:
+            return
+        state = self._session.state_at(index)
+        state.document = new_doc
+        self._reset_line_state(state)
+        self._update_tab(index)
+        if index == self._session.active_index:
+            self._show_document_state(state)
+            self._schedule_export_estimate()
+
+    def _record_edit(self, command: EditCommand) -> None:
+        state = self._session.active_state
+        if state is None or self._current_document is not state.document:
+            return
+        state.history.push(command)
+        self._update_undo_actions()
+
+    def _record_line_change(self, change: Callable[[], None]) -> None:
+        """执行整体替换切割线的操作，有变化时记为一步 LinesReplaced。"""
+        before = self._image_view.line_snapshot()
+        change()
+        after = self._image_view.line_snapshot()
+        if after != before:
+            self._record_edit(LinesReplaced(before, after))
+
+    def _update_undo_actions(self) -> None:
+        state = self._session.active_state
+        self._undo_action.setEnabled(state is not None and state.history.can_undo())
+        self._redo_action.setEnabled(state is not None and state.history.can_redo())
+
+    def _step_history(self, undo: bool) -> None:
+        state = self._session.active_state
+        if state is None or self._current_document is not state.document:
+            return
+        if self._ready_current_document() is None:
+            return
+        command = state.history.undo() if undo else state.history.redo()
+        if command is None:
+            return
+        if isinstance(command, CropApplied):
+            self._apply_crop_command(state, command, undo)
+        else:
+            mode = self._image_view.sliceMode
+            self._image_view.apply_line_command(command, undo)
+            self._sync_slice_panel(mode_changed=self._image_view.sliceMode != mode)
+        self._update_undo_actions()
+        self.statusBar().showMessage("已撤销。" if undo else "已重做。", 2000)
+
+    def _apply_crop_command(self, state: DocumentState, command: CropApplied, undo: bool) -> None:
+        """撤销时从保留的原图预览重放其余裁剪，重做时在当前预览上再截取一次，都不读磁盘。"""
+        doc = state.document
+        if undo:
+            document = replay_operations(state.history.base_document, doc.operations[:-1])
+            snapshot = command.lines
+            lines = snapshot.lines
+            if lines is None:
+                # 裁剪前的切割线可由参数推导：按撤销后的预览尺寸重新生成。
+                lines = ([], [])
+                if snapshot.mode == "grid":
+                    lines = grid_line_positions(document.preview_width, document.preview_height, *snapshot.grid)
+            state.horizontal_lines, state.vertical_lines = (array("d", values) for values in lines)
+            state.grid_rows, state.grid_cols = snapshot.grid
+            state.has_line_state = True
+        else:
+            document = apply_crop_operation(doc, command.operation)
+            self._reset_line_state(state)
+        index = self._session.index_of_document(doc)
+        state.document = document
+        self._update_tab(index)
+        # 保留的原图预览被淘汰时，由激活流程重新加载。
+        self._current_document = None
+        self._activate_document(index)
+        self._schedule_export_estimate()
+
+    def _sync_slice_panel(self, mode_changed: bool) -> None:
+        mode = self._image_view.sliceMode
+        self._slice_panel.set_slice_mode(mode)
+        self._slice_panel.set_grid_values(*self._image_view.grid_size())
+        if mode_changed:
+            tool = "select" if mode == "grid" else self._last_manual_tool
+            self._image_view.set_line_tool(tool)
+            self._slice_panel.set_line_tool(tool)
+
+    def _tab_title(self, doc: ImageDocument) -> str:
+        name = os.path.basename(doc.path)
+        return f"{name} *" if doc.has_pending_edits else name
+
+    def _update_tab(self, index: Optional[int]) -> None:
+        if index is None:
+            return
+        document = self._session.state_at(index).document
+        self._document_tabs.setTabText(index, self._tab_title(document))
+        self._document_tabs.setTabToolTip(index, document.path)
+
+    def _is_save_pending(self, doc: ImageDocument) -> bool:
+        return any(saving_doc is doc for saving_doc in self._save_jobs.values())
+
+    def _ready_current_document(self) -> Optional[ImageDocument]:
+        """返回当前文档；没有文档或其正在后台保存时提示并返回 None。"""
+        doc = self._current_document
+        if doc is None:
+            QMessageBox.warning(self, "提示", "请先打开一张图片。")
+            return None
+        if self._is_save_pending(doc):
+            QMessageBox.information(self, "提示", "图片正在后台保存，请稍候再试。")
+            return None
+        return doc
+
+    def _confirm_discard_edits(self, states: List[DocumentState]) -> bool:
+        unsaved = [
+            state
+            for state in states
+            if state.document.has_pending_edits and not self._is_save_pending(state.document)
+        ]
+        if not unsaved:
+            return True
+        reply = QMessageBox.question(
+            self,
+            "未保存的裁剪",
+            f"有 {len(unsaved)} 张图片的裁剪尚未保存，关闭后将丢失。\n是否继续？",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+        return reply == QMessageBox.Yes
+
     def _on_toggle_slice_mode(self, enabled: bool) -> None:
         if enabled:
             self._image_view.set_mode(self._image_view.MODE_SLICE)
@@ -200,12 +785,14 @@ class MainWindow(QMainWindow):
             self._image_view.set_mode(self._image_view.MODE_CROP)
             self._slice_panel.setVisible(False)
             self.statusBar().showMessage("已退出切图模式，回到裁剪模式", 5000)
+        self._schedule_export_estimate()
 
     def _on_set_slice_output_dir(self) -> None:
         dir_path = QFileDialog.getExistingDirectory(self, "选择切图保存根目录")
         if dir_path:
             self._slice_output_root = dir_path
             self.statusBar().showMessage(f"切图保存根路径：{dir_path}", 5000)
+            self._schedule_export_estimate()
 
     def _on_generate_grid_from_rows_cols(self) -> None:
         if self._current_document is None:
@@ -222,43 +809,221 @@ class MainWindow(QMainWindow):
 
         self._ensure_slice_mode_enabled()
         self._slice_panel.set_slice_mode("grid")
-        self._image_view.set_slice_work_mode("grid")
         self._slice_panel.set_grid_values(rows, cols)
-        self._image_view.set_grid_size(rows, cols)
+
+        def regenerate() -> None:
+            self._image_view.set_slice_work_mode("grid")
+            self._image_view.set_grid_size(rows, cols)
+
+        self._record_line_change(regenerate)
         self.statusBar().showMessage(f"已生成 {rows}x{cols} 宫格切图线。", 5000)
 
     def _on_execute_slice(self) -> None:
-        if self._current_document is None:
-            QMessageBox.warning(self, "提示", "请先打开一张图片。")
+        doc = self._ready_current_document()
+        if doc is None:
             return
 
-        doc = self._current_document
         layout = self._image_view.get_slice_layout()
-        tile_count = self._calculate_tile_count(layout)
+        settings = self._slice_export_settings()
+        try:
+            resolve_slice_encoding(doc, settings["output_format"], settings["profile"], settings["max_tile_bytes"])
+        except ValueError as exc:
+            QMessageBox.warning(self, "提示", str(exc))
+            return
 
-        if not layout.horizontal_lines and not layout.vertical_lines:
-            reply = QMessageBox.question(
-                self,
-                "确认",
-                "当前没有切图线，只会导出整张图片为一个切片。\n是否继续？",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No,
-            )
-            if reply != QMessageBox.Yes:
-                return
+        if not self._confirm_slice_export(doc, layout):
+            return
 
         output_root = self._slice_output_root
         if not output_root:
             output_root = os.path.dirname(doc.path)
             self._slice_output_root = output_root
 
+        self._export_scheduler.submit_slice(doc, layout, output_root, **settings)
+        if self._export_scheduler.running_count() and self._export_scheduler.queued_count():
+            self.statusBar().showMessage(
+                f"切图任务已排队，前面还有 {self._export_scheduler.queued_count() - 1} 个任务等待执行。",
+                5000,
+            )
+
+    def _slice_export_settings(self) -> Dict[str, Any]:
+        """工作栏中的输出设置，作为 submit_slice 与导出预估的参数。"""
+        budget_kb = self._slice_panel.tile_budget_kb()
+        return {
+            "output_format": self._slice_panel.output_format(),
+            "profile": self._slice_panel.encoder_profile(),
+            "max_tile_bytes": budget_kb * 1024 if budget_kb else None,
+            "container": self._slice_panel.output_container(),
+        }
+
+    def _confirm_slice_export(self, doc: ImageDocument, layout: SliceLayout) -> bool:
+        """显示切片数与导出预估；确认框打开期间预估完成时会就地更新。"""
+        xs, ys = preview_lines_to_original_boundaries(doc, layout)
+        tile_count = len(plan_tiles(xs, ys, "", ""))
+        text = f"将导出 {tile_count} 个切片，是否继续？"
+        if not layout.horizontal_lines and not layout.vertical_lines:
+            text = "当前没有切图线，只会导出整张图片为一个切片。\n是否继续？"
+
+        box = QMessageBox(QMessageBox.Question, "确认切图", text, QMessageBox.Yes | QMessageBox.No, self)
+        box.setDefaultButton(QMessageBox.Yes)
+        self._slice_confirm_box = box
+        if self._latest_estimate is not None:
+            self._show_estimate_in_confirm_box(self._latest_estimate)
+        else:
+            box.setInformativeText("正在估算输出体积与耗时……")
+            self._estimate_timer.start(0)
+        try:
+            return box.exec() == QMessageBox.Yes
+        finally:
+            self._slice_confirm_box = None
+
+    def _show_estimate_in_confirm_box(self, estimate: ExportEstimate) -> None:
+        box = self._slice_confirm_box
+        if box is None:
+            return
+        informative = estimate.summary()
+        if not estimate.enough_space:
+            box.setIcon(QMessageBox.Warning)
+            informative += "\n\n输出目录所在磁盘的剩余空间可能不足。"
+        box.setInformativeText(informative)
+
+    def _schedule_export_estimate(self) -> None:
+        self._latest_estimate = None
+        if self._current_document is None or not self._toggle_slice_mode_action.isChecked():
+            self._estimate_timer.stop()
+            self._export_estimator.cancel()
+            self._slice_panel.set_export_estimate("")
+            return
+        self._slice_panel.set_export_estimate("正在估算输出体积与耗时……")
+        self._estimate_timer.start(ESTIMATE_DELAY_MS)
+
+    def _request_export_estimate(self) -> None:
+        doc = self._current_document
+        if doc is None:
+            return
+        if self._is_save_pending(doc):
+            self._export_estimator.cancel()
+            self._slice_panel.set_export_estimate("保存完成后再预估")
+            return
+        settings = self._slice_export_settings()
         try:
-            output_dir = slice_document_to_tiles(doc, layout, output_root)
-        except Exception as exc:  # noqa: BLE001
-            QMessageBox.critical(self, "切图失败", f"切图过程中发生错误：\n{exc}")
+            resolve_slice_encoding(doc, settings["output_format"], settings["profile"], settings["max_tile_bytes"])
+        except ValueError as exc:
+            self._export_estimator.cancel()
+            self._slice_panel.set_export_estimate(str(exc))
+            return
+        output_root = self._slice_output_root or os.path.dirname(doc.path)
+        self._export_estimator.request(doc, self._image_view.get_slice_layout(), output_root, **settings)
+
+    def _on_estimate_ready(self, _token: int, estimate: ExportEstimate) -> None:
+        self._latest_estimate = estimate
+        text = f"共 {estimate.tile_count} 个切片\n{estimate.summary()}"
+        if not estimate.enough_space:
+            text += "\n⚠ 磁盘剩余空间可能不足"
+        self._slice_panel.set_export_estimate(text)
+        self._show_estimate_in_confirm_box(estimate)
+
+    def _on_estimate_failed(self, _token: int, message: str) -> None:
+        self._slice_panel.set_export_estimate(f"无法预估：{message}")
+        if self._slice_confirm_box is not None:
+            self._slice_confirm_box.setInformativeText(f"无法预估输出体积：{message}")
+
+    def _on_export_pyramid(self) -> None:
+        doc = self._ready_current_document()
+        if doc is None:
             return
 
-        self._show_slice_result(output_dir, tile_count)
+        labels = list(PYRAMID_LABELS.values())
+        label, ok = QInputDialog.getItem(self, "导出瓦片金字塔", "目录结构：", labels, 0, False)
+        if not ok:
+            return
+        kind = list(PYRAMID_LABELS)[labels.index(label)]
+
+        tile_size, ok = QInputDialog.getInt(
+            self, "导出瓦片金字塔", "瓦片尺寸（像素）：", DEFAULT_PYRAMID_TILE_SIZE[kind], 16, 4096
+        )
+        if not ok:
+            return
+        overlap, ok = QInputDialog.getInt(
+            self, "导出瓦片金字塔", "瓦片重叠（像素）：", DEFAULT_PYRAMID_OVERLAP[kind], 0, tile_size // 2 - 1
+        )
+        if not ok:
+            return
+
+        output_root = self._slice_output_root or os.path.dirname(doc.path)
+        # 网页查看器一般只支持 JPEG / PNG / WebP，保持原格式时改用 JPEG。
+        output_format = self._slice_panel.output_format()
+        if output_format == FORMAT_SOURCE:
+            output_format = FORMAT_JPEG
+        self._export_scheduler.submit_pyramid(
+            doc,
+            output_root,
+            kind,
+            tile_size,
+            overlap,
+            output_format=output_format,
+            profile=self._slice_panel.encoder_profile(),
+        )
+        self.statusBar().showMessage(f"已加入金字塔导出任务：{PYRAMID_LABELS[kind]}", 4000)
+
+    def _on_export_started(self, job_id: int, description: str) -> None:
+        self._progress_job_id = job_id
+        self._export_progress.setRange(0, 0)
+        self._export_progress.setFormat(f"{description}  %v/%m")
+        self._export_progress.setToolTip(description)
+
+    def _on_export_progress(self, job_id: int, done: int, total: int) -> None:
+        if job_id != self._progress_job_id:
+            return
+        self._export_progress.setRange(0, max(1, total))
+        self._export_progress.setValue(done)
+
+    def _on_export_queue_changed(self, running: int, queued: int) -> None:
+        busy = running + queued > 0
+        self._export_progress.setVisible(busy)
+        self._cancel_export_button.setVisible(busy)
+        self._cancel_export_action.setEnabled(busy)
+        self._cancel_export_button.setToolTip(f"运行中 {running} 个，排队 {queued} 个")
+
+    def _on_export_finished(self, job_id: int, kind: str, result: object) -> None:
+        if kind == JOB_KIND_SAVE:
+            self._on_save_finished(job_id, result)
+        elif kind in (JOB_KIND_SLICE, JOB_KIND_PYRAMID):
+            output_dir, tile_count = result
+            self._show_slice_result(output_dir, tile_count)
+
+    def _on_export_failed(self, job_id: int, kind: str, message: str) -> None:
+        if kind == JOB_KIND_SAVE:
+            self._save_jobs.pop(job_id, None)
+            QMessageBox.critical(self, "保存失败", f"保存图片时出错，未保存的编辑仍然保留：\n{message}")
+        else:
+            QMessageBox.critical(self, "切图失败", f"切图过程中发生错误：\n{message}")
+
+    def _on_export_cancelled(self, job_id: int, kind: str) -> None:
+        if kind == JOB_KIND_SAVE:
+            self._save_jobs.pop(job_id, None)
+        label = "保存" if kind == JOB_KIND_SAVE else "切图"
+        self.statusBar().showMessage(f"{label}任务已取消。", 5000)
+
+    def closeEvent(self, event: QCloseEvent) -> None:  # noqa: N802 - Qt override
+        if not self._confirm_discard_edits(self._session.states):
+            event.ignore()
+            return
+        if self._export_scheduler.is_busy():
+            reply = QMessageBox.question(
+                self,
+                "导出进行中",
+                "仍有导出任务未完成，退出将取消这些任务。\n是否退出？",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No,
+            )
+            if reply != QMessageBox.Yes:
+                event.ignore()
+                return
+            self._export_scheduler.shutdown()
+        self._estimate_timer.stop()
+        self._export_estimator.cancel()
+        super().closeEvent(event)
 
     def _on_slice_work_mode_changed(self, mode: str) -> None:
         if mode not in {"grid", "manual"}:
@@ -279,7 +1044,7 @@ class MainWindow(QMainWindow):
                 self._slice_panel.set_slice_mode("grid")
                 return
 
-        self._image_view.set_slice_work_mode(mode)
+        self._record_line_change(lambda: self._image_view.set_slice_work_mode(mode))
         if mode == "manual":
             self._image_view.set_line_tool(self._last_manual_tool)
             self._slice_panel.set_line_tool(self._last_manual_tool)
@@ -289,9 +1054,20 @@ class MainWindow(QMainWindow):
     def _on_grid_values_changed(self, rows: int, cols: int) -> None:
         if self._current_document is None or self._image_view.sliceMode != "grid":
             return
-        self._image_view.set_grid_size(rows, cols)
+        self._record_line_change(lambda: self._image_view.set_grid_size(rows, cols))
         self.statusBar().showMessage(f"网格模式：{rows} 行 x {cols} 列。", 4000)
 
+    def _on_encoder_settings_changed(self, output_format: str, profile: str) -> None:
+        message = f"切图输出：{FORMAT_LABELS.get(output_format, output_format)} · {PROFILE_LABELS.get(profile, profile)}"
+        budget_kb = self._slice_panel.tile_budget_kb()
+        if budget_kb:
+            message += f" · 每片不超过 {budget_kb} KB"
+        container = self._slice_panel.output_container()
+        if container != CONTAINER_DIRECTORY:
+            message += f" · 写入 {CONTAINER_LABELS[container]}"
+        self.statusBar().showMessage(message, 4000)
+        self._schedule_export_estimate()
+
     def _on_line_tool_changed(self, tool: str) -> None:
         self._image_view.set_line_tool(tool)
         if tool != "select":
@@ -322,35 +1098,20 @@ class MainWindow(QMainWindow):
         if not self._toggle_slice_mode_action.isChecked():
             self._toggle_slice_mode_action.setChecked(True)
 
-    def _calculate_tile_count(self, layout: SliceLayout) -> int:
-        pixmap_rect = self._image_view.get_pixmap_rect()
-        if pixmap_rect is None:
-            return 0
-        xs, ys = layout.get_boundaries(int(pixmap_rect.width()), int(pixmap_rect.height()))
-        count = 0
-        for row in range(len(ys) - 1):
-            if ys[row + 1] <= ys[row]:
-                continue
-            for col in range(len(xs) - 1):
-                if xs[col + 1] <= xs[col]:
-                    continue
-                count += 1
-        if count == 0 and xs and ys:
-            count = max(1, len(xs) - 1) * max(1, len(ys) - 1)
-        return max(count, 1)
-
     def _show_slice_result(self, output_dir: str, tile_count: int) -> None:
+        # 写入容器时 output_dir 是容器文件，打开其所在的文件夹。
+        is_container = os.path.isfile(output_dir)
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("切图完成")
         msg_box.setText(f"切图完成，共生成 {tile_count} 个切片。")
-        msg_box.setInformativeText(f"输出目录：\n{output_dir}")
+        msg_box.setInformativeText(f"{'输出文件' if is_container else '输出目录'}：\n{output_dir}")
         open_btn = msg_box.addButton("打开输出文件夹", QMessageBox.ActionRole)
         ok_btn = msg_box.addButton("确定", QMessageBox.AcceptRole)
         msg_box.setDefaultButton(ok_btn)
         msg_box.exec()
 
         if msg_box.clickedButton() is open_btn:
-            self._open_directory(output_dir)
+            self._open_directory(os.path.dirname(output_dir) if is_container else output_dir)
 
         self.statusBar().showMessage(
             f"切图完成（{tile_count} 个切片）：{output_dir}",
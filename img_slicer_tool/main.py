@@ -1,12 +1,16 @@
+import multiprocessing
 import sys
 
-from app.application import ImageApp
-
 
 def main() -> None:
+    # 切片编码的 spawn 工作进程会以 __mp_main__ 重新导入本文件，Qt 只在这里导入。
+    from app.application import ImageApp
+
     app = ImageApp(sys.argv)
     sys.exit(app.run())
 
 
 if __name__ == "__main__":
+    # 打包后的程序启动切片编码工作进程时需要先交给 multiprocessing 处理。
+    multiprocessing.freeze_support()
     main()
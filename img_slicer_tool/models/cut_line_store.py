@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional, Tuple
+
+from models.slice_layout import SliceLayout
+
+HORIZONTAL = "horizontal"
+VERTICAL = "vertical"
+
+
+class CutLineStore:
+    """按方向保存切割线位置（预览坐标）的有序 double 数组。
+
+    线条以 (方向, 序号) 定位，序号即在该方向有序数组中的下标；查找最近的线条用
+    二分查找，导出 SliceLayout 时无需再排序。位置相同的线条彼此等价。
+    """
+
+    def __init__(self) -> None:
+        self._positions = {HORIZONTAL: array("d"), VERTICAL: array("d")}
+
+    def __len__(self) -> int:
+        return len(self._positions[HORIZONTAL]) + len(self._positions[VERTICAL])
+
+    def positions(self, orientation: str) -> array:
+        """该方向的有序位置数组，调用方不应修改。"""
+        return self._positions[orientation]
+
+    def position(self, orientation: str, index: int) -> float:
+        return self._positions[orientation][index]
+
+    def count(self, orientation: str) -> int:
+        return len(self._positions[orientation])
+
+    def insert(self, orientation: str, position: float) -> int:
+        """插入一条线并返回其序号。"""
+        values = self._positions[orientation]
+        index = bisect_right(values, position)
+        values.insert(index, position)
+        return index
+
+    def remove(self, orientation: str, index: int) -> float:
+        return self._positions[orientation].pop(index)
+
+    def move(self, orientation: str, index: int, position: float) -> int:
+        """移动一条线并返回新的序号；未越过相邻线条时原地更新。"""
+        values = self._positions[orientation]
+        if (index == 0 or values[index - 1] <= position) and (
+            index == len(values) - 1 or position <= values[index + 1]
+        ):
+            values[index] = position
+            return index
+        del values[index]
+        return self.insert(orientation, position)
+
+    def index_of(self, orientation: str, position: float, hint: Optional[int] = None) -> Optional[int]:
+        """返回位于 position 的线条序号；hint 处恰好是该位置时直接使用。"""
+        values = self._positions[orientation]
+        if hint is not None and 0 <= hint < len(values) and values[hint] == position:
+            return hint
+        index = bisect_left(values, position)
+        if index < len(values) and values[index] == position:
+            return index
+        return None
+
+    def nearest(self, orientation: str, value: float, tolerance: float) -> Optional[Tuple[int, float]]:
+        """二分查找距 value 最近且不超过 tolerance 的线条，返回 (序号, 距离)。"""
+        values = self._positions[orientation]
+        index = bisect_left(values, value)
+        best: Optional[Tuple[int, float]] = None
+        for candidate in (index - 1, index):
+            if 0 <= candidate < len(values):
+                distance = abs(values[candidate] - value)
+                if distance <= tolerance and (best is None or distance < best[1]):
+                    best = (candidate, distance)
+        return best
+
+    def replace(self, horizontal: Iterable[float], vertical: Iterable[float]) -> None:
+        self._positions[HORIZONTAL] = array("d", sorted(horizontal))
+        self._positions[VERTICAL] = array("d", sorted(vertical))
+
+    def clear(self) -> None:
+        self._positions[HORIZONTAL] = array("d")
+        self._positions[VERTICAL] = array("d")
+
+    def export(self) -> Tuple[array, array]:
+        """返回 (水平, 垂直) 位置数组的副本。"""
+        return array("d", self._positions[HORIZONTAL]), array("d", self._positions[VERTICAL])
+
+    def to_layout(self, width: float, height: float) -> SliceLayout:
+        """导出位于图像内部（不含边界）的线条，数组本身有序，直接切片，导出时也无需再排序。"""
+        return SliceLayout(
+            horizontal_lines=_interior(self._positions[HORIZONTAL], height),
+            vertical_lines=_interior(self._positions[VERTICAL], width),
+            presorted=True,
+        )
+
+
+def _interior(values: array, limit: float) -> list:
+    return values[bisect_right(values, 0.0) : bisect_left(values, limit)].tolist()
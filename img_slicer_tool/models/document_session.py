@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from PySide6.QtGui import QPixmap
+
+from models.edit_history import EditHistory
+from models.image_document import ImageDocument
+
+# 所有打开文档的预览 QPixmap 共享的内存预算。
+PREVIEW_MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class DocumentState:
+    """会话中一份打开文档的状态；切割线以紧凑的 double 数组保存。"""
+
+    document: ImageDocument
+    horizontal_lines: array = field(default_factory=lambda: array("d"))
+    vertical_lines: array = field(default_factory=lambda: array("d"))
+    grid_rows: int = 2
+    grid_cols: int = 2
+    # 首次显示前没有保存过切割线，此时沿用画布按当前模式生成的结果。
+    has_line_state: bool = False
+    last_viewed: int = 0
+    history: EditHistory = field(default_factory=EditHistory)
+
+    @property
+    def has_preview(self) -> bool:
+        return not self.document.preview_pixmap.isNull()
+
+    def preview_bytes(self) -> int:
+        total = _pixmap_bytes(self.document.preview_pixmap)
+        base = self.history.base_document
+        if base is not None and base is not self.document:
+            # 为撤销裁剪保留的原图预览同样计入预算。
+            total += _pixmap_bytes(base.preview_pixmap)
+        return total
+
+    def drop_previews(self) -> None:
+        self.document.preview_pixmap = QPixmap()
+        if self.history.base_document is not None:
+            self.history.base_document.preview_pixmap = QPixmap()
+
+
+class DocumentSession:
+    """多文档会话：维护打开顺序、当前文档，以及按最近查看时间淘汰预览。"""
+
+    def __init__(self, memory_budget: int = PREVIEW_MEMORY_BUDGET_BYTES) -> None:
+        self._states: List[DocumentState] = []
+        self._active_index: Optional[int] = None
+        self._view_clock = 0
+        self.memory_budget = memory_budget
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def states(self) -> List[DocumentState]:
+        return list(self._states)
+
+    @property
+    def active_index(self) -> Optional[int]:
+        return self._active_index
+
+    @property
+    def active_state(self) -> Optional[DocumentState]:
+        if self._active_index is None:
+            return None
+        return self._states[self._active_index]
+
+    def state_at(self, index: int) -> DocumentState:
+        return self._states[index]
+
+    def index_of_path(self, path: str) -> Optional[int]:
+        for index, state in enumerate(self._states):
+            if state.document.path == path:
+                return index
+        return None
+
+    def index_of_document(self, document: ImageDocument) -> Optional[int]:
+        for index, state in enumerate(self._states):
+            if state.document is document:
+                return index
+        return None
+
+    def add(self, document: ImageDocument) -> int:
+        self._states.append(DocumentState(document=document))
+        return len(self._states) - 1
+
+    def remove(self, index: int) -> DocumentState:
+        state = self._states.pop(index)
+        if self._active_index is not None:
+            if index == self._active_index:
+                self._active_index = None
+            elif index < self._active_index:
+                self._active_index -= 1
+        return state
+
+    def activate(self, index: int) -> DocumentState:
+        self._active_index = index
+        self._view_clock += 1
+        state = self._states[index]
+        state.last_viewed = self._view_clock
+        return state
+
+    def total_preview_bytes(self) -> int:
+        return sum(state.preview_bytes() for state in self._states)
+
+    def evict_previews(self) -> List[DocumentState]:
+        """按最近查看时间从旧到新丢弃预览，直到满足预算；当前文档始终保留。"""
+        total = self.total_preview_bytes()
+        evicted: List[DocumentState] = []
+        active = self.active_state
+        candidates = sorted(
+            (state for state in self._states if state is not active and state.has_preview),
+            key=lambda state: state.last_viewed,
+        )
+        for state in candidates:
+            if total <= self.memory_budget:
+                break
+            total -= state.preview_bytes()
+            state.drop_previews()
+            evicted.append(state)
+        return evicted
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    if pixmap.isNull():
+        return 0
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
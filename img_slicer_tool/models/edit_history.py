@@ -0,0 +1,124 @@
+"""撤销/重做：每一步只记录一条紧凑的命令，而不是文档或预览图的快照。
+
+切割线命令记录方向、该方向有序位置中的序号与位置，应用时按位置查找、序号作提示；
+整体替换切割线的命令只记录切图方式与网格行列，撤销/重做时重新生成，只有无法由参数
+推导的线条（手动画的线、拖动过的网格线）才保存位置；裁剪命令只记录裁剪操作本身，
+撤销裁剪时由保留的原图预览重新截取，不读磁盘。
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple, Union
+
+from models.edit_operations import CropOperation
+from models.image_document import ImageDocument
+
+MAX_HISTORY_STEPS = 200
+
+
+@dataclass(frozen=True, slots=True)
+class LineAdded:
+    """新增一条切割线；index 为插入后在该方向中的序号。"""
+
+    orientation: str
+    index: int
+    position: float
+
+
+@dataclass(frozen=True, slots=True)
+class LineRemoved:
+    orientation: str
+    index: int
+    position: float
+
+
+@dataclass(frozen=True, slots=True)
+class LineMoved:
+    """拖动一条切割线；index 为松开时的序号。"""
+
+    orientation: str
+    index: int
+    old: float
+    new: float
+
+
+@dataclass(frozen=True, slots=True)
+class LineSnapshot:
+    """画布上全部切割线的状态：切图方式与网格行列。
+
+    lines 为 None 时线条可由这两者重新生成（网格模式按行列均分，手动模式没有线条）；
+    否则为 (水平, 垂直) 两组 double 数组。
+    """
+
+    mode: str
+    grid: Tuple[int, int]
+    lines: Optional[Tuple[array, array]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class LinesReplaced:
+    """网格重建、切换切图方式等整体替换切割线的操作。"""
+
+    before: LineSnapshot
+    after: LineSnapshot
+
+
+@dataclass(frozen=True, slots=True)
+class CropApplied:
+    """非破坏性裁剪；lines 为裁剪前的切割线，裁剪会重置切割线。"""
+
+    operation: CropOperation
+    lines: LineSnapshot
+
+
+LineCommand = Union[LineAdded, LineRemoved, LineMoved, LinesReplaced]
+EditCommand = Union[LineCommand, CropApplied]
+
+
+class EditHistory:
+    """单个文档的撤销/重做栈，最多保留 max_steps 步，新命令会清空重做栈。
+
+    base_document 保留尚未编辑的原图文档（及其预览），撤销裁剪时从它重新截取；
+    预览被淘汰后为空图，由调用方重新加载。
+    """
+
+    def __init__(self, max_steps: int = MAX_HISTORY_STEPS) -> None:
+        self._undo: Deque[EditCommand] = deque(maxlen=max_steps)
+        self._redo: List[EditCommand] = []
+        self.base_document: Optional[ImageDocument] = None
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def push(self, command: EditCommand) -> None:
+        self._undo.append(command)
+        self._redo.clear()
+
+    def undo(self) -> Optional[EditCommand]:
+        """取出最近一步，调用方负责把它反向应用。"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        self._redo.append(command)
+        return command
+
+    def redo(self) -> Optional[EditCommand]:
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        self._undo.append(command)
+        return command
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self.base_document = None
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CropOperation:
+    """在上一步的结果上裁剪出 box（像素坐标）；size 为裁剪前的图像尺寸。"""
+
+    box: Tuple[int, int, int, int]
+    size: Tuple[int, int]
+
+
+# 目前只有裁剪。以后新增的操作排在裁剪之后，作用于按裁剪区域读出的像素。
+EditOperation = CropOperation
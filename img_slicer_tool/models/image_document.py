@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Tuple
 
 from PySide6.QtGui import QPixmap
 
+from models.edit_operations import EditOperation
+
 
 @dataclass(slots=True)
 class ImageDocument:
+    """打开的图片。original_* 为编辑后的全分辨率尺寸，preview_* 为预览尺寸。
+
+    operations 是尚未写入文件的编辑，按顺序作用于 path 中的原图：预览上立即
+    生效，全分辨率像素只在保存或切图时按 source_box 一次读出。
+    """
+
     path: str
     original_width: int
     original_height: int
@@ -15,3 +24,29 @@ class ImageDocument:
     scale_x: float
     scale_y: float
     preview_pixmap: QPixmap
+    operations: Tuple[EditOperation, ...] = ()
+
+    @property
+    def has_pending_edits(self) -> bool:
+        return bool(self.operations)
+
+    @property
+    def source_size(self) -> Tuple[int, int]:
+        """path 中原图的尺寸。"""
+        if self.operations:
+            return self.operations[0].size
+        return self.original_width, self.original_height
+
+    @property
+    def source_box(self) -> Tuple[int, int, int, int]:
+        """编辑结果在原图中的区域：依次裁剪的偏移累加而成。"""
+        left = top = 0
+        for operation in self.operations:
+            left += operation.box[0]
+            top += operation.box[1]
+        return left, top, left + self.original_width, top + self.original_height
+
+    def to_source_box(self, box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """把编辑结果坐标系中的 box 换算到原图坐标系。"""
+        left, top = self.source_box[:2]
+        return box[0] + left, box[1] + top, box[2] + left, box[3] + top
@@ -1,20 +1,37 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import List, Tuple
 
 
 @dataclass
 class SliceLayout:
-    """保存预览坐标系下的切图线布局。"""
+    """保存预览坐标系下的切图线布局。
+
+    presorted 表示两组线条已按位置升序排列（例如由 CutLineStore 导出），
+    normalize 时只需线性去重与过滤，不再排序。
+    """
 
     horizontal_lines: List[float] = field(default_factory=list)
     vertical_lines: List[float] = field(default_factory=list)
+    presorted: bool = field(default=False, compare=False)
+
+    def copy(self) -> "SliceLayout":
+        """复制线条列表，供其他线程使用；保留 presorted。"""
+        return replace(self, horizontal_lines=list(self.horizontal_lines), vertical_lines=list(self.vertical_lines))
 
     def normalize(self, preview_width: int, preview_height: int) -> None:
         """去重并过滤无效线条。"""
-        self.horizontal_lines = sorted({y for y in self.horizontal_lines if 0 < y < preview_height})
-        self.vertical_lines = sorted({x for x in self.vertical_lines if 0 < x < preview_width})
+        self.horizontal_lines = self._normalized(self.horizontal_lines, preview_height)
+        self.vertical_lines = self._normalized(self.vertical_lines, preview_width)
+        self.presorted = True
+
+    def _normalized(self, lines: List[float], limit: int) -> List[float]:
+        inside = (value for value in lines if 0 < value < limit)
+        if self.presorted:
+            # 有序输入中相同的位置彼此相邻，按出现顺序去重即可。
+            return list(dict.fromkeys(inside))
+        return sorted(set(inside))
 
     def get_boundaries(
         self,
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from services.image_loader import (
+    DecodedPreview,
+    build_image_document,
+    decode_preview,
+    decode_quick_preview,
+)
+
+
+class _LoadSignals(QObject):
+    quickDecoded = Signal(int, object)
+    previewDecoded = Signal(int, object)
+    failed = Signal(int, str, str)
+
+
+class _ImageLoadTask(QRunnable):
+    """工作线程任务：先出快速预览，再出完整预览，阶段之间检查是否已被取代。"""
+
+    def __init__(self, loader: "AsyncImageLoader", token: int, path: str) -> None:
+        super().__init__()
+        self._loader = loader
+        self._signals = loader._signals
+        self._token = token
+        self._path = path
+
+    def run(self) -> None:
+        try:
+            if not self._loader.is_current(self._token):
+                return
+            quick = decode_quick_preview(self._path)
+            if quick is not None and self._loader.is_current(self._token):
+                self._signals.quickDecoded.emit(self._token, quick)
+
+            if not self._loader.is_current(self._token):
+                return
+            decoded = decode_preview(self._path)
+            self._signals.previewDecoded.emit(self._token, decoded)
+        except Exception as exc:  # noqa: BLE001 - 转交 GUI 线程提示
+            self._signals.failed.emit(self._token, self._path, str(exc))
+
+
+class AsyncImageLoader(QObject):
+    """后台加载图片：QImage 解码在线程池中完成，QPixmap 转换留在 GUI 线程。
+
+    每次 load() 返回一个递增的 token，新的请求会使旧请求失效，旧请求的结果直接丢弃。
+    """
+
+    quickPreviewReady = Signal(int, object)
+    documentReady = Signal(int, object)
+    loadFailed = Signal(int, str, str)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        # 允许被取代的旧任务跑完当前阶段，同时不阻塞新的请求。
+        self._pool.setMaxThreadCount(2)
+        self._current_token = 0
+        self._signals = _LoadSignals(self)
+        self._signals.quickDecoded.connect(self._on_quick_decoded)
+        self._signals.previewDecoded.connect(self._on_preview_decoded)
+        self._signals.failed.connect(self._on_failed)
+
+    def load(self, path: str) -> int:
+        self._current_token += 1
+        # 尚未开始的旧任务直接移出队列。
+        self._pool.clear()
+        self._pool.start(_ImageLoadTask(self, self._current_token, path))
+        return self._current_token
+
+    def cancel(self) -> None:
+        self._current_token += 1
+        self._pool.clear()
+
+    def is_current(self, token: int) -> bool:
+        return token == self._current_token
+
+    def _on_quick_decoded(self, token: int, decoded: DecodedPreview) -> None:
+        if self.is_current(token):
+            self.quickPreviewReady.emit(token, decoded)
+
+    def _on_preview_decoded(self, token: int, decoded: DecodedPreview) -> None:
+        if not self.is_current(token):
+            return
+        self.documentReady.emit(token, build_image_document(decoded))
+
+    def _on_failed(self, token: int, path: str, message: str) -> None:
+        if self.is_current(token):
+            self.loadFailed.emit(token, path, message)
+
+
+class _PrefetchTask(QRunnable):
+    def __init__(self, prefetcher: "PreviewPrefetcher", generation: int, path: str) -> None:
+        super().__init__()
+        self._prefetcher = prefetcher
+        self._signals = prefetcher._signals
+        self._generation = generation
+        self._path = path
+
+    def run(self) -> None:
+        if not self._prefetcher.is_wanted(self._generation, self._path):
+            return
+        try:
+            mtime_ns = os.stat(self._path).st_mtime_ns
+            decoded = decode_preview(self._path)
+        except Exception as exc:  # noqa: BLE001 - 预取失败时等正式加载再提示
+            self._signals.failed.emit(self._generation, self._path, str(exc))
+            return
+        self._signals.previewDecoded.emit(self._generation, (decoded, mtime_ns))
+
+
+class PreviewPrefetcher(QObject):
+    """后台预取相邻图片的完整预览，切换时可直接构建 ImageDocument。
+
+    只保留最近一次 prefetch() 指定的路径，其余结果立即丢弃以控制内存。
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        # 预取不应与前台加载争抢太多 CPU。
+        self._pool.setMaxThreadCount(1)
+        self._generation = 0
+        self._wanted: Tuple[str, ...] = ()
+        self._ready: Dict[str, Tuple[DecodedPreview, int]] = {}
+        self._signals = _LoadSignals(self)
+        self._signals.previewDecoded.connect(self._on_preview_decoded)
+
+    def prefetch(self, paths: Sequence[str]) -> None:
+        self._generation += 1
+        self._pool.clear()
+        self._wanted = tuple(paths)
+        self._ready = {path: entry for path, entry in self._ready.items() if path in self._wanted}
+        for path in self._wanted:
+            if path not in self._ready:
+                self._pool.start(_PrefetchTask(self, self._generation, path))
+
+    def take(self, path: str) -> Optional[DecodedPreview]:
+        """取出已预取好的预览；文件在预取后被修改时视为未命中。"""
+        entry = self._ready.pop(path, None)
+        if entry is None:
+            return None
+        decoded, mtime_ns = entry
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return None
+        except OSError:
+            return None
+        return decoded
+
+    def is_wanted(self, generation: int, path: str) -> bool:
+        return generation == self._generation and path in self._wanted
+
+    def _on_preview_decoded(self, generation: int, entry: Tuple[DecodedPreview, int]) -> None:
+        decoded = entry[0]
+        if self.is_wanted(generation, decoded.path):
+            self._ready[decoded.path] = entry
@@ -1,37 +1,122 @@
 from __future__ import annotations
 
+import math
 import os
-from typing import Tuple
+from typing import Sequence, Tuple
 
 from PIL import Image
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPixmap
 
+from models.edit_operations import CropOperation, EditOperation
 from models.image_document import ImageDocument
-from services.image_loader import load_image_document
+from services.decoded_image_cache import get_decoded_image_cache
+from services.encoder_profiles import DEFAULT_PROFILE, convert_for_format, is_lossless, profile_save_kwargs
+from services.image_loader import DecodedPreview, preview_from_image
+from services.region_reader import decode_region
+from services.tile_encoder import save_tile, tile_image_format
 from utils.image_math import preview_rect_to_original_box
 
 
-def crop_document_to_new_image(
-    doc: ImageDocument,
-    preview_rect: Tuple[float, float, float, float],
-    target_path: str,
-) -> ImageDocument:
-    """基于预览矩形执行裁剪并返回新的 ImageDocument。"""
+def crop_operation(doc: ImageDocument, preview_rect: Tuple[float, float, float, float]) -> CropOperation:
+    """把预览矩形换算为作用于 doc 当前结果的裁剪操作。"""
+    x, y, w, h = preview_rect
+    box = preview_rect_to_original_box(doc, x, y, w, h)
+    if box[2] <= box[0] or box[3] <= box[1]:
+        raise ValueError("裁剪区域超出图片范围")
+    return CropOperation(box=box, size=(doc.original_width, doc.original_height))
+
+
+def crop_document(doc: ImageDocument, preview_rect: Tuple[float, float, float, float]) -> ImageDocument:
+    """非破坏性裁剪：截取现有预览图中的对应区域，立即得到追加了裁剪操作的文档。
+
+    不读写文件，预览清晰度沿用原预览；只在 GUI 线程中调用。
+    """
+    return apply_crop_operation(doc, crop_operation(doc, preview_rect))
+
+
+def apply_crop_operation(doc: ImageDocument, operation: CropOperation) -> ImageDocument:
+    """在 doc 上追加 operation，预览从 doc 的预览中截取；doc 没有预览时结果也没有预览。"""
+    x1, y1, x2, y2 = operation.box
+    # 预览像素向外取整，保证覆盖整个裁剪区域。
+    left = min(doc.preview_width - 1, max(0, math.floor(x1 / doc.scale_x)))
+    top = min(doc.preview_height - 1, max(0, math.floor(y1 / doc.scale_y)))
+    right = max(left + 1, min(doc.preview_width, math.ceil(x2 / doc.scale_x)))
+    bottom = max(top + 1, min(doc.preview_height, math.ceil(y2 / doc.scale_y)))
+    preview_width, preview_height = right - left, bottom - top
+
+    return ImageDocument(
+        path=doc.path,
+        original_width=x2 - x1,
+        original_height=y2 - y1,
+        preview_width=preview_width,
+        preview_height=preview_height,
+        scale_x=(x2 - x1) / preview_width,
+        scale_y=(y2 - y1) / preview_height,
+        preview_pixmap=doc.preview_pixmap.copy(left, top, preview_width, preview_height),
+        operations=doc.operations + (operation,),
+    )
+
+
+def replay_operations(base: ImageDocument, operations: Sequence[EditOperation]) -> ImageDocument:
+    """从尚未编辑的 base 依次套用 operations，用于撤销/重做时重建中间状态。"""
+    doc = base
+    for operation in operations:
+        doc = apply_crop_operation(doc, operation)
+    return doc
+
 
+def edited_preview_pixmap(doc: ImageDocument, source_doc: ImageDocument) -> QPixmap:
+    """预览被淘汰后，从原图的预览 source_doc 重建带编辑的 doc 的预览，尺寸保持不变。"""
+    x1, y1, x2, y2 = doc.source_box
+    left = math.floor(x1 / source_doc.scale_x)
+    top = math.floor(y1 / source_doc.scale_y)
+    right = max(left + 1, math.ceil(x2 / source_doc.scale_x))
+    bottom = max(top + 1, math.ceil(y2 / source_doc.scale_y))
+    region = source_doc.preview_pixmap.copy(left, top, right - left, bottom - top)
+    return region.scaled(
+        doc.preview_width,
+        doc.preview_height,
+        Qt.AspectRatioMode.IgnoreAspectRatio,
+        Qt.TransformationMode.SmoothTransformation,
+    )
+
+
+def render_document(doc: ImageDocument) -> Image.Image:
+    """渲染 doc 的全部编辑，得到全分辨率像素。
+
+    依次进行的裁剪合成为原图中的一个区域，只读取、解码这一个区域。
+    可在工作线程中调用。
+    """
     if not doc.path or not os.path.exists(doc.path):
         raise FileNotFoundError(f"原始图片路径不存在：{doc.path}")
+    return decode_region(doc.path, doc.source_box)
+
+
+def save_document_to_file(
+    doc: ImageDocument,
+    target_path: str,
+    profile: str = DEFAULT_PROFILE,
+) -> DecodedPreview:
+    """渲染编辑结果并写出目标文件，返回由内存中的结果生成的预览。
+
+    输出格式由目标扩展名决定，编码参数取 profile 档位。先写入同目录的隐藏临时
+    文件再改名，覆盖原图时中途失败也不会损坏原文件。
+
+    不涉及 QPixmap，可在工作线程中调用；再由 GUI 线程 build_image_document。
+    """
+    rendered = render_document(doc)
+    ext = os.path.splitext(target_path)[1].lower()
+    # 先按目标格式转换，登记到解码缓存的像素与写出的文件一致。
+    rendered = convert_for_format(rendered, tile_image_format(target_path))
+    save_kwargs = profile_save_kwargs(ext, profile)
+    save_tile(rendered, target_path, save_kwargs)
+
+    # 结果已在内存中，直接生成预览；无损格式再登记到解码缓存，之后切图无需解码刚写出
+    # 的文件。有损格式（JPEG、WebP 等）写出的像素与内存中不同，由下次打开时解码文件。
+    if is_lossless(ext, save_kwargs):
+        get_decoded_image_cache().put(target_path, rendered)
+    else:
+        get_decoded_image_cache().release(target_path)
+    return preview_from_image(target_path, rendered)
 
-    x, y, w, h = preview_rect
-    crop_box = preview_rect_to_original_box(doc, x, y, w, h)
-
-    with Image.open(doc.path) as img:
-        img.load()
-        cropped = img.crop(crop_box)
-        save_kwargs = {}
-        ext = os.path.splitext(target_path)[1].lower()
-        if ext in [".jpg", ".jpeg"]:
-            save_kwargs["quality"] = 95
-            save_kwargs["subsampling"] = 0
-        cropped.save(target_path, **save_kwargs)
-
-    new_doc = load_image_document(target_path)
-    return new_doc
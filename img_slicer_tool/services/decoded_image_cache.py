@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from PIL import Image
+
+from models.image_document import ImageDocument
+
+# 常驻内存的全分辨率解码结果总预算，超出时按最近使用淘汰。
+DEFAULT_DECODED_CACHE_BYTES = 1536 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class _DecodedEntry:
+    image: Image.Image
+    fingerprint: Tuple[int, int]
+    nbytes: int
+
+
+class DecodedImageCache:
+    """全分辨率解码结果的句柄缓存，供加载、裁剪、切图复用同一份像素。
+
+    条目以路径为键，并以 (mtime, 大小) 校验文件是否被修改；缓存中的图像在多个
+    调用方之间共享，只能读取（crop/resize 等返回新图像的操作是安全的）。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_DECODED_CACHE_BYTES) -> None:
+        self._max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, _DecodedEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, path: str) -> Optional[Image.Image]:
+        key = _cache_key(path)
+        try:
+            fingerprint = _fingerprint(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.fingerprint != fingerprint:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.image
+
+    def put(self, path: str, image: Image.Image) -> bool:
+        """登记已解码图像；超出总预算的图像不会缓存，返回是否登记成功。"""
+        nbytes = estimate_image_bytes(image)
+        if nbytes > self._max_bytes:
+            return False
+        key = _cache_key(path)
+        fingerprint = _fingerprint(path)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _DecodedEntry(image=image, fingerprint=fingerprint, nbytes=nbytes)
+            self._total_bytes += nbytes
+            while self._total_bytes > self._max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+        return True
+
+    def release(self, path: str) -> None:
+        with self._lock:
+            self._drop(_cache_key(path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[Image.Image]:
+        """返回全分辨率图像：优先复用缓存，否则解码并在预算允许时登记。"""
+        cached = self.get(path)
+        if cached is not None:
+            yield cached
+            return
+
+        image = Image.open(path)
+        try:
+            image.load()
+        except Exception:
+            image.close()
+            raise
+
+        if self.put(path, image):
+            yield image
+            return
+        # 放不进缓存：本次用完即关闭，下次使用时重新打开。
+        try:
+            yield image
+        finally:
+            image.close()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.nbytes
+
+
+def estimate_image_bytes(image: Image.Image) -> int:
+    """估算 Pillow 内部存储占用：多通道与 32 位模式每像素 4 字节。"""
+    if image.mode in ("1", "L", "P"):
+        pixel_bytes = 1
+    elif image.mode.startswith("I;16"):
+        pixel_bytes = 2
+    else:
+        pixel_bytes = 4
+    return image.width * image.height * pixel_bytes
+
+
+def _cache_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _fingerprint(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+_default_cache = DecodedImageCache()
+
+
+def get_decoded_image_cache() -> DecodedImageCache:
+    return _default_cache
+
+
+def open_decoded_image(path: str):
+    """上下文管理器：取得 path 的全分辨率图像（可能来自缓存，只读使用）。"""
+    return _default_cache.open(path)
+
+
+def release_decoded_image(doc: ImageDocument) -> None:
+    """文档关闭时显式释放其全分辨率像素。"""
+    _default_cache.release(doc.path)
@@ -0,0 +1,152 @@
+"""编码档位基准测试：在内存中按切片编码，统计吞吐量与每个切片的平均字节数。
+
+用法（在 img_slicer_tool 目录下）：
+
+    python -m services.encoder_benchmark [图片 ...] [--tile-size 512] [--formats jpeg,png,webp]
+
+不指定图片时使用内置生成的“照片”与“图形”两类样图。
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.encoder_profiles import (
+    FORMAT_SOURCE,
+    PROFILE_LABELS,
+    available_formats,
+    convert_for_format,
+    resolve_encoding,
+)
+
+DEFAULT_BENCHMARK_TILE_SIZE = 512
+_SAMPLE_SIZE = (2048, 1536)
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    image: str
+    output_format: str
+    profile: str
+    tiles: int
+    pixels: int
+    seconds: float
+    total_bytes: int
+
+    @property
+    def megapixels_per_second(self) -> float:
+        return self.pixels / 1_000_000 / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_tile(self) -> float:
+        return self.total_bytes / self.tiles if self.tiles else 0.0
+
+
+def sample_images() -> List[Tuple[str, Image.Image]]:
+    """生成两类有代表性的样图：带噪点的渐变照片，以及大色块加细线的界面图形。"""
+    width, height = _SAMPLE_SIZE
+    rng = np.random.default_rng(2024)
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    photo = np.stack(
+        [
+            128 + 100 * np.sin(xs / 180.0) * np.cos(ys / 240.0),
+            128 + 90 * np.sin((xs + ys) / 300.0),
+            128 + 80 * np.cos(xs / 90.0 - ys / 150.0),
+        ],
+        axis=-1,
+    )
+    photo += rng.normal(0, 12, photo.shape)
+    photo_image = Image.fromarray(np.clip(photo, 0, 255).astype(np.uint8), "RGB")
+
+    graphic = np.full((height, width, 3), 245, dtype=np.uint8)
+    for index in range(24):
+        x0, y0 = rng.integers(0, width - 200), rng.integers(0, height - 120)
+        graphic[y0 : y0 + rng.integers(40, 120), x0 : x0 + rng.integers(80, 200)] = rng.integers(0, 255, 3)
+    graphic[::32, :] = (40, 40, 40)
+    graphic[:, ::48] = (200, 60, 60)
+    graphic_image = Image.fromarray(graphic, "RGB")
+    return [("照片样图", photo_image), ("图形样图", graphic_image)]
+
+
+def benchmark_image(
+    name: str,
+    image: Image.Image,
+    tile_size: int = DEFAULT_BENCHMARK_TILE_SIZE,
+    formats: Optional[Sequence[str]] = None,
+) -> List[BenchmarkResult]:
+    tiles = [
+        image.crop((x, y, min(x + tile_size, image.width), min(y + tile_size, image.height)))
+        for y in range(0, image.height, tile_size)
+        for x in range(0, image.width, tile_size)
+    ]
+    pixels = sum(tile.width * tile.height for tile in tiles)
+    formats = [key for key in (formats or available_formats()) if key != FORMAT_SOURCE]
+
+    results: List[BenchmarkResult] = []
+    for output_format in formats:
+        for profile in PROFILE_LABELS:
+            encoding = resolve_encoding("", output_format, profile)
+            image_format = Image.registered_extensions()[encoding.ext]
+            total_bytes = 0
+            started = time.perf_counter()
+            for tile in tiles:
+                buffer = BytesIO()
+                convert_for_format(tile, image_format).save(buffer, format=image_format, **encoding.save_kwargs)
+                total_bytes += buffer.tell()
+            seconds = time.perf_counter() - started
+            results.append(
+                BenchmarkResult(
+                    image=name,
+                    output_format=output_format,
+                    profile=profile,
+                    tiles=len(tiles),
+                    pixels=pixels,
+                    seconds=seconds,
+                    total_bytes=total_bytes,
+                )
+            )
+    return results
+
+
+def format_report(results: Iterable[BenchmarkResult]) -> str:
+    lines = [f"{'图片':<12}{'格式':<8}{'档位':<10}{'切片':>6}{'MP/s':>10}{'字节/切片':>14}"]
+    for result in results:
+        lines.append(
+            f"{result.image:<12}{result.output_format:<8}{result.profile:<10}{result.tiles:>6}"
+            f"{result.megapixels_per_second:>10.1f}{result.bytes_per_tile:>14,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="比较各输出格式与编码档位的速度和体积")
+    parser.add_argument("images", nargs="*", help="用于测试的图片，缺省时使用内置样图")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_BENCHMARK_TILE_SIZE)
+    parser.add_argument("--formats", default="", help="逗号分隔，例如 jpeg,png,webp")
+    args = parser.parse_args(argv)
+
+    formats = [item.strip() for item in args.formats.split(",") if item.strip()] or None
+    if args.images:
+        samples = []
+        for path in args.images:
+            with Image.open(path) as image:
+                image.load()
+                samples.append((path, image.copy()))
+    else:
+        samples = sample_images()
+
+    results: List[BenchmarkResult] = []
+    for name, image in samples:
+        results.extend(benchmark_image(name, image, args.tile_size, formats))
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""切片与裁剪输出的编码档位。
+
+每种输出格式提供 fast / balanced / smallest 三档 Pillow 保存参数；balanced 档的
+JPEG、PNG 参数与旧版固定参数一致。本模块只依赖 Pillow，可在编码工作进程中导入。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+PROFILE_FAST = "fast"
+PROFILE_BALANCED = "balanced"
+PROFILE_SMALLEST = "smallest"
+DEFAULT_PROFILE = PROFILE_BALANCED
+PROFILE_LABELS = {
+    PROFILE_FAST: "快速",
+    PROFILE_BALANCED: "均衡",
+    PROFILE_SMALLEST: "最小体积",
+}
+
+# 输出格式：保持源图格式，或统一转换为指定格式。
+FORMAT_SOURCE = "source"
+FORMAT_JPEG = "jpeg"
+FORMAT_PNG = "png"
+FORMAT_WEBP = "webp"
+FORMAT_AVIF = "avif"
+FORMAT_LABELS = {
+    FORMAT_SOURCE: "保持原格式",
+    FORMAT_JPEG: "JPEG",
+    FORMAT_PNG: "PNG",
+    FORMAT_WEBP: "WebP",
+    FORMAT_AVIF: "AVIF",
+}
+
+_FORMAT_EXTENSIONS = {
+    FORMAT_JPEG: ".jpg",
+    FORMAT_PNG: ".png",
+    FORMAT_WEBP: ".webp",
+    FORMAT_AVIF: ".avif",
+}
+# Pillow 格式名 -> 本模块格式键，用于按扩展名查找档位。
+_PIL_FORMATS = {
+    "JPEG": FORMAT_JPEG,
+    "PNG": FORMAT_PNG,
+    "WEBP": FORMAT_WEBP,
+    "AVIF": FORMAT_AVIF,
+}
+
+_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    FORMAT_JPEG: {
+        PROFILE_FAST: {"quality": 90, "subsampling": 2},
+        PROFILE_BALANCED: {"quality": 95, "subsampling": 0},
+        PROFILE_SMALLEST: {"quality": 85, "subsampling": 2, "optimize": True, "progressive": True},
+    },
+    FORMAT_PNG: {
+        PROFILE_FAST: {"compress_level": 1},
+        PROFILE_BALANCED: {},
+        PROFILE_SMALLEST: {"compress_level": 9, "optimize": True},
+    },
+    FORMAT_WEBP: {
+        PROFILE_FAST: {"quality": 80, "method": 0},
+        PROFILE_BALANCED: {"quality": 85, "method": 4},
+        PROFILE_SMALLEST: {"quality": 80, "method": 6},
+    },
+    FORMAT_AVIF: {
+        PROFILE_FAST: {"quality": 60, "speed": 10},
+        PROFILE_BALANCED: {"quality": 70, "speed": 6},
+        PROFILE_SMALLEST: {"quality": 60, "speed": 2},
+    },
+}
+
+# 可按质量参数控制体积的格式，只有这些格式支持单个切片的体积上限。
+_QUALITY_FORMATS = {"JPEG", "WEBP", "AVIF"}
+
+# 按默认参数写出后像素不变的格式；WebP 仅在 lossless 参数下无损。
+_LOSSLESS_FORMATS = {"PNG", "BMP", "TIFF"}
+
+# 各格式可直接保存的模式，其余模式在保存前转换；未列出的格式交给 Pillow 自行处理。
+_SAVABLE_MODES = {
+    "JPEG": {"L", "RGB", "CMYK"},
+    "PNG": {"1", "L", "LA", "I", "I;16", "I;16B", "P", "RGB", "RGBA"},
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TileEncoding:
+    """解析后的输出设置：扩展名与 Pillow 保存参数。"""
+
+    ext: str
+    profile: str
+    save_kwargs: Dict[str, Any]
+
+    def settings(self) -> Dict[str, Any]:
+        """写入切图清单的设置；变化时对应切片会被重新导出。"""
+        return {"ext": self.ext, "profile": self.profile, "save_kwargs": self.save_kwargs}
+
+
+def available_formats() -> List[str]:
+    """当前 Pillow 能写出的输出格式。"""
+    extensions = Image.registered_extensions()
+    return [FORMAT_SOURCE] + [key for key, ext in _FORMAT_EXTENSIONS.items() if ext in extensions]
+
+
+def resolve_encoding(
+    source_ext: str,
+    output_format: str = FORMAT_SOURCE,
+    profile: str = DEFAULT_PROFILE,
+) -> TileEncoding:
+    """按源图扩展名、目标格式与档位得到输出扩展名和保存参数。"""
+    if profile not in PROFILE_LABELS:
+        raise ValueError(f"未知的编码档位：{profile}")
+    if output_format == FORMAT_SOURCE:
+        ext = source_ext.lower() or ".png"
+    elif output_format in _FORMAT_EXTENSIONS:
+        ext = _FORMAT_EXTENSIONS[output_format]
+        if ext not in Image.registered_extensions():
+            raise ValueError(f"当前环境不支持输出 {FORMAT_LABELS[output_format]} 格式")
+    else:
+        raise ValueError(f"未知的输出格式：{output_format}")
+    return TileEncoding(ext=ext, profile=profile, save_kwargs=profile_save_kwargs(ext, profile))
+
+
+def supports_size_budget(ext: str) -> bool:
+    """扩展名对应的格式能否通过调整质量满足体积上限。"""
+    return Image.registered_extensions().get(ext.lower()) in _QUALITY_FORMATS
+
+
+def is_lossless(ext: str, save_kwargs: Dict[str, Any]) -> bool:
+    """按 save_kwargs 写出扩展名对应的格式后，重新解码能否得到相同的像素。"""
+    image_format = Image.registered_extensions().get(ext.lower())
+    if image_format == "WEBP":
+        return bool(save_kwargs.get("lossless"))
+    return image_format in _LOSSLESS_FORMATS
+
+
+def profile_save_kwargs(ext: str, profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """扩展名对应格式的档位参数；没有档位的格式（BMP、TIFF 等）使用 Pillow 默认参数。"""
+    format_key = _PIL_FORMATS.get(Image.registered_extensions().get(ext.lower(), ""))
+    if format_key is None:
+        return {}
+    return dict(_PROFILES[format_key][profile])
+
+
+def convert_for_format(image: Image.Image, image_format: Optional[str]) -> Image.Image:
+    """把图像转换为目标格式可保存的模式；已兼容时原样返回。"""
+    savable = _SAVABLE_MODES.get(image_format or "")
+    if savable is None or image.mode in savable:
+        return image
+    has_alpha = image.mode in ("RGBA", "LA", "PA", "RGBa", "La") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if image_format == "PNG":
+        return image.convert("RGBA" if has_alpha else "RGB")
+    if image.mode == "1":
+        return image.convert("L")
+    if has_alpha:
+        # JPEG 没有透明通道：合成到白底上。
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image.mode.startswith("I;16") or image.mode in ("I", "F"):
+        # 高位深灰度按 16 位范围缩放到 8 位。
+        return image.convert("I").point(lambda value: value / 256).convert("L")
+    return image.convert("RGB")
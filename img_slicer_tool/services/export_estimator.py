@@ -0,0 +1,300 @@
+"""切图导出预估：在内存中编码少量有代表性的切片，推算输出体积、磁盘空间与耗时。
+
+estimate_slice_export 可在任意线程调用；ExportEstimator 在线程池中执行预估，
+新的请求会取消仍在进行的旧请求，GUI 线程只接收结果信号。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from models.image_document import ImageDocument
+from models.slice_layout import SliceLayout
+from services.encoder_profiles import DEFAULT_PROFILE, FORMAT_SOURCE
+from services.region_reader import RegionReader
+from services.slice_service import resolve_slice_encoding, should_stream, source_tiles
+from services.tile_encoder import (
+    PARALLEL_MIN_PIXELS,
+    ExportCancelled,
+    TileSpec,
+    default_worker_count,
+    encode_tile_bytes,
+    plan_tiles,
+    raise_if_cancelled,
+    tile_image_format,
+)
+from services.tile_sinks import CONTAINER_DIRECTORY
+from utils.image_math import preview_lines_to_original_boundaries
+
+ESTIMATE_SAMPLE_TILES = 8
+# 单个样本最多编码的像素数，超大切片只取中心区域并按面积折算。
+_SAMPLE_MAX_PIXELS = 1_000_000
+# 多进程编码相对理想线性加速的效率。
+_PARALLEL_EFFICIENCY = 0.8
+# 写成单独文件时，每个文件平均多占半个文件系统块，并有创建、改名与记录清单的固定开销。
+_FILE_BLOCK_OVERHEAD = 2048
+_FILE_WRITE_SECONDS = 0.0001
+# 剩余空间至少要比预估体积多出的比例。
+DISK_SPACE_MARGIN = 1.1
+
+
+@dataclass(frozen=True, slots=True)
+class ExportEstimate:
+    """一次切图导出的预估结果。"""
+
+    tile_count: int
+    sampled_tiles: int
+    total_bytes: int
+    # 计入文件系统块对齐后实际占用的磁盘空间。
+    disk_bytes: int
+    seconds: float
+    workers: int
+    free_bytes: Optional[int]
+
+    @property
+    def enough_space(self) -> bool:
+        return self.free_bytes is None or self.free_bytes >= self.disk_bytes * DISK_SPACE_MARGIN
+
+    def summary(self) -> str:
+        lines = [
+            f"预计输出：约 {format_bytes(self.total_bytes)}（按 {self.sampled_tiles} 个样本切片推算）",
+            f"预计耗时：约 {format_duration(self.seconds)}（{self.workers} 个编码进程）",
+        ]
+        if self.free_bytes is not None:
+            state = "充足" if self.enough_space else "不足"
+            lines.append(f"磁盘剩余：{format_bytes(self.free_bytes)}，空间{state}")
+        return "\n".join(lines)
+
+
+def estimate_slice_export(
+    doc: ImageDocument,
+    layout: SliceLayout,
+    output_root_dir: str,
+    workers: Optional[int] = None,
+    output_format: str = FORMAT_SOURCE,
+    profile: str = DEFAULT_PROFILE,
+    max_tile_bytes: Optional[int] = None,
+    container: str = CONTAINER_DIRECTORY,
+    sample_tiles: int = ESTIMATE_SAMPLE_TILES,
+    cancel_event: Optional[threading.Event] = None,
+) -> ExportEstimate:
+    """按与 slice_document_to_tiles 相同的参数预估整次导出（不考虑增量复用）。
+
+    按面积从小到大均匀抽取样本切片，在内存中以实际的编码设置编码，用样本的
+    每像素字节数与每像素耗时推算全部切片；样本区域能廉价部分解码时只解码样本，否则
+    整图解码一次，再按实际解码的像素数折算导出时的解码耗时。
+    """
+    encoding = resolve_slice_encoding(doc, output_format, profile, max_tile_bytes)
+    base_name = os.path.splitext(os.path.basename(doc.path))[0]
+    xs, ys = preview_lines_to_original_boundaries(doc, layout)
+    tiles = source_tiles(doc, plan_tiles(xs, ys, base_name, encoding.ext))
+    samples = _representative_tiles(tiles, sample_tiles)
+    image_format = tile_image_format(tiles[0].filename) if tiles else None
+
+    scaled_bytes = 0.0
+    sampled_pixels = 0
+    encoded_pixels = 0
+    encode_seconds = 0.0
+    decode_seconds = 0.0
+    with RegionReader(doc.path) as reader:
+        sample_boxes = [_sample_box(spec.box) for spec in samples]
+        started = time.perf_counter()
+        reader.plan(sample_boxes)
+        decode_seconds += time.perf_counter() - started
+        for spec, box in zip(samples, sample_boxes):
+            raise_if_cancelled(cancel_event)
+            tile_pixels, region_pixels = _box_area(spec.box), _box_area(box)
+            budget = None if max_tile_bytes is None else max(1, max_tile_bytes * region_pixels // tile_pixels)
+            started = time.perf_counter()
+            region = reader.read(box)
+            decode_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            data, _report = encode_tile_bytes(region, image_format, encoding.save_kwargs, budget)
+            encode_seconds += time.perf_counter() - started
+            scaled_bytes += len(data) * tile_pixels / region_pixels
+            sampled_pixels += tile_pixels
+            encoded_pixels += region_pixels
+        decoded_pixels = reader.decoded_pixels
+
+    bytes_per_pixel = scaled_bytes / sampled_pixels if sampled_pixels else 0.0
+    seconds_per_pixel = encode_seconds / encoded_pixels if encoded_pixels else 0.0
+    total_pixels = 0
+    total_bytes = 0
+    for spec in tiles:
+        area = _box_area(spec.box)
+        total_pixels += area
+        tile_bytes = int(bytes_per_pixel * area)
+        if max_tile_bytes is not None:
+            tile_bytes = min(tile_bytes, max_tile_bytes)
+        total_bytes += tile_bytes
+    disk_bytes = total_bytes
+    if container == CONTAINER_DIRECTORY:
+        disk_bytes += _FILE_BLOCK_OVERHEAD * len(tiles)
+
+    worker_count = max(1, workers or default_worker_count())
+    if total_pixels < PARALLEL_MIN_PIXELS:
+        worker_count = 1
+    worker_count = min(worker_count, max(1, len(tiles)))
+    speedup = 1.0 if worker_count == 1 else worker_count * _PARALLEL_EFFICIENCY
+    seconds = seconds_per_pixel * total_pixels / speedup
+    if container == CONTAINER_DIRECTORY:
+        seconds += _FILE_WRITE_SECONDS * len(tiles)
+    if decoded_pixels:
+        # 按实际解码的像素数（而非样本面积）折算：流式切图自上而下解码到切片区域的
+        # 底边，否则整图解码一次；原图已在解码缓存中时两者都不再解码。
+        if should_stream(doc):
+            export_pixels = doc.source_size[0] * doc.source_box[3]
+        else:
+            export_pixels = doc.source_size[0] * doc.source_size[1]
+        seconds += decode_seconds / decoded_pixels * export_pixels
+
+    return ExportEstimate(
+        tile_count=len(tiles),
+        sampled_tiles=len(samples),
+        total_bytes=total_bytes,
+        disk_bytes=disk_bytes,
+        seconds=seconds,
+        workers=worker_count,
+        free_bytes=_free_space(output_root_dir or os.path.dirname(doc.path)),
+    )
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1:
+        return "不到 1 秒"
+    if seconds < 60:
+        return f"{seconds:.0f} 秒"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    if minutes < 60:
+        return f"{minutes} 分 {seconds} 秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} 小时 {minutes} 分"
+
+
+def _representative_tiles(tiles: List[TileSpec], count: int) -> List[TileSpec]:
+    """按面积排序后等间隔抽样，兼顾大小不一的切片；切片较少时全部使用。"""
+    if len(tiles) <= count:
+        return list(tiles)
+    ordered = sorted(tiles, key=lambda spec: (_box_area(spec.box), spec.row, spec.col))
+    step = (len(ordered) - 1) / (count - 1) if count > 1 else 0
+    picked = {int(round(index * step)) for index in range(count)}
+    return [ordered[index] for index in sorted(picked)]
+
+
+def _sample_box(box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """超大切片只取中心区域，面积不超过 _SAMPLE_MAX_PIXELS。"""
+    x1, y1, x2, y2 = box
+    area = (x2 - x1) * (y2 - y1)
+    if area <= _SAMPLE_MAX_PIXELS:
+        return box
+    ratio = (_SAMPLE_MAX_PIXELS / area) ** 0.5
+    width = max(1, int((x2 - x1) * ratio))
+    height = max(1, int((y2 - y1) * ratio))
+    left = x1 + (x2 - x1 - width) // 2
+    top = y1 + (y2 - y1 - height) // 2
+    return left, top, left + width, top + height
+
+
+def _box_area(box: Tuple[int, int, int, int]) -> int:
+    return max(1, (box[2] - box[0]) * (box[3] - box[1]))
+
+
+def _free_space(directory: str) -> Optional[int]:
+    """输出目录可能尚未创建，向上找到第一个存在的目录再查询剩余空间。"""
+    directory = os.path.abspath(directory)
+    while not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+    try:
+        return shutil.disk_usage(directory).free
+    except OSError:
+        return None
+
+
+class _EstimateSignals(QObject):
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _EstimateTask(QRunnable):
+    def __init__(self, token: int, signals: _EstimateSignals, cancel_event: threading.Event, run) -> None:
+        super().__init__()
+        self._token = token
+        self._signals = signals
+        self._cancel_event = cancel_event
+        self._run = run
+
+    def run(self) -> None:
+        try:
+            estimate = self._run(self._cancel_event)
+        except ExportCancelled:
+            return
+        except Exception as exc:  # noqa: BLE001 - 转交 GUI 线程提示
+            self._signals.failed.emit(self._token, str(exc))
+        else:
+            self._signals.finished.emit(self._token, estimate)
+
+
+class ExportEstimator(QObject):
+    """后台预估：每次 request() 返回递增的 token，旧请求被取消，结果直接丢弃。"""
+
+    estimateReady = Signal(int, object)  # token, ExportEstimate
+    estimateFailed = Signal(int, str)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._current_token = 0
+        self._cancel_event: Optional[threading.Event] = None
+        self._signals = _EstimateSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    def request(self, doc: ImageDocument, layout: SliceLayout, output_root_dir: str, **options) -> int:
+        """排队一次预估；options 同 estimate_slice_export。"""
+        self.cancel()
+        layout = layout.copy()
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+
+        def run(event: threading.Event) -> ExportEstimate:
+            return estimate_slice_export(doc, layout, output_root_dir, cancel_event=event, **options)
+
+        self._pool.start(_EstimateTask(self._current_token, self._signals, cancel_event, run))
+        return self._current_token
+
+    def cancel(self) -> None:
+        self._current_token += 1
+        self._pool.clear()
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def is_current(self, token: int) -> bool:
+        return token == self._current_token
+
+    def _on_finished(self, token: int, estimate: object) -> None:
+        if self.is_current(token):
+            self.estimateReady.emit(token, estimate)
+
+    def _on_failed(self, token: int, message: str) -> None:
+        if self.is_current(token):
+            self.estimateFailed.emit(token, message)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from models.image_document import ImageDocument
+from models.slice_layout import SliceLayout
+from services.crop_service import save_document_to_file
+from services.encoder_profiles import DEFAULT_PROFILE, FORMAT_JPEG, FORMAT_SOURCE
+from services.pyramid_service import PYRAMID_DZI, export_pyramid
+from services.slice_service import container_output_path, slice_document_to_container, slice_document_to_tiles
+from services.tile_encoder import ExportCancelled, raise_if_cancelled
+from services.tile_sinks import CONTAINER_DIRECTORY
+
+JOB_KIND_SAVE = "save"
+JOB_KIND_SLICE = "slice"
+JOB_KIND_PYRAMID = "pyramid"
+
+# 同时运行的导出任务数：每个切图任务内部已按 CPU 核心并行编码，默认逐个执行。
+DEFAULT_MAX_CONCURRENT_JOBS = 1
+
+
+@dataclass(slots=True)
+class ExportJob:
+    """排队中的导出任务；run 在工作线程中执行，返回值随 jobFinished 发出。"""
+
+    job_id: int
+    kind: str
+    document: ImageDocument
+    description: str
+    run: Callable[["ExportJob"], Any]
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    total: int = 0
+
+
+class _JobSignals(QObject):
+    progress = Signal(int, int, int)  # job_id, done, total
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+    cancelled = Signal(int)
+
+
+class _JobTask(QRunnable):
+    def __init__(self, job: ExportJob, signals: _JobSignals) -> None:
+        super().__init__()
+        self._job = job
+        self._signals = signals
+
+    def run(self) -> None:
+        job = self._job
+        try:
+            raise_if_cancelled(job.cancel_event)
+            result = job.run(job)
+        except ExportCancelled:
+            self._signals.cancelled.emit(job.job_id)
+        except Exception as exc:  # noqa: BLE001 - 转交 GUI 线程提示
+            self._signals.failed.emit(job.job_id, str(exc))
+        else:
+            self._signals.finished.emit(job.job_id, result)
+
+
+class ExportScheduler(QObject):
+    """导出任务调度：裁剪与切图在线程池中排队执行，GUI 线程只接收信号。
+
+    任务按提交顺序执行，同时运行的数量受 max_concurrent 限制；取消是协作式的，
+    运行中的任务在下一个切片边界停止，尚未开始的任务直接出队。
+    """
+
+    jobQueued = Signal(int, str)  # job_id, description
+    jobStarted = Signal(int, str)
+    jobProgress = Signal(int, int, int)  # job_id, done, total
+    jobFinished = Signal(int, str, object)  # job_id, kind, result
+    jobFailed = Signal(int, str, str)  # job_id, kind, message
+    jobCancelled = Signal(int, str)
+    queueChanged = Signal(int, int)  # running, queued
+
+    def __init__(self, parent: Optional[QObject] = None, max_concurrent: int = DEFAULT_MAX_CONCURRENT_JOBS) -> None:
+        super().__init__(parent)
+        self._max_concurrent = max(1, max_concurrent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self._max_concurrent)
+        self._queue: Deque[ExportJob] = deque()
+        self._running: Dict[int, ExportJob] = {}
+        self._next_id = 0
+        self._signals = _JobSignals(self)
+        self._signals.progress.connect(self.jobProgress)
+        self._signals.finished.connect(self._on_job_finished)
+        self._signals.failed.connect(self._on_job_failed)
+        self._signals.cancelled.connect(self._on_job_cancelled)
+
+    @property
+    def max_concurrent(self) -> int:
+        return self._max_concurrent
+
+    def set_max_concurrent(self, count: int) -> None:
+        self._max_concurrent = max(1, count)
+        self._pool.setMaxThreadCount(self._max_concurrent)
+        self._start_next()
+
+    def running_count(self) -> int:
+        return len(self._running)
+
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+    def is_busy(self) -> bool:
+        return bool(self._running or self._queue)
+
+    def submit_slice(
+        self,
+        document: ImageDocument,
+        layout: SliceLayout,
+        output_root_dir: str,
+        workers: Optional[int] = None,
+        output_format: str = FORMAT_SOURCE,
+        profile: str = DEFAULT_PROFILE,
+        max_tile_bytes: Optional[int] = None,
+        container: str = CONTAINER_DIRECTORY,
+    ) -> int:
+        """排队一个切图任务；完成时 result 为 (输出目录或容器文件路径, 切片数)。
+
+        container 不是文件夹时，切片写入输出根目录中与切片目录同名的单个容器文件。
+        """
+        layout = layout.copy()
+
+        def run(job: ExportJob) -> Tuple[str, int]:
+            def progress(done: int, total: int) -> None:
+                job.total = total
+                self._signals.progress.emit(job.job_id, done, total)
+
+            options = dict(
+                workers=workers,
+                progress=progress,
+                cancel_event=job.cancel_event,
+                output_format=output_format,
+                profile=profile,
+                max_tile_bytes=max_tile_bytes,
+            )
+            if container == CONTAINER_DIRECTORY:
+                output_path = slice_document_to_tiles(document, layout, output_root_dir, **options)
+            else:
+                target = container_output_path(output_root_dir, document, container)
+                output_path = slice_document_to_container(document, layout, target, container, **options)
+            return output_path, job.total
+
+        return self._submit(JOB_KIND_SLICE, document, f"切图：{os.path.basename(document.path)}", run)
+
+    def submit_pyramid(
+        self,
+        document: ImageDocument,
+        output_root_dir: str,
+        kind: str = PYRAMID_DZI,
+        tile_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+        workers: Optional[int] = None,
+        output_format: str = FORMAT_JPEG,
+        profile: str = DEFAULT_PROFILE,
+    ) -> int:
+        """排队一个瓦片金字塔导出任务；完成时 result 为 (入口路径, 瓦片数)。"""
+
+        def run(job: ExportJob) -> Tuple[str, int]:
+            def progress(done: int, total: int) -> None:
+                job.total = total
+                self._signals.progress.emit(job.job_id, done, total)
+
+            entry_path = export_pyramid(
+                document,
+                output_root_dir,
+                kind,
+                tile_size,
+                overlap,
+                output_format=output_format,
+                profile=profile,
+                workers=workers,
+                progress=progress,
+                cancel_event=job.cancel_event,
+            )
+            return entry_path, job.total
+
+        return self._submit(JOB_KIND_PYRAMID, document, f"金字塔：{os.path.basename(document.path)}", run)
+
+    def submit_save(self, document: ImageDocument, target_path: str, profile: str = DEFAULT_PROFILE) -> int:
+        """排队渲染并保存 document 中尚未保存的编辑；完成时 result 为 (目标路径, DecodedPreview)。"""
+
+        def run(job: ExportJob):
+            self._signals.progress.emit(job.job_id, 0, 1)
+            decoded = save_document_to_file(document, target_path, profile)
+            self._signals.progress.emit(job.job_id, 1, 1)
+            return target_path, decoded
+
+        return self._submit(JOB_KIND_SAVE, document, f"保存：{os.path.basename(target_path)}", run)
+
+    def cancel(self, job_id: int) -> None:
+        for job in list(self._queue):
+            if job.job_id == job_id:
+                self._queue.remove(job)
+                self.jobCancelled.emit(job.job_id, job.kind)
+                self._emit_queue_changed()
+                return
+        job = self._running.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+
+    def cancel_all(self) -> None:
+        while self._queue:
+            job = self._queue.popleft()
+            self.jobCancelled.emit(job.job_id, job.kind)
+        for job in self._running.values():
+            job.cancel_event.set()
+        self._emit_queue_changed()
+
+    def shutdown(self) -> None:
+        """取消全部任务并等待运行中的任务停下，供窗口关闭时调用。"""
+        self.cancel_all()
+        self._pool.waitForDone()
+
+    def _submit(self, kind: str, document: ImageDocument, description: str, run) -> int:
+        self._next_id += 1
+        job = ExportJob(job_id=self._next_id, kind=kind, document=document, description=description, run=run)
+        self._queue.append(job)
+        self.jobQueued.emit(job.job_id, description)
+        self._start_next()
+        self._emit_queue_changed()
+        return job.job_id
+
+    def _start_next(self) -> None:
+        while self._queue and len(self._running) < self._max_concurrent:
+            job = self._queue.popleft()
+            self._running[job.job_id] = job
+            self.jobStarted.emit(job.job_id, job.description)
+            self._pool.start(_JobTask(job, self._signals))
+
+    def _finish(self, job_id: int) -> Optional[ExportJob]:
+        job = self._running.pop(job_id, None)
+        self._start_next()
+        self._emit_queue_changed()
+        return job
+
+    def _on_job_finished(self, job_id: int, result: object) -> None:
+        job = self._finish(job_id)
+        if job is not None:
+            self.jobFinished.emit(job_id, job.kind, result)
+
+    def _on_job_failed(self, job_id: int, message: str) -> None:
+        job = self._finish(job_id)
+        if job is not None:
+            self.jobFailed.emit(job_id, job.kind, message)
+
+    def _on_job_cancelled(self, job_id: int) -> None:
+        job = self._finish(job_id)
+        if job is not None:
+            self.jobCancelled.emit(job_id, job.kind)
+
+    def _emit_queue_changed(self) -> None:
+        self.queueChanged.emit(len(self._running), len(self._queue))
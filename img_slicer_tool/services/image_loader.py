@@ -1,14 +1,41 @@
 from __future__ import annotations
 
 import os
-from typing import Tuple
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Tuple
 
-from PIL import Image
+from PIL import ExifTags, Image
 from PySide6.QtGui import QImage, QPixmap
 
 from models.image_document import ImageDocument
+from services.decoded_image_cache import get_decoded_image_cache
+from services.preview_cache import get_preview_cache
+from utils.qimage_utils import pil_image_to_qimage
+from utils.vips_utils import pyvips, vips_image_to_pil
 
 MAX_PREVIEW_SIZE = 4000
+# 首帧快速预览的最长边，仅用于加载过程中的占位显示。
+QUICK_PREVIEW_SIZE = 512
+# reduce() 后至少保留目标尺寸的倍数，留给 LANCZOS 做最终重采样。
+PREVIEW_REDUCING_GAP = 2
+
+BACKEND_PILLOW = "pillow"
+BACKEND_PYVIPS = "pyvips"
+# JPEG 走 Pillow draft()（DCT 缩放解码），其余大图格式优先交给 pyvips 缩略图。
+PYVIPS_PREFERRED_EXTENSIONS = {".png", ".tif", ".tiff", ".webp"}
+
+
+@dataclass(slots=True)
+class DecodedPreview:
+    """后台线程解码得到的预览数据，QPixmap 需在 GUI 线程中再行创建。"""
+
+    path: str
+    image: QImage
+    original_width: int
+    original_height: int
+    preview_width: int
+    preview_height: int
 
 
 def _calc_preview_size(width: int, height: int) -> Tuple[int, int, float]:
@@ -21,47 +48,258 @@ def _calc_preview_size(width: int, height: int) -> Tuple[int, int, float]:
     return preview_width, preview_height, ratio
 
 
+def select_preview_backend(path: str) -> str:
+    """按文件格式选择预览解码后端。"""
+    ext = os.path.splitext(path)[1].lower()
+    if pyvips is not None and ext in PYVIPS_PREFERRED_EXTENSIONS:
+        return BACKEND_PYVIPS
+    return BACKEND_PILLOW
+
+
 def load_image_document(path: str) -> ImageDocument:
+    return build_image_document(decode_preview(path))
+
+
+def decode_preview(path: str) -> DecodedPreview:
+    """解码完整质量的预览图，可在工作线程中调用。"""
     if not os.path.exists(path):
         raise FileNotFoundError(path)
 
-    with Image.open(path) as img:
-        img.load()
-        original_width, original_height = img.size
+    preview_img, original_width, original_height = _decode_preview_image_cached(path)
+    preview_width, preview_height = preview_img.size
 
-        preview_width, preview_height, ratio = _calc_preview_size(original_width, original_height)
+    return DecodedPreview(
+        path=path,
+        image=pil_image_to_qimage(preview_img),
+        original_width=original_width,
+        original_height=original_height,
+        preview_width=preview_width,
+        preview_height=preview_height,
+    )
 
-        if ratio != 1.0:
-            preview_img = img.resize((preview_width, preview_height), Image.LANCZOS)
-        else:
-            preview_img = img.copy()
 
-        preview_qimage = _pil_image_to_qimage(preview_img)
-        preview_pixmap = QPixmap.fromImage(preview_qimage)
+def preview_from_image(path: str, img: Image.Image) -> DecodedPreview:
+    """由内存中的全分辨率图像生成预览，不再读取 path（例如刚写出的裁剪结果）。
 
-    scale_x = original_width / preview_width
-    scale_y = original_height / preview_height
+    path 已存在时把缩小后的预览登记到磁盘预览缓存，之后恢复预览可直接命中。
+    """
+    preview_img = _preview_from_decoded(img)
+    if preview_img.size != img.size and os.path.exists(path):
+        cache = get_preview_cache()
+        cache.put(cache.make_key(path, _preview_cache_params(path)), preview_img, img.width, img.height)
+    return DecodedPreview(
+        path=path,
+        image=pil_image_to_qimage(preview_img),
+        original_width=img.width,
+        original_height=img.height,
+        preview_width=preview_img.width,
+        preview_height=preview_img.height,
+    )
 
-    return ImageDocument(
+
+def decode_quick_preview(path: str) -> Optional[DecodedPreview]:
+    """尽可能廉价地得到一张首帧预览：EXIF 缩略图或 JPEG 1/8 缩放解码。
+
+    无法廉价获得时返回 None，调用方直接等待完整预览即可。
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    cache = get_preview_cache()
+    if cache.contains(cache.make_key(path, _preview_cache_params(path))):
+        # 命中磁盘缓存时完整预览几乎立即可得，无需再出首帧。
+        return None
+
+    with Image.open(path) as img:
+        original_width, original_height = img.size
+        preview_width, preview_height, ratio = _calc_preview_size(original_width, original_height)
+        if ratio == 1.0:
+            return None
+
+        quick_img = _extract_exif_thumbnail(img)
+        if quick_img is None:
+            if img.format != "JPEG":
+                return None
+            img.draft(img.mode, (QUICK_PREVIEW_SIZE, QUICK_PREVIEW_SIZE))
+            img.load()
+            quick_img = img.copy()
+
+    quick_img.thumbnail((QUICK_PREVIEW_SIZE, QUICK_PREVIEW_SIZE), Image.BILINEAR)
+    return DecodedPreview(
         path=path,
+        image=pil_image_to_qimage(quick_img),
         original_width=original_width,
         original_height=original_height,
         preview_width=preview_width,
         preview_height=preview_height,
+    )
+
+
+def decode_thumbnail(path: str, max_size: int) -> QImage:
+    """解码不超过 max_size 的缩略图，用于文件列表等场景，可在工作线程中调用。"""
+    if select_preview_backend(path) == BACKEND_PYVIPS:
+        thumb = pyvips.Image.thumbnail(path, max_size, height=max_size, size="down", no_rotate=True)
+        return pil_image_to_qimage(vips_image_to_pil(thumb))
+
+    with Image.open(path) as img:
+        # thumbnail() 内部会对 JPEG 调用 draft()，并先以 reduce() 粗缩。
+        img.thumbnail((max_size, max_size), Image.BILINEAR)
+        return pil_image_to_qimage(img)
+
+
+def build_image_document(decoded: DecodedPreview) -> ImageDocument:
+    """在 GUI 线程中把解码结果转换为 ImageDocument。"""
+    preview_pixmap = QPixmap.fromImage(decoded.image)
+
+    scale_x = decoded.original_width / decoded.preview_width
+    scale_y = decoded.original_height / decoded.preview_height
+
+    return ImageDocument(
+        path=decoded.path,
+        original_width=decoded.original_width,
+        original_height=decoded.original_height,
+        preview_width=decoded.preview_width,
+        preview_height=decoded.preview_height,
         scale_x=scale_x,
         scale_y=scale_y,
         preview_pixmap=preview_pixmap,
     )
 
 
-def _pil_image_to_qimage(pil_image: Image.Image) -> QImage:
-    if pil_image.mode == "RGB":
-        data = pil_image.tobytes("raw", "RGB")
-        return QImage(data, pil_image.width, pil_image.height, QImage.Format.Format_RGB888)
-    if pil_image.mode == "RGBA":
-        data = pil_image.tobytes("raw", "RGBA")
-        return QImage(data, pil_image.width, pil_image.height, QImage.Format.Format_RGBA8888)
+def read_image_size(path: str) -> Tuple[int, int]:
+    """只读取文件头，返回原图精确尺寸。"""
+    if select_preview_backend(path) == BACKEND_PYVIPS:
+        header = pyvips.Image.new_from_file(path)
+        return header.width, header.height
+    with Image.open(path) as img:
+        return img.size
+
+
+def _preview_cache_params(path: str) -> Tuple[object, ...]:
+    return (MAX_PREVIEW_SIZE, select_preview_backend(path))
+
+
+def _decode_preview_image_cached(path: str) -> Tuple[Image.Image, int, int]:
+    """优先从磁盘预览缓存读取；命中时原图只读文件头以核对尺寸。"""
+    cache = get_preview_cache()
+    key = cache.make_key(path, _preview_cache_params(path))
+    cached = cache.get(key)
+    if cached is not None:
+        original_size = read_image_size(path)
+        if original_size == (cached.original_width, cached.original_height):
+            return cached.image, cached.original_width, cached.original_height
+
+    preview_img, original_width, original_height = _decode_preview_image(path)
+    if preview_img.size != (original_width, original_height):
+        # 未缩小的小图直接解码更快，不占用缓存预算。
+        cache.put(key, preview_img, original_width, original_height)
+    return preview_img, original_width, original_height
+
+
+def _decode_preview_image(path: str) -> Tuple[Image.Image, int, int]:
+    """以缩小后的尺度解码预览图，返回 (预览图, 原图宽, 原图高)。"""
+    decoded = get_decoded_image_cache().get(path)
+    if decoded is not None:
+        # 裁剪/切图刚解码过全分辨率像素，直接从内存缩放。
+        return _preview_from_decoded(decoded), decoded.width, decoded.height
+    if select_preview_backend(path) == BACKEND_PYVIPS:
+        return _decode_preview_with_pyvips(path)
+    return _decode_preview_with_pillow(path)
+
+
+def _decode_preview_with_pillow(path: str) -> Tuple[Image.Image, int, int]:
+    img = Image.open(path)
+    try:
+        # draft() 会修改 img.size，原图尺寸必须在此之前读取。
+        original_width, original_height = img.size
+        preview_width, preview_height, ratio = _calc_preview_size(original_width, original_height)
+
+        if ratio != 1.0 and img.format == "JPEG":
+            # JPEG 可直接按 1/2、1/4、1/8 进行 DCT 缩放解码，无需整图解码。
+            img.draft(img.mode, (preview_width, preview_height))
+            img.load()
+            return _preview_from_decoded(img, (preview_width, preview_height)), original_width, original_height
+
+        # 其余情况本就需要整图解码，结果登记到解码缓存供裁剪/切图复用。
+        img.load()
+        if get_decoded_image_cache().put(path, img):
+            cached, img = img, None
+            return _preview_from_decoded(cached), original_width, original_height
+        return _preview_from_decoded(img), original_width, original_height
+    finally:
+        if img is not None:
+            img.close()
+
+
+def _preview_from_decoded(
+    img: Image.Image,
+    preview_size: Optional[Tuple[int, int]] = None,
+) -> Image.Image:
+    """从已解码图像生成预览；preview_size 缺省时按原图尺寸计算（img 可能已被 draft 缩小）。"""
+    if preview_size is None:
+        preview_width, preview_height, ratio = _calc_preview_size(img.width, img.height)
+        if ratio == 1.0:
+            return img.copy()
+    else:
+        preview_width, preview_height = preview_size
+
+    source = img
+    if img.mode.startswith("I;16"):
+        # Pillow 无法直接缩放 I;16，转为 32 位整型后仍以 16 位灰度显示。
+        source = img.convert("I")
+    reduced = _reduce_for_preview(source, preview_width, preview_height)
+    return reduced.resize((preview_width, preview_height), Image.LANCZOS)
+
+
+def _reduce_for_preview(img: Image.Image, preview_width: int, preview_height: int) -> Image.Image:
+    """用整数倍 box 缩小先去掉大部分像素，剩余部分交给 LANCZOS。"""
+    if img.mode in ("1", "P"):
+        return img
+    factor = min(img.width // preview_width, img.height // preview_height) // PREVIEW_REDUCING_GAP
+    if factor < 2:
+        return img
+    return img.reduce(factor)
+
+
+def _decode_preview_with_pyvips(path: str) -> Tuple[Image.Image, int, int]:
+    # new_from_file 只读取文件头，尺寸与 Pillow 一致且精确。
+    header = pyvips.Image.new_from_file(path)
+    original_width, original_height = header.width, header.height
+    preview_width, preview_height, _ = _calc_preview_size(original_width, original_height)
+
+    thumb = pyvips.Image.thumbnail(
+        path,
+        preview_width,
+        height=preview_height,
+        size="force",
+        no_rotate=True,
+    )
+    return vips_image_to_pil(thumb), original_width, original_height
+
+
+def _extract_exif_thumbnail(img: Image.Image) -> Optional[Image.Image]:
+    """读取 EXIF IFD1 中内嵌的 JPEG 缩略图，宽高比与原图不符时放弃。"""
+    raw_exif = img.info.get("exif")
+    if not raw_exif:
+        return None
+    try:
+        thumb_ifd = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+    except Exception:  # noqa: BLE001 - 损坏的 EXIF 直接忽略
+        return None
+
+    offset = thumb_ifd.get(0x0201)  # JPEGInterchangeFormat
+    length = thumb_ifd.get(0x0202)  # JPEGInterchangeFormatLength
+    if not offset or not length:
+        return None
+
+    # 偏移量相对 TIFF 头计算，需跳过 "Exif\0\0" 前缀。
+    start = offset + (6 if raw_exif.startswith(b"Exif") else 0)
+    data = raw_exif[start : start + length]
+    try:
+        thumb = Image.open(BytesIO(data))
+        thumb.load()
+    except Exception:  # noqa: BLE001
+        return None
 
-    converted = pil_image.convert("RGBA")
-    data = converted.tobytes("raw", "RGBA")
-    return QImage(data, converted.width, converted.height, QImage.Format.Format_RGBA8888)
+    if abs(thumb.width / thumb.height - img.width / img.height) > 0.02:
+        return None
+    return thumb
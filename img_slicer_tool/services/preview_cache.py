@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from PIL import Image
+from PySide6.QtCore import QStandardPaths
+
+# 缓存格式或预览参数变化时递增，旧条目自然失效。
+PREVIEW_CACHE_VERSION = 2
+DEFAULT_PREVIEW_CACHE_BYTES = 1024 * 1024 * 1024
+PREVIEW_CACHE_DIR_NAME = "previews"
+# 写入中断遗留的临时文件/孤立像素文件，超过该时长后在淘汰时清理。
+STALE_FILE_SECONDS = 3600
+
+
+@dataclass(slots=True)
+class CachedPreview:
+    image: Image.Image
+    original_width: int
+    original_height: int
+
+
+class PreviewCache:
+    """磁盘预览缓存：以原图路径、mtime、大小及预览参数为键，按最近使用时间淘汰。
+
+    每个条目由未压缩的像素文件（.raw）和描述文件（.json）组成，json 最后写入，
+    其存在即代表条目完整；读取时校验长度与 CRC，损坏的条目会被删除并视为未命中。
+    调色板与透明色记录在描述文件中，P/PA 预览命中时颜色与首次解码一致。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_PREVIEW_CACHE_BYTES) -> None:
+        self._cache_dir = cache_dir
+        self._max_bytes = max(0, int(max_bytes))
+        self._evict_lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def make_key(self, path: str, preview_params: Tuple[object, ...]) -> str:
+        stat = os.stat(path)
+        raw_key = json.dumps(
+            [
+                PREVIEW_CACHE_VERSION,
+                os.path.abspath(path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                list(preview_params),
+            ]
+        )
+        return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._meta_path(key))
+
+    def get(self, key: str) -> Optional[CachedPreview]:
+        meta_path = self._meta_path(key)
+        raw_path = self._raw_path(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(raw_path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._remove_entry(key)
+            return None
+
+        try:
+            if len(data) != meta["nbytes"] or zlib.crc32(data) != meta["crc32"]:
+                raise ValueError("预览缓存条目已损坏")
+            size = (meta["width"], meta["height"])
+            image = Image.frombuffer(meta["mode"], size, data, "raw", meta["mode"], 0, 1)
+            palette = meta.get("palette")
+            if palette is not None:
+                image.putpalette(palette["data"], palette["mode"])
+            if "transparency" in meta:
+                image.info["transparency"] = _decode_transparency(meta["transparency"])
+            cached = CachedPreview(
+                image=image,
+                original_width=int(meta["original_width"]),
+                original_height=int(meta["original_height"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            self._remove_entry(key)
+            return None
+
+        self._touch(key)
+        return cached
+
+    def put(self, key: str, image: Image.Image, original_width: int, original_height: int) -> None:
+        if self._max_bytes <= 0:
+            return
+        data = image.tobytes()
+        if len(data) > self._max_bytes:
+            return
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        meta = {
+            "mode": image.mode,
+            "width": image.width,
+            "height": image.height,
+            "original_width": original_width,
+            "original_height": original_height,
+            "nbytes": len(data),
+            "crc32": zlib.crc32(data),
+        }
+        if image.mode in ("P", "PA") and image.palette is not None:
+            palette_mode = image.palette.mode
+            meta["palette"] = {"mode": palette_mode, "data": image.getpalette(palette_mode)}
+        if "transparency" in image.info:
+            meta["transparency"] = _encode_transparency(image.info["transparency"])
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        raw_tmp = self._raw_path(key) + suffix
+        meta_tmp = self._meta_path(key) + suffix
+        try:
+            with open(raw_tmp, "wb") as file:
+                file.write(data)
+            os.replace(raw_tmp, self._raw_path(key))
+            with open(meta_tmp, "w", encoding="utf-8") as file:
+                json.dump(meta, file)
+            os.replace(meta_tmp, self._meta_path(key))
+        except OSError:
+            for tmp_path in (raw_tmp, meta_tmp):
+                _remove_quietly(tmp_path)
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._evict_lock:
+            entries: List[Tuple[float, int, str]] = []
+            total = 0
+            try:
+                names = os.listdir(self._cache_dir)
+            except OSError:
+                return
+            self._remove_stale_files(names)
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                key = name[: -len(".json")]
+                try:
+                    last_used = os.stat(self._meta_path(key)).st_mtime
+                    size = os.path.getsize(self._raw_path(key)) + os.path.getsize(self._meta_path(key))
+                except OSError:
+                    continue
+                entries.append((last_used, size, key))
+                total += size
+
+            entries.sort()
+            for _, size, key in entries:
+                if total <= self._max_bytes:
+                    break
+                self._remove_entry(key)
+                total -= size
+
+    def _remove_stale_files(self, names: List[str]) -> None:
+        name_set = set(names)
+        now = time.time()
+        for name in names:
+            is_tmp = name.endswith(".tmp")
+            is_orphan = name.endswith(".raw") and name[: -len(".raw")] + ".json" not in name_set
+            if not (is_tmp or is_orphan):
+                continue
+            file_path = os.path.join(self._cache_dir, name)
+            try:
+                if now - os.stat(file_path).st_mtime > STALE_FILE_SECONDS:
+                    os.remove(file_path)
+            except OSError:
+                continue
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._meta_path(key))
+        except OSError:
+            pass
+
+    def _remove_entry(self, key: str) -> None:
+        # 先删描述文件，保证中途失败时不会留下“看似完整”的条目。
+        _remove_quietly(self._meta_path(key))
+        _remove_quietly(self._raw_path(key))
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.json")
+
+    def _raw_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.raw")
+
+
+def _encode_transparency(value: object) -> object:
+    """info["transparency"] 可能是序号、每个调色板项的 alpha 字节串或 RGB 元组。"""
+    if isinstance(value, bytes):
+        return {"bytes": list(value)}
+    if isinstance(value, tuple):
+        return {"tuple": list(value)}
+    return value
+
+
+def _decode_transparency(value: object) -> object:
+    if isinstance(value, dict):
+        if "bytes" in value:
+            return bytes(value["bytes"])
+        return tuple(value["tuple"])
+    return value
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_default_cache: Optional[PreviewCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache_dir() -> str:
+    base_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".cache", "img_slicer_tool")
+    return os.path.join(base_dir, PREVIEW_CACHE_DIR_NAME)
+
+
+def get_preview_cache() -> PreviewCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PreviewCache(default_cache_dir())
+        return _default_cache
+
+
+def configure_preview_cache(max_bytes: int, cache_dir: Optional[str] = None) -> PreviewCache:
+    """调整默认预览缓存的字节预算或目录；max_bytes 为 0 时关闭缓存。"""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = PreviewCache(cache_dir or default_cache_dir(), max_bytes)
+        return _default_cache
@@ -0,0 +1,284 @@
+"""多级瓦片金字塔导出：Deep Zoom（DZI）与 z/x/y（XYZ）两种目录结构。
+
+原图自上而下按行带只读取一遍；每一级在收到足够的行后立即写出一行瓦片，同时
+把自身的像素按 2x2 平均缩小后交给下一级，因此每级都由上一级缩小得到，而不是
+从原图重新采样。内存中每级只保留一行瓦片（加重叠）高度的像素。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from PIL import Image
+
+from models.image_document import ImageDocument
+from services.decoded_image_cache import open_decoded_image
+from services.encoder_profiles import DEFAULT_PROFILE, FORMAT_JPEG, convert_for_format, resolve_encoding
+from services.slice_service import should_stream
+from services.tile_encoder import TileEncoder, TileSpec, raise_if_cancelled
+from utils.vips_utils import pyvips, vips_band_to_pil
+
+PYRAMID_DZI = "dzi"
+PYRAMID_XYZ = "xyz"
+PYRAMID_LABELS = {
+    PYRAMID_DZI: "Deep Zoom（DZI）",
+    PYRAMID_XYZ: "XYZ（z/x/y）",
+}
+# Deep Zoom 常用 254 + 1 像素重叠，使带重叠的瓦片恰好为 256；XYZ 瓦片没有重叠。
+DEFAULT_PYRAMID_TILE_SIZE = {PYRAMID_DZI: 254, PYRAMID_XYZ: 256}
+DEFAULT_PYRAMID_OVERLAP = {PYRAMID_DZI: 1, PYRAMID_XYZ: 0}
+# 每次从原图读取的行数。
+PYRAMID_BAND_ROWS = 512
+
+_DZI_NAMESPACE = "http://schemas.microsoft.com/deepzoom/2008"
+# 可以直接按 2x2 平均缩小的模式，其余模式读取时先转换。
+_RESAMPLE_MODES = {"L", "LA", "RGB", "RGBA", "CMYK"}
+
+
+@dataclass(frozen=True, slots=True)
+class PyramidLevel:
+    """金字塔中的一级：目录名、像素尺寸与瓦片行列数。"""
+
+    name: str
+    width: int
+    height: int
+    cols: int
+    rows: int
+
+
+def plan_pyramid_levels(width: int, height: int, kind: str, tile_size: int) -> List[PyramidLevel]:
+    """从原图尺寸逐级减半（向上取整），返回自最高分辨率到最低分辨率的各级。
+
+    DZI 一直缩小到 1x1，级号从 0（1x1）开始；XYZ 缩小到整幅图放得进一个瓦片为止，
+    z=0 为最小的一级。
+    """
+    sizes = [(width, height)]
+    while True:
+        w, h = sizes[-1]
+        if kind == PYRAMID_DZI and w == 1 and h == 1:
+            break
+        if kind == PYRAMID_XYZ and w <= tile_size and h <= tile_size:
+            break
+        sizes.append(((w + 1) // 2, (h + 1) // 2))
+    count = len(sizes)
+    return [
+        PyramidLevel(
+            name=str(count - 1 - index),
+            width=w,
+            height=h,
+            cols=math.ceil(w / tile_size),
+            rows=math.ceil(h / tile_size),
+        )
+        for index, (w, h) in enumerate(sizes)
+    ]
+
+
+def export_pyramid(
+    doc: ImageDocument,
+    output_root_dir: str,
+    kind: str = PYRAMID_DZI,
+    tile_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    output_format: str = FORMAT_JPEG,
+    profile: str = DEFAULT_PROFILE,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> str:
+    """导出瓦片金字塔并返回入口路径。
+
+    DZI 写出 <名称>.dzi 与 <名称>_files/<级>/<列>_<行>.<扩展名>，返回 .dzi 文件；
+    XYZ 写出 <名称>_tiles/<z>/<x>/<y>.<扩展名>，返回该目录。tile_size / overlap
+    缺省时使用各结构的惯用值。progress、cancel_event 与 workers 的含义同
+    slice_document_to_tiles。
+    """
+    if kind not in PYRAMID_LABELS:
+        raise ValueError(f"未知的金字塔类型：{kind}")
+    if not os.path.exists(doc.path):
+        raise FileNotFoundError(f"原始图片不存在：{doc.path}")
+    if not output_root_dir:
+        raise ValueError("输出根路径不能为空")
+    tile_size = DEFAULT_PYRAMID_TILE_SIZE[kind] if tile_size is None else tile_size
+    overlap = DEFAULT_PYRAMID_OVERLAP[kind] if overlap is None else overlap
+    if tile_size < 16:
+        raise ValueError("瓦片尺寸不能小于 16")
+    if not 0 <= overlap < tile_size // 2:
+        raise ValueError("瓦片重叠必须小于瓦片尺寸的一半")
+
+    encoding = resolve_encoding(os.path.splitext(doc.path)[1], output_format, profile)
+    base_name = os.path.splitext(os.path.basename(doc.path))[0]
+    if kind == PYRAMID_DZI:
+        entry_path = os.path.join(output_root_dir, f"{base_name}.dzi")
+        tiles_dir = os.path.join(output_root_dir, f"{base_name}_files")
+    else:
+        entry_path = tiles_dir = os.path.join(output_root_dir, f"{base_name}_tiles")
+
+    levels = plan_pyramid_levels(doc.original_width, doc.original_height, kind, tile_size)
+    for level in levels:
+        level_dir = os.path.join(tiles_dir, level.name)
+        os.makedirs(level_dir, exist_ok=True)
+        if kind == PYRAMID_XYZ:
+            for col in range(level.cols):
+                os.makedirs(os.path.join(level_dir, str(col)), exist_ok=True)
+
+    total = sum(level.cols * level.rows for level in levels)
+    done_count = 0
+
+    def on_tile_done(_spec: TileSpec, _report: Dict[str, Any]) -> None:
+        nonlocal done_count
+        done_count += 1
+        if progress is not None:
+            progress(done_count, total)
+
+    if progress is not None:
+        progress(0, total)
+    with TileEncoder(workers) as encoder:
+
+        def emit(band: Image.Image, tiles: List[TileSpec]) -> None:
+            encoder.encode(band, tiles, tiles_dir, encoding.save_kwargs, on_tile_done, cancel_event)
+
+        # 从最小的一级向上建立，每级持有下一级（更小一级）的引用。
+        top: Optional[_LevelBuilder] = None
+        for level in reversed(levels):
+            top = _LevelBuilder(level, kind, tile_size, overlap, encoding.ext, emit, top)
+        for band in _iter_source_bands(doc):
+            raise_if_cancelled(cancel_event)
+            top.feed(band)
+        top.finish()
+
+    if kind == PYRAMID_DZI:
+        _write_dzi(entry_path, doc.original_width, doc.original_height, tile_size, overlap, encoding.ext)
+    return entry_path
+
+
+class _LevelBuilder:
+    """一级金字塔的行缓冲：凑够一行瓦片即写出，并把像素缩小后交给下一级。"""
+
+    def __init__(
+        self,
+        level: PyramidLevel,
+        kind: str,
+        tile_size: int,
+        overlap: int,
+        ext: str,
+        emit: Callable[[Image.Image, List[TileSpec]], None],
+        below: Optional["_LevelBuilder"],
+    ) -> None:
+        self._level = level
+        self._kind = kind
+        self._tile_size = tile_size
+        self._overlap = overlap
+        self._ext = ext
+        self._emit = emit
+        self._below = below
+        # 尚未写出的瓦片行所需的像素，首行位于本级的 _strip_top。
+        self._strip: Optional[Image.Image] = None
+        self._strip_top = 0
+        self._received = 0
+        self._next_row = 0
+        # 缩小需要成对的行，奇数行留到下一次。
+        self._carry: Optional[Image.Image] = None
+
+    def feed(self, band: Image.Image) -> None:
+        self._strip = band if self._strip is None else _stack(self._strip, band)
+        self._received += band.height
+        self._emit_ready(final=False)
+        if self._below is None:
+            return
+        rows = band if self._carry is None else _stack(self._carry, band)
+        even = rows.height - rows.height % 2
+        self._carry = rows.crop((0, even, rows.width, rows.height)) if even < rows.height else None
+        if even:
+            self._below.feed(rows.crop((0, 0, rows.width, even)).reduce(2))
+
+    def finish(self) -> None:
+        self._emit_ready(final=True)
+        if self._below is None:
+            return
+        if self._carry is not None:
+            self._below.feed(self._carry.reduce(2))
+            self._carry = None
+        self._below.finish()
+
+    def _emit_ready(self, final: bool) -> None:
+        level, size, overlap = self._level, self._tile_size, self._overlap
+        while self._next_row < level.rows and self._strip is not None:
+            row = self._next_row
+            top = max(0, row * size - overlap)
+            bottom = min(level.height, (row + 1) * size + overlap)
+            if self._received < bottom and not final:
+                return
+            tiles = []
+            for col in range(level.cols):
+                left = max(0, col * size - overlap)
+                right = min(level.width, (col + 1) * size + overlap)
+                box = (left, top - self._strip_top, right, bottom - self._strip_top)
+                tiles.append(TileSpec(row=row, col=col, box=box, filename=self._tile_name(col, row)))
+            self._emit(self._strip, tiles)
+            self._next_row += 1
+            if self._next_row == level.rows:
+                self._strip = None
+                return
+            # 下一行瓦片从 (row + 1) * size - overlap 开始，之前的像素不再需要。
+            keep_from = (row + 1) * size - overlap
+            if keep_from > self._strip_top:
+                self._strip = self._strip.crop((0, keep_from - self._strip_top, self._strip.width, self._strip.height))
+                self._strip_top = keep_from
+
+    def _tile_name(self, col: int, row: int) -> str:
+        if self._kind == PYRAMID_DZI:
+            return os.path.join(self._level.name, f"{col}_{row}{self._ext}")
+        return os.path.join(self._level.name, str(col), f"{row}{self._ext}")
+
+
+def _iter_source_bands(doc: ImageDocument) -> Iterator[Image.Image]:
+    """自上而下逐个产出原图的行带；大图用 pyvips 顺序读取，否则从解码缓存裁剪。
+
+    带未保存裁剪的文档只读取原图中的裁剪区域。
+    """
+    left, top, right, bottom = doc.source_box
+    if should_stream(doc):
+        source = pyvips.Image.new_from_file(doc.path, access="sequential")
+        for band_top in range(top, bottom, PYRAMID_BAND_ROWS):
+            height = min(PYRAMID_BAND_ROWS, bottom - band_top)
+            yield _resample_ready(vips_band_to_pil(source.crop(left, band_top, right - left, height)))
+        return
+    with open_decoded_image(doc.path) as img:
+        for band_top in range(top, bottom, PYRAMID_BAND_ROWS):
+            band = img.crop((left, band_top, right, min(bottom, band_top + PYRAMID_BAND_ROWS)))
+            yield _resample_ready(band)
+
+
+def _resample_ready(band: Image.Image) -> Image.Image:
+    """转换为可以按 2x2 平均缩小的模式。"""
+    if band.mode in _RESAMPLE_MODES:
+        return band
+    if band.mode in ("PA", "RGBa", "La") or (band.mode == "P" and "transparency" in band.info):
+        return band.convert("RGBA")
+    if band.mode.startswith("I") or band.mode in ("1", "F"):
+        return convert_for_format(band, "JPEG")
+    return band.convert("RGB")
+
+
+def _stack(upper: Image.Image, lower: Image.Image) -> Image.Image:
+    stacked = Image.new(upper.mode, (upper.width, upper.height + lower.height))
+    stacked.paste(upper, (0, 0))
+    stacked.paste(lower, (0, upper.height))
+    return stacked
+
+
+def _write_dzi(path: str, width: int, height: int, tile_size: int, overlap: int, ext: str) -> None:
+    content = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="{_DZI_NAMESPACE}" Format="{ext.lstrip(".")}" Overlap="{overlap}" TileSize="{tile_size}">\n'
+        f'  <Size Width="{width}" Height="{height}"/>\n'
+        "</Image>\n"
+    )
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+from contextlib import ExitStack
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import ExifTags, Image
+
+from services.decoded_image_cache import estimate_image_bytes, get_decoded_image_cache, open_decoded_image
+from utils.vips_utils import pyvips, vips_image_to_pil
+
+# LOD 瓦片无法部分解码时保留的整图解码结果（JPEG 可能经 draft() 缩小）的上限，
+# 约可容纳 5 亿像素的 RGB 图；更大的图每个瓦片单独解码。
+DEFAULT_REGION_SOURCE_BYTES = 2 * 1024 * 1024 * 1024
+
+# 按行存放的原始像素（raw 描述符）每像素字节数，用于按行列偏移只读取区域。
+_RAW_BYTES_PER_PIXEL = {
+    "L": 1,
+    "P": 1,
+    "LA": 2,
+    "I;16": 2,
+    "I;16B": 2,
+    "RGB": 3,
+    "BGR": 3,
+    "RGBA": 4,
+    "RGBX": 4,
+    "BGRX": 4,
+    "CMYK": 4,
+}
+
+Box = Tuple[int, int, int, int]
+
+
+def read_region(path: str, box: Tuple[int, int, int, int], downscale: int = 1) -> Image.Image:
+    """读取原图 box 区域，并按 downscale 整数倍缩小。
+
+    box 为原图坐标 (x1, y1, x2, y2)；返回图像尺寸约为 box 尺寸 / downscale。
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    x1, y1, x2, y2 = box
+    if x2 <= x1 or y2 <= y1:
+        raise ValueError("读取区域无效")
+    downscale = max(1, int(downscale))
+
+    if pyvips is not None:
+        return _read_region_with_pyvips(path, box, downscale)
+    return _read_region_with_pillow(path, box, downscale)
+
+
+def decode_region(path: str, box: Tuple[int, int, int, int]) -> Image.Image:
+    """只解码覆盖 box 的像素并返回该区域的全分辨率图像，供裁剪使用。
+
+    解码缓存命中时直接裁剪；有 pyvips 时随机访问读取；否则按 Pillow 的瓦片/条带
+    描述符只解码与 box 相交的部分。整块压缩、无法部分解码的格式（如 JPEG、
+    libtiff 压缩的 TIFF）才回退到整图解码，结果登记到解码缓存。
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    x1, y1, x2, y2 = box
+    if x2 <= x1 or y2 <= y1:
+        raise ValueError("读取区域无效")
+
+    with RegionReader(path) as reader:
+        return reader.read(box)
+
+
+class RegionReader:
+    """连续读取同一张图的多个区域（例如预估时的样本切片）。
+
+    能部分解码时每个区域单独解码；否则在第一次读取时整图解码一次，之后的区域都从
+    这份像素裁剪，不会为每个区域重复整图解码。decoded_pixels 累计实际解码的像素数，
+    供调用方按解码量而不是区域面积折算耗时。
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._stack = ExitStack()
+        self._whole: Optional[Image.Image] = None
+        self.decoded_pixels = 0
+
+    def __enter__(self) -> "RegionReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def whole_image_decoded(self) -> bool:
+        """是否回退到了整图解码。"""
+        return self._whole is not None
+
+    def plan(self, boxes: Sequence[Box]) -> None:
+        """预先告知将要读取的区域：逐个部分解码的总量不少于整图时，改为整图解码一次。
+
+        例如未隔行的 PNG 每个区域都要从第一行解码到区域底边，多个样本合计往往超过整图。
+        """
+        if self._whole is not None or pyvips is not None or get_decoded_image_cache().get(self._path) is not None:
+            return
+        with Image.open(self._path) as img:
+            width, height = img.size
+            costs = [_pillow_partial_pixels(img, box) for box in boxes]
+        if None not in costs and sum(costs) < width * height:
+            return
+        self._decode_whole()
+
+    def read(self, box: Box) -> Image.Image:
+        if self._whole is None:
+            region = self._read_partial(box)
+            if region is not None:
+                return region
+            self._decode_whole()
+        return self._whole.crop(box)
+
+    def close(self) -> None:
+        self._whole = None
+        self._stack.close()
+
+    def _read_partial(self, box: Box) -> Optional[Image.Image]:
+        """不整图解码地取得 box 区域；做不到时返回 None。"""
+        cached = get_decoded_image_cache().get(self._path)
+        if cached is not None:
+            return cached.crop(box)
+        if pyvips is not None:
+            self.decoded_pixels += (box[2] - box[0]) * (box[3] - box[1])
+            return _read_region_with_pyvips(self._path, box, 1)
+        decoded = _decode_region_with_pillow(self._path, box)
+        if decoded is None:
+            return None
+        region, pixels = decoded
+        self.decoded_pixels += pixels
+        return region
+
+    def _decode_whole(self) -> None:
+        cached = get_decoded_image_cache().get(self._path)
+        self._whole = self._stack.enter_context(open_decoded_image(self._path))
+        if cached is None:
+            self.decoded_pixels += self._whole.width * self._whole.height
+
+
+def _decode_region_with_pillow(path: str, box: Box) -> Optional[Tuple[Image.Image, int]]:
+    """改写描述符后只解码相交部分，返回 (区域, 实际解码的像素数)；无法部分解码时返回 None。"""
+    x1, y1, x2, y2 = box
+    with Image.open(path) as img:
+        trimmed = _pillow_partial_descriptors(img, box)
+        if trimmed is None:
+            return None
+        tiles, (left, top, right, bottom) = trimmed
+        img.tile = [
+            (name, (tx1 - left, ty1 - top, tx2 - left, ty2 - top), offset, args)
+            for name, (tx1, ty1, tx2, ty2), offset, args in tiles
+        ]
+        img._size = (right - left, bottom - top)
+        img.load()
+        return img.crop((x1 - left, y1 - top, x2 - left, y2 - top)), (right - left) * (bottom - top)
+
+
+def _pillow_partial_pixels(img: Image.Image, box: Box) -> Optional[int]:
+    """部分解码 box 需要解码的像素数；无法部分解码时返回 None。"""
+    trimmed = _pillow_partial_descriptors(img, box)
+    if trimmed is None:
+        return None
+    left, top, right, bottom = trimmed[1]
+    return (right - left) * (bottom - top)
+
+
+def _pillow_partial_descriptors(img: Image.Image, box: Box) -> Optional[Tuple[List[tuple], Box]]:
+    if not img.tile or getattr(img, "use_load_libtiff", False) or getattr(img, "is_animated", False):
+        return None
+    # TIFF 载入后会按方向标签旋转，区域坐标需要对应旋转后的图像。
+    if img.format == "TIFF" and img.tag_v2.get(ExifTags.Base.Orientation, 1) != 1:
+        return None
+    return _trim_tile_descriptors(img, box)
+
+
+def _trim_tile_descriptors(img: Image.Image, box: Box) -> Optional[Tuple[List[tuple], Box]]:
+    """返回与 box 相交的描述符及它们覆盖的范围。
+
+    多个描述符（分块或分条的 TIFF）保留相交的部分；单块的原始像素直接按行列偏移；
+    未隔行的 PNG 是逐行压缩的，只能解码到 box 的最后一行为止。
+    """
+    x1, y1, x2, y2 = box
+    width, height = img.size
+    if len(img.tile) > 1:
+        tiles = [tile for tile in img.tile if _boxes_intersect(tile[1], box)]
+        if not tiles:
+            return None
+        bounds = (
+            min(tile[1][0] for tile in tiles),
+            min(tile[1][1] for tile in tiles),
+            max(tile[1][2] for tile in tiles),
+            max(tile[1][3] for tile in tiles),
+        )
+        return tiles, bounds
+
+    name, extents, offset, args = img.tile[0]
+    if tuple(extents) != (0, 0, width, height):
+        return None
+    if name == "zip" and not img.info.get("interlace"):
+        return [(name, (0, 0, width, y2), offset, args)], (0, 0, width, y2)
+    if name == "raw":
+        if isinstance(args, str):
+            args = (args,)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        pixel_bytes = _RAW_BYTES_PER_PIXEL.get(rawmode)
+        if pixel_bytes is None:
+            return None
+        stride = stride or width * pixel_bytes
+        # 自下而上存放（BMP）时，文件中的第一行是区域的最后一行。
+        first_row = y1 if orientation > 0 else height - y2
+        offset += first_row * stride + x1 * pixel_bytes
+        return [(name, box, offset, (rawmode, stride, orientation))], box
+    return None
+
+
+def _boxes_intersect(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _read_region_with_pyvips(path: str, box: Tuple[int, int, int, int], downscale: int) -> Image.Image:
+    x1, y1, x2, y2 = box
+    image = pyvips.Image.new_from_file(path, access="random")
+    region = image.crop(x1, y1, x2 - x1, y2 - y1)
+    if downscale > 1:
+        region = region.shrink(downscale, downscale)
+    return vips_image_to_pil(region)
+
+
+def _read_region_with_pillow(path: str, box: Tuple[int, int, int, int], downscale: int) -> Image.Image:
+    """全分辨率级别优先复用解码缓存；整图放不进缓存时按描述符部分解码，
+    做不到时才整图解码一次并保留在 _region_sources 中。JPEG 低级别按 draft() 缩放解码。
+    """
+    draft_scale = _draft_scale_for_path(path, downscale)
+    if draft_scale == 1:
+        cache = get_decoded_image_cache()
+        cached = cache.get(path)
+        if cached is not None:
+            return _crop_and_reduce(cached, 1, box, downscale)
+        with Image.open(path) as img:
+            fits_cache = estimate_image_bytes(img) <= cache.max_bytes
+        if fits_cache:
+            # 全分辨率像素与裁剪/切图共用解码缓存。
+            with open_decoded_image(path) as source:
+                return _crop_and_reduce(source, 1, box, downscale)
+        held = _region_sources.get(path, 1)
+        if held is not None:
+            return _crop_and_reduce(held[0], held[1], box, downscale)
+        decoded = _decode_region_with_pillow(path, box)
+        if decoded is not None:
+            return _crop_and_reduce(decoded[0], 1, (0, 0, box[2] - box[0], box[3] - box[1]), downscale)
+    source, source_scale = _region_sources.get_or_decode(path, draft_scale)
+    return _crop_and_reduce(source, source_scale, box, downscale)
+
+
+def _crop_and_reduce(
+    source: Image.Image,
+    source_scale: int,
+    box: Tuple[int, int, int, int],
+    downscale: int,
+) -> Image.Image:
+    x1, y1, x2, y2 = box
+    source_box = (
+        x1 // source_scale,
+        y1 // source_scale,
+        min(source.width, math.ceil(x2 / source_scale)),
+        min(source.height, math.ceil(y2 / source_scale)),
+    )
+    region = source.crop(source_box)
+
+    remaining = downscale // source_scale
+    if remaining > 1:
+        if region.mode not in ("L", "LA", "RGB", "RGBA"):
+            region = region.convert("RGBA")
+        region = region.reduce(remaining)
+    return region
+
+
+class _RegionSourceHolder:
+    """LOD 瓦片复用的单份整图解码结果及其相对原图的缩小倍数。
+
+    只保留最近一个来源，估算占用超过 max_bytes 的不保留；切换或关闭文档时由
+    release_region_source 释放。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_REGION_SOURCE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[str, int, int, int]] = None
+        self._source: Optional[Tuple[Image.Image, int]] = None
+
+    def get(self, path: str, draft_scale: int) -> Optional[Tuple[Image.Image, int]]:
+        key = _source_key(path, draft_scale)
+        with self._lock:
+            return self._source if self._key == key else None
+
+    def get_or_decode(self, path: str, draft_scale: int) -> Tuple[Image.Image, int]:
+        key = _source_key(path, draft_scale)
+        # 解码期间持锁，并发请求的瓦片等待同一次解码而不是各自解码。
+        with self._lock:
+            if self._key == key and self._source is not None:
+                return self._source
+            source = _decode_drafted(path, draft_scale)
+            if estimate_image_bytes(source[0]) <= self.max_bytes:
+                self._key, self._source = key, source
+            return source
+
+    def release(self, path: Optional[str] = None) -> None:
+        with self._lock:
+            if path is None or (self._key is not None and self._key[0] == path):
+                self._key, self._source = None, None
+
+
+_region_sources = _RegionSourceHolder()
+
+
+def release_region_source(path: Optional[str] = None) -> None:
+    """释放 LOD 瓦片为 path（省略时为任意文件）保留的整图解码结果。"""
+    _region_sources.release(path)
+
+
+def _source_key(path: str, draft_scale: int) -> Tuple[str, int, int, int]:
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size, draft_scale
+
+
+def _decode_drafted(path: str, draft_scale: int) -> Tuple[Image.Image, int]:
+    """整图解码；JPEG 借助 draft() 按 draft_scale 缩放解码。返回图像及其相对原图的倍数。"""
+    with Image.open(path) as img:
+        original_width = img.width
+        if draft_scale > 1:
+            img.draft(img.mode, (max(1, img.width // draft_scale), max(1, img.height // draft_scale)))
+        img.load()
+        source = img.copy()
+    # draft() 只给出不小于请求的尺寸，实际倍数以解码结果为准。
+    return source, max(1, round(original_width / source.width))
+
+
+def _draft_scale_for_path(path: str, downscale: int) -> int:
+    # 仅 JPEG 支持 DCT 缩放解码，且只支持 1/2、1/4、1/8。
+    if os.path.splitext(path)[1].lower() not in (".jpg", ".jpeg"):
+        return 1
+    scale = 1
+    while scale * 2 <= min(downscale, 8):
+        scale *= 2
+    return scale
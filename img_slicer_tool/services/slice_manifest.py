@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from services.tile_encoder import PARTIAL_TILE_SUFFIX, TileSpec
+
+MANIFEST_FILENAME = ".slice_manifest.jsonl"
+_MANIFEST_VERSION = 2
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(slots=True)
+class SlicePlan:
+    """一次切图相对于上次输出的差异。"""
+
+    unchanged: List[TileSpec] = field(default_factory=list)
+    # 像素与设置完全相同、只是行列号变化的切片：由旧文件改名得到。
+    moves: List[Tuple[str, TileSpec]] = field(default_factory=list)
+    pending: List[TileSpec] = field(default_factory=list)
+    stale: List[str] = field(default_factory=list)
+
+
+class SliceManifest:
+    """输出目录中的切图清单，用于增量切图与中断后续跑。
+
+    文件为 JSON Lines：首行记录源图内容哈希，之后每写完一个切片追加一行，
+    记录文件名、原图坐标、编码设置与编码报告（如按体积上限选出的质量；后出现
+    的记录覆盖先前的）。再次切图时坐标与设置都未变化的切片直接跳过，只是换了
+    行列号的切片改名复用，不再属于本次布局的旧切片被删除。源图内容变化时全部
+    切片视为过期。
+    """
+
+    def __init__(self, output_dir: str, source: Dict[str, Any]) -> None:
+        self._output_dir = output_dir
+        self._source = source
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # 本清单写出过的全部文件名，包括已过期的，只有这些文件会被清理。
+        self._owned: Set[str] = set()
+        self._file = None
+
+    @classmethod
+    def open(cls, output_dir: str, source_path: str) -> "SliceManifest":
+        previous_source, entries, owned = _read_manifest(os.path.join(output_dir, MANIFEST_FILENAME))
+        source = _source_info(source_path, previous_source)
+        manifest = cls(output_dir, source)
+        if previous_source is not None and previous_source.get("sha256") == source["sha256"]:
+            manifest._entries = entries
+        manifest._owned = owned | set(entries)
+        manifest._rewrite()
+        return manifest
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._output_dir, MANIFEST_FILENAME)
+
+    def plan(self, tiles: Sequence[TileSpec], settings: Dict[str, Any]) -> SlicePlan:
+        settings = _normalized(settings)
+        plan = SlicePlan()
+        wanted = {spec.filename for spec in tiles}
+        reusable: Dict[Tuple[Any, ...], str] = {}
+        for name, entry in self._entries.items():
+            if self._file_exists(name):
+                reusable.setdefault(_entry_key(entry["box"], entry["settings"]), name)
+
+        for spec in tiles:
+            entry = self._entries.get(spec.filename)
+            if (
+                entry is not None
+                and entry["box"] == list(spec.box)
+                and entry["settings"] == settings
+                and self._file_exists(spec.filename)
+            ):
+                plan.unchanged.append(spec)
+                reusable.pop(_entry_key(entry["box"], entry["settings"]), None)
+        unchanged = {spec.filename for spec in plan.unchanged}
+
+        for spec in tiles:
+            if spec.filename in unchanged:
+                continue
+            source_name = reusable.pop(_entry_key(list(spec.box), settings), None)
+            if source_name is not None and source_name not in unchanged:
+                plan.moves.append((source_name, spec))
+            else:
+                plan.pending.append(spec)
+
+        moved_sources = {source_name for source_name, _spec in plan.moves}
+        plan.stale = sorted(
+            name for name in self._owned if name not in wanted and name not in moved_sources and self._file_exists(name)
+        )
+        return plan
+
+    def apply_moves(self, moves: Sequence[Tuple[str, TileSpec]], settings: Dict[str, Any]) -> None:
+        """分两步改名，避免新旧文件名互相占用时覆盖尚未移走的切片。"""
+        staged: List[Tuple[str, TileSpec, Dict[str, Any]]] = []
+        for source_name, spec in moves:
+            staged_path = os.path.join(self._output_dir, f".{source_name}.{os.getpid()}.move{PARTIAL_TILE_SUFFIX}")
+            os.replace(os.path.join(self._output_dir, source_name), staged_path)
+            entry = self._entries.pop(source_name, None) or {}
+            self._owned.discard(source_name)
+            # 编码报告（如按体积上限选出的质量）随文件一起沿用。
+            extra = {key: value for key, value in entry.items() if key not in ("box", "settings")}
+            staged.append((staged_path, spec, extra))
+        for staged_path, spec, extra in staged:
+            os.replace(staged_path, os.path.join(self._output_dir, spec.filename))
+            self.record(spec, settings, **extra)
+
+    def remove_stale(self, names: Sequence[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self._output_dir, name))
+            except OSError:
+                continue
+            self._entries.pop(name, None)
+            self._owned.discard(name)
+            self._append({"removed": name})
+
+    def record(self, spec: TileSpec, settings: Dict[str, Any], **extra: Any) -> None:
+        entry = {"box": list(spec.box), "settings": _normalized(settings), **extra}
+        self._entries[spec.filename] = entry
+        self._owned.add(spec.filename)
+        self._append({"tile": spec.filename, **entry})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "SliceManifest":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def _file_exists(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self._output_dir, name))
+
+    def _rewrite(self) -> None:
+        """重写为紧凑形式，同时去掉被中断时可能残留的半行。"""
+        lines: List[Dict[str, Any]] = [{"version": _MANIFEST_VERSION, "source": self._source}]
+        for name in sorted(self._owned):
+            entry = self._entries.get(name)
+            lines.append({"tile": name, **entry} if entry is not None else {"tile": name, "stale": True})
+        tmp_path = f"{self.path}.{os.getpid()}{PARTIAL_TILE_SUFFIX}"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for entry in lines:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+
+def _read_manifest(path: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Dict[str, Any]], Set[str]]:
+    """返回 (源图信息, 有效切片记录, 过期切片文件名)；文件缺失或损坏时视为空清单。"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return None, {}, set()
+    try:
+        header = json.loads(lines[0]) if lines else None
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("version") != _MANIFEST_VERSION:
+        return None, {}, set()
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale: Set[str] = set()
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # 进程在追加过程中被终止，最后一行可能不完整。
+            continue
+        if not isinstance(record, dict):
+            continue
+        name = record.pop("tile", None)
+        if isinstance(name, str):
+            if record.get("stale"):
+                entries.pop(name, None)
+                stale.add(name)
+            else:
+                entries[name] = record
+                stale.discard(name)
+        elif isinstance(record.get("removed"), str):
+            entries.pop(record["removed"], None)
+            stale.discard(record["removed"])
+    return header.get("source"), entries, stale
+
+
+def _source_info(source_path: str, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """源图大小与修改时间未变时沿用上次的内容哈希，避免每次重新读取整个文件。"""
+    stat = os.stat(source_path)
+    info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if (
+        previous is not None
+        and previous.get("size") == info["size"]
+        and previous.get("mtime_ns") == info["mtime_ns"]
+        and isinstance(previous.get("sha256"), str)
+    ):
+        info["sha256"] = previous["sha256"]
+        return info
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    info["sha256"] = digest.hexdigest()
+    return info
+
+
+def _normalized(settings: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(json.dumps(settings))
+
+
+def _entry_key(box: List[int], settings: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (*box, json.dumps(settings, sort_keys=True))
@@ -1,20 +1,65 @@
 from __future__ import annotations
 
 import os
+import threading
+from dataclasses import replace
+from itertools import groupby
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from PIL import Image
+from PIL import Image, PngImagePlugin
 
 from models.image_document import ImageDocument
 from models.slice_layout import SliceLayout
+from services.decoded_image_cache import get_decoded_image_cache, open_decoded_image
+from services.encoder_profiles import (
+    DEFAULT_PROFILE,
+    FORMAT_SOURCE,
+    TileEncoding,
+    resolve_encoding,
+    supports_size_budget,
+)
+from services.slice_manifest import SliceManifest
+from services.tile_encoder import (
+    TileDoneCallback,
+    TileEncoder,
+    TileSpec,
+    TileWriter,
+    encode_tiles,
+    plan_tiles,
+    raise_if_cancelled,
+    remove_partial_tiles,
+)
+from services.tile_sinks import CONTAINER_EXTENSIONS, STDOUT_TARGET, SinkTarget, open_tile_sink
 from utils.image_math import preview_lines_to_original_boundaries
+from utils.vips_utils import pyvips, vips_band_to_pil, vips_image_info
+
+# 超过该像素数且尚未解码到内存的图片改为按行带流式切图，峰值内存约为一行切片。
+STREAMING_MIN_PIXELS = 64_000_000
 
 
 def slice_document_to_tiles(
     doc: ImageDocument,
     layout: SliceLayout,
     output_root_dir: str,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    output_format: str = FORMAT_SOURCE,
+    profile: str = DEFAULT_PROFILE,
+    max_tile_bytes: Optional[int] = None,
 ) -> str:
-    """执行宫格切图并返回输出目录。"""
+    """执行宫格切图并返回输出目录。
+
+    输出目录中的切图清单记录每个切片的原图坐标与编码设置：再次切图时只重新
+    导出坐标或设置变化的切片，删除不再属于布局的旧切片；任务被中断后再次执行
+    也只会补齐缺失的切片。
+    workers 为并行编码的工作进程数，默认使用全部 CPU 核心；传 1 时串行编码。
+    progress 以 (已完成数, 总数) 在每个切片写出后回调（在调用线程中）；
+    cancel_event 置位后停止并抛出 ExportCancelled。
+    output_format / profile 选择输出格式与编码档位，见 services.encoder_profiles。
+    max_tile_bytes 为单个切片的体积上限（仅 JPEG / WebP / AVIF）：每个切片在内存中
+    搜索放得下的最高质量，所选质量与字节数记录在切图清单中。
+    """
 
     if not os.path.exists(doc.path):
         raise FileNotFoundError(f"原始图片不存在：{doc.path}")
@@ -25,37 +70,210 @@ def slice_document_to_tiles(
     os.makedirs(output_root_dir, exist_ok=True)
 
     base_name = os.path.splitext(os.path.basename(doc.path))[0]
-    ext = os.path.splitext(doc.path)[1].lower() or ".png"
+    encoding = resolve_slice_encoding(doc, output_format, profile, max_tile_bytes)
+    ext = encoding.ext
 
     output_dir = os.path.join(output_root_dir, base_name)
     os.makedirs(output_dir, exist_ok=True)
 
     xs, ys = preview_lines_to_original_boundaries(doc, layout)
+    tiles = source_tiles(doc, plan_tiles(xs, ys, base_name, ext))
+    save_kwargs = encoding.save_kwargs
+    remove_partial_tiles(output_dir)
 
-    with Image.open(doc.path) as img:
-        img.load()
+    settings = encoding.settings()
+    if max_tile_bytes is not None:
+        settings["max_bytes"] = max_tile_bytes
+    with SliceManifest.open(output_dir, doc.path) as manifest:
+        plan = manifest.plan(tiles, settings)
+        manifest.apply_moves(plan.moves, settings)
+        done_count = len(tiles) - len(plan.pending)
 
-        tile_count = 0
-        for row in range(len(ys) - 1):
-            y1, y2 = ys[row], ys[row + 1]
-            if y2 <= y1:
-                continue
+        def on_tile_done(spec: TileSpec, report: Dict[str, Any]) -> None:
+            nonlocal done_count
+            manifest.record(spec, settings, **report)
+            done_count += 1
+            if progress is not None:
+                progress(done_count, len(tiles))
 
-            for col in range(len(xs) - 1):
-                x1, x2 = xs[col], xs[col + 1]
-                if x2 <= x1:
-                    continue
+        if progress is not None:
+            progress(done_count, len(tiles))
+        if plan.pending:
+            _encode_document_tiles(
+                doc, plan.pending, output_dir, save_kwargs, workers, on_tile_done, cancel_event, max_tile_bytes
+            )
+        manifest.remove_stale(plan.stale)
 
-                tile = img.crop((x1, y1, x2, y2))
-                tile_count += 1
-                filename = f"{base_name}_r{row+1:02d}_c{col+1:02d}{ext}"
-                save_path = os.path.join(output_dir, filename)
+    return output_dir
 
-                save_kwargs = {}
-                if ext in [".jpg", ".jpeg"]:
-                    save_kwargs["quality"] = 95
-                    save_kwargs["subsampling"] = 0
 
-                tile.save(save_path, **save_kwargs)
+def slice_document_to_container(
+    doc: ImageDocument,
+    layout: SliceLayout,
+    target: SinkTarget,
+    container: str,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    output_format: str = FORMAT_SOURCE,
+    profile: str = DEFAULT_PROFILE,
+    max_tile_bytes: Optional[int] = None,
+) -> SinkTarget:
+    """把全部切片写入单个容器（ZIP / tar / MBTiles）并返回 target。
 
-    return output_dir
+    target 为容器文件路径；tar 容器还可以是 "-"（标准输出）或可写的二进制流。
+    切片在内存中编码后批量写入容器，不产生临时文件；容器每次完整重写，不使用
+    切图清单。其余参数同 slice_document_to_tiles。
+    """
+    if not os.path.exists(doc.path):
+        raise FileNotFoundError(f"原始图片不存在：{doc.path}")
+
+    if container not in CONTAINER_EXTENSIONS:
+        raise ValueError(f"未知的切片容器：{container}")
+
+    if isinstance(target, str) and target != STDOUT_TARGET:
+        if not target:
+            raise ValueError("输出路径不能为空")
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+
+    base_name = os.path.splitext(os.path.basename(doc.path))[0]
+    encoding = resolve_slice_encoding(doc, output_format, profile, max_tile_bytes)
+    xs, ys = preview_lines_to_original_boundaries(doc, layout)
+    tiles = source_tiles(doc, plan_tiles(xs, ys, base_name, encoding.ext))
+    done_count = 0
+
+    def on_tile_done(_spec: TileSpec, _report: Dict[str, Any]) -> None:
+        nonlocal done_count
+        done_count += 1
+        if progress is not None:
+            progress(done_count, len(tiles))
+
+    if progress is not None:
+        progress(0, len(tiles))
+    with open_tile_sink(container, target, base_name, encoding.ext, (xs, ys)) as sink:
+        _encode_document_tiles(
+            doc, tiles, "", encoding.save_kwargs, workers, on_tile_done, cancel_event, max_tile_bytes, sink.write
+        )
+    return target
+
+
+def container_output_path(output_root_dir: str, doc: ImageDocument, container: str) -> str:
+    """容器在输出根目录中的默认文件名：与切片目录同名，加上容器扩展名。"""
+    base_name = os.path.splitext(os.path.basename(doc.path))[0]
+    return os.path.join(output_root_dir, base_name + CONTAINER_EXTENSIONS[container])
+
+
+def source_tiles(doc: ImageDocument, tiles: Sequence[TileSpec]) -> List[TileSpec]:
+    """把切片坐标换算到原图坐标系。
+
+    带未保存裁剪的文档直接从原文件读取对应区域，裁剪偏移折算进每个切片的
+    box；切图清单因此按原图坐标判断切片是否变化。
+    """
+    if not doc.has_pending_edits:
+        return list(tiles)
+    return [replace(spec, box=doc.to_source_box(spec.box)) for spec in tiles]
+
+
+def resolve_slice_encoding(
+    doc: ImageDocument,
+    output_format: str,
+    profile: str,
+    max_tile_bytes: Optional[int],
+) -> TileEncoding:
+    """按输出格式与档位解析编码设置，并检查体积上限是否适用。"""
+    encoding = resolve_encoding(os.path.splitext(doc.path)[1], output_format, profile)
+    if max_tile_bytes is not None:
+        if max_tile_bytes <= 0:
+            raise ValueError("切片体积上限必须大于 0")
+        if not supports_size_budget(encoding.ext):
+            raise ValueError("体积上限仅支持 JPEG / WebP / AVIF 输出")
+    return encoding
+
+
+def _encode_document_tiles(
+    doc: ImageDocument,
+    tiles: Sequence[TileSpec],
+    output_dir: str,
+    save_kwargs: Dict[str, Any],
+    workers: Optional[int],
+    on_tile_done: TileDoneCallback,
+    cancel_event: Optional[threading.Event],
+    max_bytes: Optional[int],
+    write_tile: Optional[TileWriter] = None,
+) -> None:
+    """按图片大小选择流式或整幅解码的方式编码 tiles。"""
+    if should_stream(doc):
+        _slice_streaming(
+            doc.path, tiles, output_dir, save_kwargs, workers, on_tile_done, cancel_event, max_bytes, write_tile
+        )
+    else:
+        with open_decoded_image(doc.path) as img:
+            encode_tiles(
+                img, tiles, output_dir, save_kwargs, workers, on_tile_done, cancel_event, max_bytes, write_tile
+            )
+
+
+def should_stream(doc: ImageDocument) -> bool:
+    """需要 pyvips；超出 Pillow 像素上限的图片总是流式处理。"""
+    if pyvips is None:
+        return False
+    source_width, source_height = doc.source_size
+    pixels = source_width * source_height
+    bomb_limit = Image.MAX_IMAGE_PIXELS
+    if bomb_limit is not None and pixels > bomb_limit:
+        return True
+    return pixels >= STREAMING_MIN_PIXELS and get_decoded_image_cache().get(doc.path) is None
+
+
+def _slice_streaming(
+    path: str,
+    tiles: Sequence[TileSpec],
+    output_dir: str,
+    save_kwargs: Dict[str, Any],
+    workers: Optional[int],
+    on_tile_done: TileDoneCallback,
+    cancel_event: Optional[threading.Event],
+    max_bytes: Optional[int],
+    write_tile: Optional[TileWriter] = None,
+) -> None:
+    """以顺序访问方式自上而下读取原图，每次只解码一行切片所在的行带。
+
+    行带的模式与 info（ICC 配置、EXIF、调色板透明度）与 Pillow 整图解码一致，
+    切片输出因此与不流式处理时相同。
+    """
+    source = pyvips.Image.new_from_file(path, access="sequential")
+    info = vips_image_info(source)
+    palette = _source_palette(path)
+    with TileEncoder(workers) as encoder:
+        for _row, row_tiles in groupby(tiles, key=lambda spec: spec.row):
+            raise_if_cancelled(cancel_event)
+            row_tiles = list(row_tiles)
+            top, bottom = row_tiles[0].box[1], row_tiles[0].box[3]
+            # 带裁剪的文档只取切片覆盖的列。
+            left = min(spec.box[0] for spec in row_tiles)
+            right = max(spec.box[2] for spec in row_tiles)
+            band = vips_band_to_pil(source.crop(left, top, right - left, bottom - top), palette)
+            band.info.update(info)
+            band_tiles = [
+                replace(spec, box=(spec.box[0] - left, 0, spec.box[2] - left, bottom - top)) for spec in row_tiles
+            ]
+            encoder.encode(band, band_tiles, output_dir, save_kwargs, on_tile_done, cancel_event, max_bytes, write_tile)
+            del band
+
+
+def _source_palette(path: str) -> Optional[Image.Image]:
+    """PNG 调色板图的调色板与透明度，只读取文件头；其他图片返回 None。
+
+    libvips 把调色板展开为 RGB(A)，流式切图据此把行带映射回调色板索引。
+    """
+    try:
+        with PngImagePlugin.PngImageFile(path) as img:
+            if img.mode != "P" or img.palette is None:
+                return None
+            palette = Image.new("P", (1, 1))
+            palette.putpalette(img.palette.palette, img.palette.rawmode)
+            if "transparency" in img.info:
+                palette.info["transparency"] = img.info["transparency"]
+            return palette
+    except (OSError, SyntaxError):
+        return None
@@ -0,0 +1,473 @@
+"""切片编码：规划切片、串行或多进程并行地裁剪并写出切片文件。
+
+本模块只依赖 Pillow 与标准库，工作进程以 spawn 方式启动时不会加载 Qt。
+"""
+
+from __future__ import annotations
+
+import ctypes
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
+from io import BytesIO
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from services.encoder_profiles import convert_for_format
+
+# 像素数低于该值时进程启动开销大于收益，直接串行编码。
+PARALLEL_MIN_PIXELS = 8_000_000
+# 写入共享内存时每次转换的行数上限，避免一次性生成整幅图的临时字节串。
+_SHARED_COPY_BAND_BYTES = 64 * 1024 * 1024
+# 这些模式可以按行直接映射共享内存而无需复制；RGB 在 Pillow 内部按 4 字节存储，
+# 以 RGBX 映射后在切片上转换回 RGB。Pillow 只对 L、P、RGBX、RGBA、RGBa 与 I;16*
+# 保证映射，CMYK 等其他模式走按行带解包的路径。
+_MAPPED_RAWMODES = {
+    "L": "L",
+    "P": "P",
+    "RGB": "RGBX",
+    "RGBX": "RGBX",
+    "RGBA": "RGBA",
+    "I;16": "I;16",
+    "I;16L": "I;16L",
+    "I;16B": "I;16B",
+}
+
+
+# 切片先以 ".<文件名>.<pid>.tmp" 写出，完成后再改名为正式文件名。
+PARTIAL_TILE_SUFFIX = ".tmp"
+# 临时文件名中写入者的 pid：".<文件名>.<pid>.tmp" 或切图清单改名用的 ".<文件名>.<pid>.move.tmp"。
+_PARTIAL_PID = re.compile(r"\.(\d+)(?:\.move)?" + re.escape(PARTIAL_TILE_SUFFIX) + "$")
+# 并行编码时等待结果的超时，用于及时响应取消请求。
+_CANCEL_POLL_SECONDS = 0.2
+
+# 按体积上限编码时的质量搜索范围与每个切片最多的编码次数。
+BUDGET_MIN_QUALITY = 10
+BUDGET_MAX_ATTEMPTS = 7
+# 档位参数未指定质量时的起始质量。
+BUDGET_DEFAULT_QUALITY = 90
+
+
+class ExportCancelled(Exception):
+    """导出任务被取消；已写出的文件保留，未开始的切片不再处理。"""
+
+
+@dataclass(frozen=True, slots=True)
+class TileSpec:
+    """一个待写出的切片：行列号（从 1 开始）、原图坐标与文件名。"""
+
+    row: int
+    col: int
+    box: Tuple[int, int, int, int]
+    filename: str
+
+
+# 每写完一个切片的回调：(切片, save_tile 返回的编码报告)。
+TileDoneCallback = Callable[[TileSpec, Dict[str, Any]], None]
+# 接收内存中编码结果的写入函数：(切片, 编码后的字节)。
+TileWriter = Callable[[TileSpec, bytes], None]
+
+
+def plan_tiles(xs: Sequence[int], ys: Sequence[int], base_name: str, ext: str) -> List[TileSpec]:
+    """按边界坐标生成切片列表，跳过宽或高为 0 的格子。"""
+    tiles: List[TileSpec] = []
+    for row in range(len(ys) - 1):
+        y1, y2 = ys[row], ys[row + 1]
+        if y2 <= y1:
+            continue
+        for col in range(len(xs) - 1):
+            x1, x2 = xs[col], xs[col + 1]
+            if x2 <= x1:
+                continue
+            filename = f"{base_name}_r{row+1:02d}_c{col+1:02d}{ext}"
+            tiles.append(TileSpec(row=row + 1, col=col + 1, box=(x1, y1, x2, y2), filename=filename))
+    return tiles
+
+
+def save_tile(
+    tile: Image.Image,
+    path: str,
+    save_kwargs: Dict[str, Any],
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """按扩展名对应的格式保存，必要时先转换模式。
+
+    先写入同目录下的隐藏临时文件再改名，中断时不会留下写了一半的切片。
+    给出 max_bytes 时按体积上限搜索质量，返回 {"quality", "bytes", "fits"}
+    供写入切图清单；否则返回空字典。
+    """
+    directory, filename = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}{PARTIAL_TILE_SUFFIX}")
+    image_format = tile_image_format(filename)
+    report: Dict[str, Any] = {}
+    try:
+        if max_bytes is None:
+            convert_for_format(tile, image_format).save(tmp_path, format=image_format, **save_kwargs)
+        else:
+            data, report = encode_tile_bytes(tile, image_format, save_kwargs, max_bytes)
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return report
+
+
+def tile_image_format(filename: str) -> Optional[str]:
+    """切片文件名的扩展名对应的 Pillow 格式名。"""
+    return Image.registered_extensions().get(os.path.splitext(filename)[1].lower())
+
+
+def encode_tile_bytes(
+    tile: Image.Image,
+    image_format: Optional[str],
+    save_kwargs: Dict[str, Any],
+    max_bytes: Optional[int] = None,
+) -> Tuple[bytes, Dict[str, Any]]:
+    """在内存中编码切片，返回 (编码结果, 编码报告)；报告的含义同 save_tile。"""
+    tile = convert_for_format(tile, image_format)
+    if max_bytes is not None:
+        data, quality = encode_within_budget(tile, image_format, save_kwargs, max_bytes)
+        return data, {"quality": quality, "bytes": len(data), "fits": len(data) <= max_bytes}
+    buffer = BytesIO()
+    tile.save(buffer, format=image_format, **save_kwargs)
+    return buffer.getvalue(), {}
+
+
+def encode_within_budget(
+    tile: Image.Image,
+    image_format: Optional[str],
+    save_kwargs: Dict[str, Any],
+    max_bytes: int,
+) -> Tuple[bytes, int]:
+    """在内存中编码，找出不超过 max_bytes 的最高质量，返回 (编码结果, 质量)。
+
+    先按档位质量编码，放得下就直接使用；否则在 [BUDGET_MIN_QUALITY, 档位质量)
+    中二分查找，总编码次数不超过 BUDGET_MAX_ATTEMPTS。最低质量仍超出上限时
+    返回尝试过的最小结果。
+    """
+    top = int(save_kwargs.get("quality", BUDGET_DEFAULT_QUALITY))
+
+    def encode(quality: int) -> bytes:
+        buffer = BytesIO()
+        tile.save(buffer, format=image_format, **{**save_kwargs, "quality": quality})
+        return buffer.getvalue()
+
+    data = encode(top)
+    if len(data) <= max_bytes:
+        return data, top
+    best: Optional[Tuple[bytes, int]] = None
+    smallest = (data, top)
+    low, high = BUDGET_MIN_QUALITY, top - 1
+    attempts = 1
+    while low <= high and attempts < BUDGET_MAX_ATTEMPTS:
+        quality = (low + high) // 2
+        data = encode(quality)
+        attempts += 1
+        if len(data) <= max_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            if len(data) < len(smallest[0]):
+                smallest = (data, quality)
+            high = quality - 1
+    return best if best is not None else smallest
+
+
+def remove_partial_tiles(output_dir: str) -> None:
+    """清理上次被中断的写入残留的临时文件。
+
+    只删除写入进程已经退出的临时文件，同一目录上并发运行的其他切图任务不受影响；
+    文件名中没有 pid 的按残留处理。
+    """
+    try:
+        names = os.listdir(output_dir)
+    except OSError:
+        return
+    for name in names:
+        if not (name.startswith(".") and name.endswith(PARTIAL_TILE_SUFFIX)):
+            continue
+        match = _PARTIAL_PID.search(name)
+        if match is not None and _process_alive(int(match.group(1))):
+            continue
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except OSError:
+            pass
+
+
+def _process_alive(pid: int) -> bool:
+    """pid 对应的进程是否仍在运行；无法判断时按仍在运行处理。"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        return _windows_process_alive(pid)
+    try:
+        # 信号 0 只检查进程是否存在。
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 例如 PermissionError：进程存在但属于其他用户。
+        return True
+    return True
+
+
+def _windows_process_alive(pid: int) -> bool:
+    # Windows 上 os.kill 会结束目标进程，改为查询进程的退出码。
+    process_query_limited_information = 0x1000
+    error_invalid_parameter = 87
+    still_active = 259
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        return ctypes.get_last_error() != error_invalid_parameter
+    try:
+        exit_code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == still_active
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def default_worker_count() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def encode_tiles(
+    img: Image.Image,
+    tiles: Sequence[TileSpec],
+    output_dir: str,
+    save_kwargs: Dict[str, Any],
+    workers: Optional[int] = None,
+    on_tile_done: Optional[TileDoneCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    max_bytes: Optional[int] = None,
+    write_tile: Optional[TileWriter] = None,
+) -> None:
+    """裁剪并写出全部切片；图像足够大且允许多个工作进程时并行编码。"""
+    with TileEncoder(workers) as encoder:
+        encoder.encode(img, tiles, output_dir, save_kwargs, on_tile_done, cancel_event, max_bytes, write_tile)
+
+
+class TileEncoder:
+    """可复用的切片编码器：多次 encode() 共用同一个工作进程池。
+
+    并行路径中工作进程通过共享内存读取同一份像素，写出的文件与串行路径逐字节一致。
+    分带流式切图时每个行带调用一次 encode()，进程池只在第一次需要时启动。
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self._workers = default_worker_count() if workers is None else max(1, int(workers))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "TileEncoder":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def encode(
+        self,
+        img: Image.Image,
+        tiles: Sequence[TileSpec],
+        output_dir: str,
+        save_kwargs: Dict[str, Any],
+        on_tile_done: Optional[TileDoneCallback] = None,
+        cancel_event: Optional[threading.Event] = None,
+        max_bytes: Optional[int] = None,
+        write_tile: Optional[TileWriter] = None,
+    ) -> None:
+        """裁剪并写出 tiles；切片坐标相对于 img。
+
+        每写完一个切片回调 on_tile_done；cancel_event 被置位后不再开始新的切片，
+        并抛出 ExportCancelled。max_bytes 为单个切片的体积上限，见 save_tile。
+        给出 write_tile 时切片只在内存中编码，编码结果在调用线程中交给 write_tile
+        （例如写入容器），不再写到 output_dir。
+        """
+        if self._workers > 1 and len(tiles) > 1 and img.width * img.height >= PARALLEL_MIN_PIXELS:
+            layout = _SharedImageLayout.for_image(img)
+            if layout is not None:
+                self._encode_parallel(
+                    img, layout, tiles, output_dir, save_kwargs, on_tile_done, cancel_event, max_bytes, write_tile
+                )
+                return
+        for spec in tiles:
+            raise_if_cancelled(cancel_event)
+            if write_tile is None:
+                report = save_tile(img.crop(spec.box), os.path.join(output_dir, spec.filename), save_kwargs, max_bytes)
+            else:
+                data, report = encode_tile_bytes(
+                    img.crop(spec.box), tile_image_format(spec.filename), save_kwargs, max_bytes
+                )
+                write_tile(spec, data)
+            if on_tile_done is not None:
+                on_tile_done(spec, report)
+
+    def _encode_parallel(
+        self,
+        img: Image.Image,
+        layout: "_SharedImageLayout",
+        tiles: Sequence[TileSpec],
+        output_dir: str,
+        save_kwargs: Dict[str, Any],
+        on_tile_done: Optional[TileDoneCallback],
+        cancel_event: Optional[threading.Event],
+        max_bytes: Optional[int],
+        write_tile: Optional[TileWriter],
+    ) -> None:
+        raise_if_cancelled(cancel_event)
+        if self._executor is None:
+            # GUI 进程中有多个线程，fork 不安全；spawn 的工作进程只导入本模块。
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        shm = shared_memory.SharedMemory(create=True, size=max(1, layout.stride * img.height))
+        try:
+            _copy_to_shared(img, layout, shm)
+            shared_layout = replace(layout, shm_name=shm.name)
+            futures = {
+                self._executor.submit(
+                    _encode_tile, shared_layout, spec, output_dir, save_kwargs, max_bytes, write_tile is not None
+                ): spec
+                for spec in tiles
+            }
+            pending = set(futures)
+            try:
+                while pending:
+                    done, pending = wait(pending, timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        data, report = future.result()
+                        if write_tile is not None:
+                            write_tile(futures[future], data)
+                        if on_tile_done is not None:
+                            on_tile_done(futures[future], report)
+                    raise_if_cancelled(cancel_event)
+            finally:
+                for future in pending:
+                    future.cancel()
+                # 已经开始的任务仍在读取共享内存，释放前等它们结束。
+                wait(pending)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+@dataclass(frozen=True, slots=True)
+class _SharedImageLayout:
+    """共享内存中像素的排布方式，以及在工作进程中复原图像所需的元数据。"""
+
+    mode: str
+    size: Tuple[int, int]
+    rawmode: str
+    stride: int
+    mapped: bool
+    info: Dict[str, Any]
+    palette: Optional[Tuple[str, bytes]]
+    shm_name: str = ""
+
+    @classmethod
+    def for_image(cls, img: Image.Image) -> Optional["_SharedImageLayout"]:
+        """图像元数据无法传给工作进程时返回 None，由调用方退回串行路径。"""
+        info = dict(img.info)
+        try:
+            pickle.dumps(info)
+        except Exception:  # noqa: BLE001 - 任何无法序列化的元数据都走串行路径
+            return None
+
+        palette = None
+        if img.palette is not None and img.mode in ("P", "PA"):
+            palette_mode = img.palette.mode
+            palette = (palette_mode, bytes(img.getpalette(palette_mode) or []))
+
+        rawmode = _MAPPED_RAWMODES.get(img.mode, img.mode)
+        try:
+            stride = len(Image.new(img.mode, (img.width, 1)).tobytes("raw", rawmode))
+        except (ValueError, OSError):
+            return None
+        return cls(
+            mode=img.mode,
+            size=img.size,
+            rawmode=rawmode,
+            stride=stride,
+            mapped=img.mode in _MAPPED_RAWMODES,
+            info=info,
+            palette=palette,
+        )
+
+
+def raise_if_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExportCancelled("导出已取消")
+
+
+def _copy_to_shared(img: Image.Image, layout: _SharedImageLayout, shm: shared_memory.SharedMemory) -> None:
+    rows_per_band = max(1, _SHARED_COPY_BAND_BYTES // max(1, layout.stride))
+    width, height = img.size
+    for top in range(0, height, rows_per_band):
+        bottom = min(height, top + rows_per_band)
+        band = img if (top, bottom) == (0, height) else img.crop((0, top, width, bottom))
+        shm.buf[top * layout.stride : bottom * layout.stride] = band.tobytes("raw", layout.rawmode)
+
+
+# 工作进程内缓存当前附加的共享内存，同一行带的后续切片无需重新附加。
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach_worker_shm(layout: _SharedImageLayout) -> shared_memory.SharedMemory:
+    global _worker_shm
+    if _worker_shm is None or _worker_shm.name != layout.shm_name:
+        if _worker_shm is not None:
+            _worker_shm.close()
+        _worker_shm = shared_memory.SharedMemory(name=layout.shm_name)
+    return _worker_shm
+
+
+def _encode_tile(
+    layout: _SharedImageLayout,
+    spec: TileSpec,
+    output_dir: str,
+    save_kwargs: Dict[str, Any],
+    max_bytes: Optional[int] = None,
+    in_memory: bool = False,
+) -> Tuple[Optional[bytes], Dict[str, Any]]:
+    """工作进程中编码一个切片；in_memory 时返回编码结果交给主进程写入，否则直接写文件。"""
+    shm = _attach_worker_shm(layout)
+    x1, y1, x2, y2 = spec.box
+    if layout.mapped:
+        # 零拷贝映射：整幅图只在共享内存中存在一份。映射只在本次调用内持有，
+        # 以免缓存的共享内存在关闭时仍被导出。
+        source = Image.frombuffer(layout.rawmode, layout.size, shm.buf, "raw", layout.rawmode, 0, 1)
+        tile = source.crop(spec.box)
+        del source
+        if tile.mode != layout.mode:
+            tile = tile.convert(layout.mode)
+    else:
+        # 无法映射的模式：只解包切片所在的行带，再按列裁剪。
+        band_bytes = shm.buf[y1 * layout.stride : y2 * layout.stride]
+        band = Image.frombytes(layout.mode, (layout.size[0], y2 - y1), bytes(band_bytes), "raw", layout.rawmode)
+        tile = band.crop((x1, 0, x2, y2 - y1))
+    tile.info = dict(layout.info)
+    if layout.palette is not None:
+        palette_mode, palette_bytes = layout.palette
+        tile.putpalette(palette_bytes, palette_mode)
+    if in_memory:
+        return encode_tile_bytes(tile, tile_image_format(spec.filename), save_kwargs, max_bytes)
+    return None, save_tile(tile, os.path.join(output_dir, spec.filename), save_kwargs, max_bytes)
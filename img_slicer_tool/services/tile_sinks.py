@@ -0,0 +1,236 @@
+"""切片容器输出：把全部切片写进单个 ZIP、tar 流或 MBTiles 风格的 SQLite 数据库。
+
+切片在内存中编码后直接追加到容器，不产生逐个切片的文件，也不使用临时文件；
+写入失败或任务被取消时删除写了一半的容器文件。本模块只依赖标准库。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import tarfile
+import time
+import zipfile
+from io import BytesIO
+from typing import Any, BinaryIO, List, Optional, Sequence, Tuple, Union
+
+from services.tile_encoder import TileSpec
+
+CONTAINER_DIRECTORY = "directory"
+CONTAINER_ZIP = "zip"
+CONTAINER_TAR = "tar"
+CONTAINER_MBTILES = "mbtiles"
+CONTAINER_LABELS = {
+    CONTAINER_DIRECTORY: "文件夹",
+    CONTAINER_ZIP: "ZIP（不压缩）",
+    CONTAINER_TAR: "tar 流",
+    CONTAINER_MBTILES: "MBTiles（SQLite）",
+}
+CONTAINER_EXTENSIONS = {
+    CONTAINER_ZIP: ".zip",
+    CONTAINER_TAR: ".tar",
+    CONTAINER_MBTILES: ".mbtiles",
+}
+
+# 写入目标：文件路径、"-"（标准输出，仅 tar）或可写的二进制流（仅 tar）。
+SinkTarget = Union[str, BinaryIO]
+STDOUT_TARGET = "-"
+
+# 容器文件的写缓冲，把大量小切片合并为较少的系统调用。
+_WRITE_BUFFER_BYTES = 4 * 1024 * 1024
+# SQLite 每个事务写入的切片数。
+MBTILES_BATCH_SIZE = 256
+
+
+class TileSink:
+    """切片容器的公共接口：write 追加一个已编码的切片，close 完成容器。"""
+
+    def write(self, spec: TileSpec, data: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def discard(self) -> None:
+        """放弃写了一半的容器。"""
+        raise NotImplementedError
+
+    def __enter__(self) -> "TileSink":
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class ZipTileSink(TileSink):
+    """不压缩（stored）的 ZIP：切片本身已是压缩格式，再压缩只会浪费时间。"""
+
+    def __init__(self, path: str, folder: str = "") -> None:
+        self._path = path
+        self._folder = folder
+        self._file = open(path, "wb", buffering=_WRITE_BUFFER_BYTES)
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._date_time = time.localtime()[:6]
+
+    def write(self, spec: TileSpec, data: bytes) -> None:
+        info = zipfile.ZipInfo(_member_name(self._folder, spec), date_time=self._date_time)
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+
+    def close(self) -> None:
+        self._zip.close()
+        self._file.close()
+
+    def discard(self) -> None:
+        _close_quietly(self._zip)
+        _close_quietly(self._file)
+        _remove_quietly(self._path)
+
+
+class TarTileSink(TileSink):
+    """以流模式写出 tar，不需要回写或随机访问，可以直接写到管道或标准输出。"""
+
+    def __init__(self, target: SinkTarget, folder: str = "") -> None:
+        self._folder = folder
+        self._path: Optional[str] = None
+        self._owns_file = False
+        if target == STDOUT_TARGET:
+            self._file = sys.stdout.buffer
+        elif isinstance(target, str):
+            self._path = target
+            self._file = open(target, "wb", buffering=_WRITE_BUFFER_BYTES)
+            self._owns_file = True
+        else:
+            self._file = target
+        self._tar = tarfile.open(fileobj=self._file, mode="w|", format=tarfile.PAX_FORMAT)
+        self._mtime = time.time()
+
+    def write(self, spec: TileSpec, data: bytes) -> None:
+        info = tarfile.TarInfo(_member_name(self._folder, spec))
+        info.size = len(data)
+        info.mtime = self._mtime
+        info.mode = 0o644
+        self._tar.addfile(info, BytesIO(data))
+
+    def close(self) -> None:
+        self._tar.close()
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def discard(self) -> None:
+        # 流式输出已经交给下游的部分无法撤回，只有自己创建的文件会被删除。
+        if self._owns_file:
+            _close_quietly(self._file)
+            _remove_quietly(self._path)
+        else:
+            _close_quietly(self._tar)
+
+
+class MBTilesSink(TileSink):
+    """MBTiles 风格的 SQLite 数据库：切片放在 tiles 表，行号按 TMS 约定自下而上。
+
+    宫格的行列不一定等宽，原图边界坐标以 JSON 形式写在 metadata 的 json 项中；
+    切片按批写入，每 MBTILES_BATCH_SIZE 个切片提交一次事务。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        tile_format: str,
+        grid: Tuple[Sequence[int], Sequence[int]],
+    ) -> None:
+        self._path = path
+        _remove_quietly(path)
+        self._connection = sqlite3.connect(path)
+        # 数据库在写完之前没有意义，关闭回滚日志与同步以减少 I/O。
+        self._connection.execute("PRAGMA journal_mode=OFF")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.executescript(
+            """
+            CREATE TABLE metadata (name TEXT, value TEXT);
+            CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+            """
+        )
+        xs, ys = grid
+        self._rows = max(1, len(ys) - 1)
+        metadata = {
+            "name": name,
+            "format": tile_format,
+            "type": "overlay",
+            "version": "1.1",
+            "minzoom": "0",
+            "maxzoom": "0",
+            "json": json.dumps({"grid": {"xs": list(xs), "ys": list(ys)}}),
+        }
+        self._connection.executemany("INSERT INTO metadata (name, value) VALUES (?, ?)", metadata.items())
+        self._batch: List[Tuple[int, int, int, bytes]] = []
+
+    def write(self, spec: TileSpec, data: bytes) -> None:
+        self._batch.append((0, spec.col - 1, self._rows - spec.row, data))
+        if len(self._batch) >= MBTILES_BATCH_SIZE:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        self._connection.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+        self._connection.commit()
+        self._connection.close()
+
+    def discard(self) -> None:
+        _close_quietly(self._connection)
+        _remove_quietly(self._path)
+
+    def _flush(self) -> None:
+        if self._batch:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                    self._batch,
+                )
+            self._batch.clear()
+
+
+def open_tile_sink(
+    container: str,
+    target: SinkTarget,
+    base_name: str,
+    ext: str,
+    grid: Tuple[Sequence[int], Sequence[int]],
+) -> TileSink:
+    """按容器类型创建切片容器；ZIP 与 tar 中的切片放在以 base_name 命名的目录下。"""
+    if container != CONTAINER_TAR and (not isinstance(target, str) or target == STDOUT_TARGET):
+        raise ValueError("只有 tar 容器可以写入标准输出或数据流")
+    if container == CONTAINER_ZIP:
+        return ZipTileSink(target, base_name)
+    if container == CONTAINER_TAR:
+        return TarTileSink(target, base_name)
+    if container == CONTAINER_MBTILES:
+        return MBTilesSink(target, base_name, ext.lstrip(".").replace("jpeg", "jpg"), grid)
+    raise ValueError(f"未知的切片容器：{container}")
+
+
+def _member_name(folder: str, spec: TileSpec) -> str:
+    return f"{folder}/{spec.filename}" if folder else spec.filename
+
+
+def _close_quietly(resource: Any) -> None:
+    try:
+        resource.close()
+    except Exception:  # noqa: BLE001 - 放弃容器时忽略关闭错误
+        pass
+
+
+def _remove_quietly(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+# 应用以 img_slicer_tool 目录为导入根（models.、services.、views.），测试沿用同样的方式。
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """无界面环境下的 QApplication，供需要 QPixmap 或视图的测试使用。"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from models.cut_line_store import HORIZONTAL, VERTICAL, CutLineStore
+from models.slice_layout import SliceLayout
+
+
+@pytest.fixture
+def store():
+    store = CutLineStore()
+    store.replace([40.0, 10.0, 25.0], [5.0])
+    return store
+
+
+@pytest.mark.parametrize(
+    "value, tolerance, expected",
+    [
+        (10.0, 0.0, (0, 0.0)),
+        (12.0, 5.0, (0, 2.0)),
+        (24.0, 5.0, (1, 1.0)),
+        (0.0, 10.0, (0, 10.0)),
+        (100.0, 60.0, (2, 60.0)),
+        (32.0, 5.0, None),
+        (-1.0, 10.0, None),
+    ],
+)
+def test_nearest_within_tolerance(store, value, tolerance, expected):
+    assert store.nearest(HORIZONTAL, value, tolerance) == expected
+
+
+def test_nearest_prefers_the_closer_neighbour(store):
+    assert store.nearest(HORIZONTAL, 18.0, 10.0) == (1, 7.0)
+    assert store.nearest(HORIZONTAL, 17.0, 10.0) == (0, 7.0)
+
+
+def test_nearest_only_searches_one_orientation(store):
+    assert store.nearest(VERTICAL, 10.0, 1.0) is None
+    assert store.nearest(VERTICAL, 6.0, 1.0) == (0, 1.0)
+    assert CutLineStore().nearest(HORIZONTAL, 0.0, 100.0) is None
+
+
+def test_nearest_matches_a_linear_scan():
+    rng = random.Random(7)
+    store = CutLineStore()
+    for _ in range(300):
+        store.insert(HORIZONTAL, round(rng.uniform(0.0, 1000.0), 1))
+    values = store.positions(HORIZONTAL)
+    for _ in range(500):
+        value, tolerance = rng.uniform(-20.0, 1020.0), rng.uniform(0.0, 8.0)
+        hit = store.nearest(HORIZONTAL, value, tolerance)
+        distance = min(abs(position - value) for position in values)
+        if distance > tolerance:
+            assert hit is None
+        else:
+            assert hit is not None and hit[1] == distance and abs(values[hit[0]] - value) == distance
+
+
+def test_to_layout_exports_sorted_interior_lines():
+    store = CutLineStore()
+    for position in [0.0, 30.0, 10.0, 30.0, 100.0, 55.5]:
+        store.insert(HORIZONTAL, position)
+    layout = store.to_layout(200.0, 100.0)
+
+    assert layout.presorted
+    assert layout.horizontal_lines == [10.0, 30.0, 30.0, 55.5]
+    assert layout.get_boundaries(200, 100) == ([0.0, 200.0], [0.0, 10.0, 30.0, 55.5, 100.0])
+    assert layout == SliceLayout([10.0, 30.0, 55.5], [])
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import pytest
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPixmap
+
+from models.cut_line_store import HORIZONTAL, VERTICAL
+from models.edit_history import EditHistory, LineAdded, LineRemoved, LinesReplaced
+from models.image_document import ImageDocument
+from views.image_view import ImageView
+
+
+def _added(position: float) -> LineAdded:
+    return LineAdded(HORIZONTAL, 0, position)
+
+
+def test_undo_and_redo_walk_the_stack_in_order():
+    history = EditHistory()
+    commands = [_added(10.0), _added(20.0), LineRemoved(VERTICAL, 0, 5.0)]
+    for command in commands:
+        history.push(command)
+
+    assert [history.undo() for _ in commands] == commands[::-1]
+    assert history.undo() is None and not history.can_undo()
+    assert [history.redo() for _ in commands] == commands
+    assert history.redo() is None and not history.can_redo()
+
+
+def test_new_command_clears_redo():
+    history = EditHistory()
+    history.push(_added(10.0))
+    history.undo()
+    history.push(_added(20.0))
+
+    assert not history.can_redo()
+    assert history.undo() == _added(20.0)
+
+
+def test_oldest_steps_are_dropped_beyond_the_limit():
+    history = EditHistory(max_steps=3)
+    for position in range(5):
+        history.push(_added(float(position)))
+
+    assert len(history) == 3
+    assert [history.undo().position for _ in range(3)] == [4.0, 3.0, 2.0]
+    assert not history.can_undo()
+
+
+@pytest.fixture
+def view(qapp, tmp_path):
+    pixmap = QPixmap(400, 300)
+    path = str(tmp_path / "image.png")
+    pixmap.save(path)
+    view = ImageView()
+    view.set_mode(ImageView.MODE_SLICE)
+    view.set_document(ImageDocument(path, 400, 300, 400, 300, 1.0, 1.0, pixmap))
+    yield view
+    view.deleteLater()
+
+
+def _record_line_change(view: ImageView, history: EditHistory, change) -> None:
+    """与主窗口相同：整体替换切割线前后各取一次快照。"""
+    before = view.line_snapshot()
+    change()
+    after = view.line_snapshot()
+    if after != before:
+        history.push(LinesReplaced(before, after))
+
+
+def _lines(view: ImageView):
+    horizontal, vertical = view.export_cut_lines()
+    return list(horizontal), list(vertical)
+
+
+def _step(view: ImageView, history: EditHistory, undo: bool) -> None:
+    command = history.undo() if undo else history.redo()
+    view.apply_line_command(command, undo)
+
+
+def test_manual_line_edits_round_trip(view):
+    history = EditHistory()
+    view.lineEdited.connect(history.push)
+    states = [_lines(view)]
+
+    view._add_manual_line(HORIZONTAL, 100.0)
+    states.append(_lines(view))
+    view._add_manual_line(VERTICAL, 50.0)
+    states.append(_lines(view))
+    view._add_manual_line(HORIZONTAL, 200.0)
+    states.append(_lines(view))
+    # 拖过相邻线条，序号随之改变。
+    view._try_begin_line_drag(QPointF(10.0, 100.0))
+    view._drag_selected_line(QPointF(10.0, 250.0))
+    view._finish_line_drag()
+    states.append(_lines(view))
+    view._remove_line((VERTICAL, 0))
+    states.append(_lines(view))
+    assert states[-2] == ([200.0, 250.0], [50.0])
+
+    for expected in reversed(states[:-1]):
+        _step(view, history, undo=True)
+        assert _lines(view) == expected
+    for expected in states[1:]:
+        _step(view, history, undo=False)
+        assert _lines(view) == expected
+
+
+def test_grid_changes_record_parameters_only(view):
+    history = EditHistory()
+    view.lineEdited.connect(history.push)
+    view._add_manual_line(HORIZONTAL, 120.0)
+    manual = _lines(view)
+
+    _record_line_change(view, history, lambda: view.set_slice_work_mode("grid"))
+    for size in range(3, 8):
+        _record_line_change(view, history, lambda: view.set_grid_size(size, size))
+    grid = _lines(view)
+
+    replaced = [command for command in history._undo if isinstance(command, LinesReplaced)]
+    # 只有切换前手动画的线无法推导，需要保存位置。
+    assert replaced[0].before.lines is not None
+    assert all(command.after.lines is None for command in replaced)
+    assert all(command.before.lines is None for command in replaced[1:])
+
+    for _ in replaced:
+        _step(view, history, undo=True)
+    assert (view.sliceMode, _lines(view)) == ("manual", manual)
+    for _ in replaced:
+        _step(view, history, undo=False)
+    assert (view.sliceMode, view.grid_size(), _lines(view)) == ("grid", (7, 7), grid)
+
+
+def test_dragged_grid_line_keeps_positions(view):
+    history = EditHistory()
+    view.set_slice_work_mode("grid")
+    view._try_begin_line_drag(QPointF(200.0, 10.0))
+    view._drag_selected_line(QPointF(230.0, 10.0))
+    view._finish_line_drag()
+    dragged = _lines(view)
+
+    _record_line_change(view, history, lambda: view.set_grid_size(3, 3))
+    command = history._undo[-1]
+    assert command.before.lines is not None
+
+    _step(view, history, undo=True)
+    assert (view.grid_size(), _lines(view)) == ((2, 2), dragged)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from PIL import Image
+from PySide6.QtGui import QPixmap
+
+from models.image_document import ImageDocument
+from models.slice_layout import SliceLayout
+from services.decoded_image_cache import get_decoded_image_cache
+from services.export_estimator import estimate_slice_export
+from services.slice_service import slice_document_to_tiles
+
+SIZE = 1600
+PREVIEW = 800
+
+
+@pytest.fixture(autouse=True)
+def empty_decoded_cache():
+    cache = get_decoded_image_cache()
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def document(qapp, tmp_path):
+    gradient = Image.linear_gradient("L").resize((SIZE, SIZE))
+    noise = Image.effect_noise((SIZE // 8, SIZE // 8), 30).resize((SIZE, SIZE))
+    path = str(tmp_path / "source.png")
+    Image.merge("RGB", (gradient, noise, gradient.transpose(Image.ROTATE_90))).save(path)
+    scale = SIZE / PREVIEW
+    return ImageDocument(path, SIZE, SIZE, PREVIEW, PREVIEW, scale, scale, QPixmap())
+
+
+@pytest.mark.parametrize("output_format", ["jpeg", "png"])
+def test_estimate_is_close_to_a_real_export(document, tmp_path, output_format):
+    lines = [PREVIEW / 4 * index for index in range(1, 4)]
+    layout = SliceLayout(list(lines), list(lines))
+
+    estimate = estimate_slice_export(document, layout, str(tmp_path), workers=1, output_format=output_format)
+    get_decoded_image_cache().clear()
+    started = time.perf_counter()
+    slice_document_to_tiles(document, layout, str(tmp_path / "out"), workers=1, output_format=output_format)
+    elapsed = time.perf_counter() - started
+
+    assert estimate.tile_count == 16
+    assert elapsed / 3 <= estimate.seconds <= elapsed * 3
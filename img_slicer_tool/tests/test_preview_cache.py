@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+from PIL import Image
+
+from services import preview_cache
+from services.decoded_image_cache import get_decoded_image_cache
+from services.preview_cache import PreviewCache
+
+
+def _palette_image(size=(40, 30)) -> Image.Image:
+    image = Image.new("P", size, 0)
+    image.putpalette([255, 0, 0, 0, 0, 255] + [0] * (254 * 3))
+    image.paste(1, (0, 0, size[0] // 2, size[1]))
+    return image
+
+
+def _round_trip(tmp_path, image: Image.Image) -> Image.Image:
+    cache = PreviewCache(str(tmp_path / "previews"))
+    cache.put("key", image, image.width * 10, image.height * 10)
+    cached = cache.get("key")
+    assert cached is not None
+    assert (cached.original_width, cached.original_height) == (image.width * 10, image.height * 10)
+    return cached.image
+
+
+def test_palette_survives_a_round_trip(tmp_path):
+    image = _palette_image()
+
+    restored = _round_trip(tmp_path, image)
+
+    assert restored.mode == "P"
+    assert restored.convert("RGB").tobytes() == image.convert("RGB").tobytes()
+
+
+@pytest.mark.parametrize("transparency", [0, bytes([0, 128])])
+def test_palette_transparency_survives_a_round_trip(tmp_path, transparency):
+    image = _palette_image()
+    image.info["transparency"] = transparency
+
+    restored = _round_trip(tmp_path, image)
+
+    assert restored.info["transparency"] == transparency
+    assert restored.convert("RGBA").tobytes() == image.convert("RGBA").tobytes()
+
+
+def test_rgb_transparency_survives_a_round_trip(tmp_path):
+    image = Image.new("RGB", (8, 8), (1, 2, 3))
+    image.info["transparency"] = (1, 2, 3)
+
+    restored = _round_trip(tmp_path, image)
+
+    assert restored.info["transparency"] == (1, 2, 3)
+    assert restored.convert("RGBA").getpixel((0, 0)) == (1, 2, 3, 0)
+
+
+def test_reopened_palette_preview_keeps_its_colours(qapp, tmp_path, monkeypatch):
+    from services.image_loader import decode_preview
+
+    monkeypatch.setattr(preview_cache, "_default_cache", PreviewCache(str(tmp_path / "previews")))
+    path = str(tmp_path / "palette.png")
+    _palette_image((5000, 300)).save(path)
+
+    colours = []
+    for _ in range(2):
+        get_decoded_image_cache().clear()
+        decoded = decode_preview(path)
+        colours.append(decoded.image.pixelColor(decoded.preview_width - 1, 0).getRgb())
+
+    assert len(list((tmp_path / "previews").glob("*.json"))) == 1
+    assert colours == [(255, 0, 0, 255), (255, 0, 0, 255)]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from services.pyramid_service import PYRAMID_DZI, PYRAMID_XYZ, PyramidLevel, plan_pyramid_levels
+
+
+def test_dzi_levels_halve_down_to_a_single_pixel():
+    levels = plan_pyramid_levels(1000, 600, PYRAMID_DZI, 254)
+
+    assert levels[0] == PyramidLevel(name="10", width=1000, height=600, cols=4, rows=3)
+    assert levels[-1] == PyramidLevel(name="0", width=1, height=1, cols=1, rows=1)
+    assert [level.name for level in levels] == [str(index) for index in range(10, -1, -1)]
+    assert [level.height for level in levels] == [600, 300, 150, 75, 38, 19, 10, 5, 3, 2, 1]
+
+
+@pytest.mark.parametrize("size", [(1, 1), (2, 1), (255, 3), (256, 256), (257, 100), (4097, 1023)])
+def test_dzi_level_count_matches_deep_zoom(size):
+    width, height = size
+    levels = plan_pyramid_levels(width, height, PYRAMID_DZI, 254)
+
+    # Deep Zoom 的最高级号为 ceil(log2(max(宽, 高)))。
+    assert len(levels) == math.ceil(math.log2(max(width, height))) + 1
+    for larger, smaller in zip(levels, levels[1:]):
+        assert (smaller.width, smaller.height) == ((larger.width + 1) // 2, (larger.height + 1) // 2)
+
+
+def test_xyz_stops_once_the_image_fits_one_tile():
+    levels = plan_pyramid_levels(1000, 600, PYRAMID_XYZ, 256)
+
+    assert [(level.name, level.width, level.height) for level in levels] == [
+        ("2", 1000, 600),
+        ("1", 500, 300),
+        ("0", 250, 150),
+    ]
+    assert [(level.cols, level.rows) for level in levels] == [(4, 3), (2, 2), (1, 1)]
+
+
+def test_xyz_small_image_is_a_single_level():
+    assert plan_pyramid_levels(256, 100, PYRAMID_XYZ, 256) == [
+        PyramidLevel(name="0", width=256, height=100, cols=1, rows=1)
+    ]
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import pytest
+from PIL import Image
+
+import services.region_reader as region_reader
+from services.decoded_image_cache import DecodedImageCache, estimate_image_bytes, get_decoded_image_cache
+from services.region_reader import RegionReader, decode_region, read_region, release_region_source
+
+SIZE = (301, 203)
+BOXES = [(0, 0, 301, 203), (17, 5, 140, 96), (250, 150, 301, 203), (0, 202, 1, 203)]
+
+
+@pytest.fixture(autouse=True)
+def empty_decoded_cache():
+    cache = get_decoded_image_cache()
+    cache.clear()
+    release_region_source()
+    yield
+    cache.clear()
+    release_region_source()
+
+
+@pytest.fixture
+def small_decoded_cache(monkeypatch):
+    """模拟整图超出解码缓存预算的大图。"""
+    cache = DecodedImageCache(max_bytes=1024)
+    monkeypatch.setattr(region_reader, "get_decoded_image_cache", lambda: cache)
+    return cache
+
+
+def _source(mode: str) -> Image.Image:
+    image = Image.effect_noise(SIZE, 60).convert("RGB")
+    if mode == "RGBA":
+        image.putalpha(Image.linear_gradient("L").resize(SIZE))
+        return image
+    if mode == "P":
+        return image.quantize(64)
+    if mode == "I;16":
+        return image.convert("L").point(lambda value: value * 257, "I").convert("I;16")
+    return image.convert(mode)
+
+
+@pytest.mark.parametrize(
+    "name, mode, save_kwargs, partial",
+    [
+        ("rgb.png", "RGB", {}, True),
+        ("rgba.png", "RGBA", {}, True),
+        ("gray.png", "L", {}, True),
+        ("palette.png", "P", {}, True),
+        ("deep.png", "I;16", {}, True),
+        ("interlaced.png", "RGB", {"interlace": 1}, True),
+        ("rgb.bmp", "RGB", {}, True),
+        ("rgb.tif", "RGB", {}, True),
+        ("cmyk.tif", "CMYK", {}, True),
+        # libtiff 压缩与 JPEG 无法部分解码，回退到整图解码。
+        ("deflate.tif", "RGB", {"compression": "tiff_adobe_deflate"}, False),
+        ("rgb.jpg", "RGB", {"quality": 90}, False),
+    ],
+)
+def test_matches_a_full_decode(tmp_path, name, mode, save_kwargs, partial):
+    path = str(tmp_path / name)
+    _source(mode).save(path, **save_kwargs)
+    with Image.open(path) as full:
+        full.load()
+        for box in BOXES:
+            get_decoded_image_cache().clear()
+            with RegionReader(path) as reader:
+                region = reader.read(box)
+                assert reader.whole_image_decoded is not partial
+            expected = full.crop(box)
+            assert region.mode == expected.mode
+            assert region.size == expected.size
+            assert region.tobytes() == expected.tobytes()
+            assert decode_region(path, box).tobytes() == expected.tobytes()
+
+
+def test_partial_decode_does_not_fill_the_cache(tmp_path):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+
+    with RegionReader(path) as reader:
+        for box in BOXES:
+            reader.read(box)
+        assert not reader.whole_image_decoded
+    assert get_decoded_image_cache().get(path) is None
+
+
+def test_whole_image_fallback_decodes_once(tmp_path):
+    path = str(tmp_path / "rgb.jpg")
+    _source("RGB").save(path)
+
+    with RegionReader(path) as reader:
+        first = reader.read(BOXES[1])
+        assert reader.whole_image_decoded
+        whole = get_decoded_image_cache().get(path)
+        assert whole is not None
+        assert reader.read(BOXES[2]).tobytes() == whole.crop(BOXES[2]).tobytes()
+    assert first.tobytes() == whole.crop(BOXES[1]).tobytes()
+
+
+def test_decoded_pixels_count_rows_read_for_png(tmp_path):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+
+    with RegionReader(path) as reader:
+        reader.read((17, 5, 140, 96))
+        # 逐行压缩的 PNG 要从第一行解码到区域底边。
+        assert reader.decoded_pixels == SIZE[0] * 96
+        reader.read((0, 0, 10, 10))
+        assert reader.decoded_pixels == SIZE[0] * 106
+
+
+def test_plan_decodes_once_when_regions_would_cost_more(tmp_path):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+    boxes = [(0, 150, 50, 200), (100, 160, 150, 203), (200, 170, 250, 190)]
+
+    with RegionReader(path) as reader:
+        reader.plan(boxes)
+        assert reader.whole_image_decoded
+        for box in boxes:
+            reader.read(box)
+        assert reader.decoded_pixels == SIZE[0] * SIZE[1]
+
+
+def test_plan_keeps_cheap_partial_reads(tmp_path):
+    path = str(tmp_path / "rgb.bmp")
+    _source("RGB").save(path)
+
+    with RegionReader(path) as reader:
+        reader.plan(BOXES[1:3])
+        assert not reader.whole_image_decoded
+        for box in BOXES[1:3]:
+            reader.read(box)
+        assert reader.decoded_pixels == sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in BOXES[1:3])
+
+
+def test_cached_pixels_are_cropped_directly(tmp_path):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+    # 缓存中登记的是内存里的结果（例如刚保存的编辑），命中时应直接使用它。
+    cached = Image.new("RGB", SIZE, (1, 2, 3))
+    get_decoded_image_cache().put(path, cached)
+
+    assert decode_region(path, BOXES[1]).tobytes() == cached.crop(BOXES[1]).tobytes()
+
+
+def test_rejects_missing_file_and_empty_box(tmp_path):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+
+    with pytest.raises(FileNotFoundError):
+        decode_region(str(tmp_path / "missing.png"), BOXES[1])
+    with pytest.raises(ValueError):
+        decode_region(path, (10, 10, 10, 20))
+
+
+def test_lod_tiles_of_oversized_images_decode_partially(tmp_path, small_decoded_cache):
+    path = str(tmp_path / "rgb.png")
+    _source("RGB").save(path)
+
+    with Image.open(path) as full:
+        full.load()
+        for box in BOXES:
+            assert read_region(path, box, 1).tobytes() == full.crop(box).tobytes()
+            reduced = read_region(path, box, 2)
+            assert reduced.tobytes() == full.crop(box).reduce(2).tobytes()
+    assert small_decoded_cache.total_bytes == 0
+    assert region_reader._region_sources.get(path, 1) is None
+
+
+def test_lod_tiles_reuse_one_releasable_full_decode(tmp_path, small_decoded_cache, monkeypatch):
+    path = str(tmp_path / "rgb.jpg")
+    _source("RGB").save(path)
+    decodes = []
+    decode_drafted = region_reader._decode_drafted
+    monkeypatch.setattr(
+        region_reader, "_decode_drafted", lambda *args: decodes.append(args) or decode_drafted(*args)
+    )
+
+    with Image.open(path) as full:
+        full.load()
+        for box in BOXES:
+            assert read_region(path, box, 1).tobytes() == full.crop(box).tobytes()
+    assert len(decodes) == 1
+    assert small_decoded_cache.total_bytes == 0
+    assert region_reader._region_sources.get(path, 1) is not None
+
+    release_region_source(path)
+    assert region_reader._region_sources.get(path, 1) is None
+
+
+def test_region_source_holder_skips_sources_over_budget(tmp_path):
+    path = str(tmp_path / "rgb.jpg")
+    _source("RGB").save(path)
+    holder = region_reader._RegionSourceHolder(max_bytes=1024)
+
+    source, scale = holder.get_or_decode(path, 2)
+    assert scale == 2
+    assert source.size == ((SIZE[0] + 1) // 2, (SIZE[1] + 1) // 2)
+    assert holder.get(path, 2) is None
+
+    holder.max_bytes = estimate_image_bytes(source)
+    holder.get_or_decode(path, 2)
+    assert holder.get(path, 2) is not None
+    # 只保留最近一个来源。
+    holder.get_or_decode(path, 4)
+    assert holder.get(path, 2) is None
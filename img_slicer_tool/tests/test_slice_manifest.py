@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import pytest
+
+from services.slice_manifest import SliceManifest
+from services.tile_encoder import TileSpec
+
+SETTINGS = {"ext": ".png", "profile": "balanced", "save_kwargs": {}}
+
+
+def _tile(row: int, col: int, box) -> TileSpec:
+    return TileSpec(row=row, col=col, box=box, filename=f"img_r{row:02d}_c{col:02d}.png")
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "img.png"
+    path.write_bytes(b"source pixels")
+    return str(path)
+
+
+def _write_previous(output_dir, source, tiles):
+    """模拟上一次切图：写出切片文件并记录到清单。"""
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        for spec in tiles:
+            (output_dir / spec.filename).write_bytes(spec.filename.encode())
+            manifest.record(spec, SETTINGS)
+
+
+def test_plan_sorts_tiles_into_unchanged_moves_pending_and_stale(tmp_path, source):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    _write_previous(
+        output_dir,
+        source,
+        [
+            _tile(1, 1, (0, 0, 10, 10)),
+            _tile(1, 2, (10, 0, 20, 10)),
+            _tile(1, 3, (20, 0, 30, 10)),
+            _tile(2, 2, (10, 10, 20, 20)),
+        ],
+    )
+    kept = _tile(1, 1, (0, 0, 10, 10))
+    # 删掉一列后第 3 列左移成为第 2 列：像素相同，只需改名。
+    renumbered = _tile(1, 2, (20, 0, 30, 10))
+    added = _tile(2, 1, (0, 10, 10, 20))
+
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        plan = manifest.plan([kept, renumbered, added], SETTINGS)
+
+    assert plan.unchanged == [kept]
+    assert plan.moves == [("img_r01_c03.png", renumbered)]
+    assert plan.pending == [added]
+    assert plan.stale == ["img_r02_c02.png"]
+
+
+def test_apply_moves_renames_onto_names_still_in_use(tmp_path, source):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    _write_previous(output_dir, source, [_tile(1, 1, (0, 0, 10, 10)), _tile(1, 2, (10, 0, 20, 10))])
+    swapped = [_tile(1, 1, (10, 0, 20, 10)), _tile(1, 2, (0, 0, 10, 10))]
+
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        plan = manifest.plan(swapped, SETTINGS)
+        assert plan.pending == [] and plan.stale == []
+        manifest.apply_moves(plan.moves, SETTINGS)
+
+    assert (output_dir / "img_r01_c01.png").read_bytes() == b"img_r01_c02.png"
+    assert (output_dir / "img_r01_c02.png").read_bytes() == b"img_r01_c01.png"
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        assert manifest.plan(swapped, SETTINGS).unchanged == swapped
+
+
+def test_changed_settings_reencode_every_tile(tmp_path, source):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    tiles = [_tile(1, 1, (0, 0, 10, 10)), _tile(1, 2, (10, 0, 20, 10))]
+    _write_previous(output_dir, source, tiles)
+
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        plan = manifest.plan(tiles, {**SETTINGS, "profile": "smallest"})
+
+    assert plan.unchanged == [] and plan.moves == []
+    assert plan.pending == tiles
+
+
+def test_changed_source_invalidates_previous_tiles(tmp_path, source):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    tiles = [_tile(1, 1, (0, 0, 10, 10))]
+    _write_previous(output_dir, source, tiles)
+    with open(source, "wb") as file:
+        file.write(b"edited source pixels")
+
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        plan = manifest.plan(tiles, SETTINGS)
+
+    assert plan.pending == tiles
+
+
+def test_missing_tile_file_is_pending(tmp_path, source):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    tiles = [_tile(1, 1, (0, 0, 10, 10)), _tile(1, 2, (10, 0, 20, 10))]
+    _write_previous(output_dir, source, tiles)
+    (output_dir / "img_r01_c02.png").unlink()
+
+    with SliceManifest.open(str(output_dir), source) as manifest:
+        plan = manifest.plan(tiles, SETTINGS)
+
+    assert plan.unchanged == tiles[:1]
+    assert plan.pending == tiles[1:]
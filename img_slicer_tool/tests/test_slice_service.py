@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from PIL import Image, ImageCms
+from PySide6.QtGui import QPixmap
+
+import services.slice_service as slice_service
+from models.image_document import ImageDocument
+from models.slice_layout import SliceLayout
+from services.decoded_image_cache import get_decoded_image_cache
+from utils.vips_utils import _map_to_palette, pyvips
+
+SIZE = (240, 160)
+
+
+@pytest.fixture(autouse=True)
+def empty_decoded_cache():
+    cache = get_decoded_image_cache()
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _noise(mode: str = "RGB") -> Image.Image:
+    return Image.effect_noise(SIZE, 60).convert(mode)
+
+
+def _write_source(path: str, kind: str) -> None:
+    if kind == "icc":
+        icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+        _noise().save(path, icc_profile=icc_profile)
+    elif kind == "palette":
+        _noise().quantize(64).save(path)
+    elif kind == "palette_alpha":
+        _noise().quantize(64).save(path, transparency=bytes([0, 128] + [255] * 62))
+    elif kind == "gray16":
+        _noise("L").point(lambda value: value * 257, "I").convert("I;16").save(path)
+    elif kind == "rgb16":
+        # Pillow 无法写出 16 位 RGB，借助 pyvips 生成。
+        data = bytes(range(256)) * (SIZE[0] * SIZE[1] * 6 // 256)
+        image = pyvips.Image.new_from_memory(data, SIZE[0], SIZE[1], 3, "ushort")
+        image.copy(interpretation="rgb16").write_to_file(path)
+    elif kind == "cmyk":
+        _noise("CMYK").save(path)
+
+
+def _document(path: str) -> ImageDocument:
+    width, height = SIZE
+    return ImageDocument(path, width, height, width, height, 1.0, 1.0, QPixmap())
+
+
+@pytest.mark.skipif(pyvips is None, reason="需要 libvips")
+@pytest.mark.parametrize(
+    "kind, name",
+    [
+        ("icc", "icc.png"),
+        ("palette", "palette.png"),
+        ("palette_alpha", "palette_alpha.png"),
+        ("gray16", "gray16.png"),
+        ("rgb16", "rgb16.png"),
+        ("cmyk", "cmyk.tif"),
+    ],
+)
+def test_streamed_tiles_match_in_memory_tiles(qapp, tmp_path, monkeypatch, kind, name):
+    path = str(tmp_path / name)
+    _write_source(path, kind)
+    doc = _document(path)
+    layout = SliceLayout([60.0, 110.0], [100.0])
+
+    monkeypatch.setattr(slice_service, "STREAMING_MIN_PIXELS", SIZE[0] * SIZE[1] + 1)
+    assert not slice_service.should_stream(doc)
+    in_memory = slice_service.slice_document_to_tiles(doc, layout, str(tmp_path / "memory"), workers=1)
+    get_decoded_image_cache().clear()
+    monkeypatch.setattr(slice_service, "STREAMING_MIN_PIXELS", 1)
+    assert slice_service.should_stream(doc)
+    streamed = slice_service.slice_document_to_tiles(doc, layout, str(tmp_path / "streamed"), workers=1)
+
+    names = sorted(name for name in os.listdir(in_memory) if not name.startswith("."))
+    assert names == sorted(name for name in os.listdir(streamed) if not name.startswith("."))
+    assert len(names) == 6
+    for tile_name in names:
+        with Image.open(os.path.join(in_memory, tile_name)) as expected, Image.open(
+            os.path.join(streamed, tile_name)
+        ) as actual:
+            assert actual.mode == expected.mode
+            assert actual.size == expected.size
+            assert actual.tobytes() == expected.tobytes()
+            assert actual.info.get("icc_profile") == expected.info.get("icc_profile")
+            assert actual.info.get("transparency") == expected.info.get("transparency")
+            if expected.mode == "P":
+                assert actual.getpalette() == expected.getpalette()
+
+
+@pytest.mark.parametrize("kind", ["palette", "palette_alpha"])
+def test_expanded_palette_pixels_map_back_to_indices(tmp_path, kind):
+    path = str(tmp_path / "source.png")
+    _write_source(path, kind)
+    palette = slice_service._source_palette(path)
+    assert palette is not None
+
+    with Image.open(path) as source:
+        source.load()
+        expanded = source.convert("RGBA" if kind == "palette_alpha" else "RGB")
+        mapped = _map_to_palette(expanded, palette)
+        assert mapped is not None
+        assert mapped.tobytes() == source.tobytes()
+        assert mapped.getpalette() == source.getpalette()
+        assert mapped.info.get("transparency") == source.info.get("transparency")
+
+
+def test_colors_outside_the_palette_are_left_expanded(tmp_path):
+    path = str(tmp_path / "source.png")
+    _write_source(path, "palette")
+    palette = slice_service._source_palette(path)
+
+    assert _map_to_palette(_noise(), palette) is None
+    assert slice_service._source_palette(str(tmp_path / "missing.png")) is None
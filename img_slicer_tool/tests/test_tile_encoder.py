@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from services.tile_encoder import (
+    BUDGET_MAX_ATTEMPTS,
+    BUDGET_MIN_QUALITY,
+    PARTIAL_TILE_SUFFIX,
+    encode_within_budget,
+    remove_partial_tiles,
+)
+
+TOP_QUALITY = 95
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def noisy_tile():
+    return Image.effect_noise((128, 128), 40).convert("RGB")
+
+
+def _jpeg_size(image: Image.Image, quality: int) -> int:
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return len(buffer.getvalue())
+
+
+def _count_encodes(image: Image.Image, monkeypatch) -> list:
+    qualities = []
+    save = image.save
+
+    def counting_save(fp, format=None, **params):
+        qualities.append(params.get("quality"))
+        return save(fp, format=format, **params)
+
+    monkeypatch.setattr(image, "save", counting_save)
+    return qualities
+
+
+def test_profile_quality_is_kept_when_it_fits(noisy_tile, monkeypatch):
+    tile = noisy_tile.copy()
+    qualities = _count_encodes(tile, monkeypatch)
+
+    data, quality = encode_within_budget(tile, "JPEG", {"quality": TOP_QUALITY}, 10**9)
+
+    assert quality == TOP_QUALITY
+    assert qualities == [TOP_QUALITY]
+    assert len(data) == _jpeg_size(noisy_tile, TOP_QUALITY)
+
+
+@pytest.mark.parametrize("fraction", [0.1, 0.3, 0.5, 0.7, 0.9])
+def test_converges_next_to_the_highest_fitting_quality(noisy_tile, monkeypatch, fraction):
+    sizes = {quality: _jpeg_size(noisy_tile, quality) for quality in range(BUDGET_MIN_QUALITY, TOP_QUALITY + 1)}
+    budget = int(sizes[BUDGET_MIN_QUALITY] + (sizes[TOP_QUALITY] - sizes[BUDGET_MIN_QUALITY]) * fraction)
+    best = max(quality for quality, size in sizes.items() if size <= budget)
+    tile = noisy_tile.copy()
+    qualities = _count_encodes(tile, monkeypatch)
+
+    data, quality = encode_within_budget(tile, "JPEG", {"quality": TOP_QUALITY}, budget)
+
+    assert len(data) <= budget
+    assert best - 1 <= quality <= best
+    assert len(qualities) <= BUDGET_MAX_ATTEMPTS
+
+
+def test_unreachable_budget_returns_smallest_attempt(noisy_tile, monkeypatch):
+    tile = noisy_tile.copy()
+    qualities = _count_encodes(tile, monkeypatch)
+
+    data, quality = encode_within_budget(tile, "JPEG", {"quality": TOP_QUALITY}, 1)
+
+    assert len(data) > 1
+    assert quality == min(qualities)
+    assert len(data) == _jpeg_size(noisy_tile, quality)
+    assert len(qualities) <= BUDGET_MAX_ATTEMPTS
+
+
+def test_spawn_workers_do_not_load_qt():
+    # spawn 工作进程以 __mp_main__ 重新导入入口脚本，再导入本模块。
+    script = (
+        "import runpy, sys\n"
+        f"runpy.run_path({os.path.join(APP_ROOT, 'main.py')!r}, run_name='__mp_main__')\n"
+        "import services.tile_encoder\n"
+        "print(any(name.startswith('PySide6') for name in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=APP_ROOT, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_remove_partial_tiles_keeps_files_of_running_writers(tmp_path):
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_pid = int(finished.stdout)
+    running = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"], stdin=subprocess.PIPE)
+    try:
+        kept = [
+            f".img_r01_c01.png.{os.getpid()}{PARTIAL_TILE_SUFFIX}",
+            f".img_r01_c02.png.{running.pid}{PARTIAL_TILE_SUFFIX}",
+            f".img_r01_c03.png.{running.pid}.move{PARTIAL_TILE_SUFFIX}",
+            "img_r01_c04.png",
+        ]
+        removed = [
+            f".img_r02_c01.png.{dead_pid}{PARTIAL_TILE_SUFFIX}",
+            f".img_r02_c02.png.{dead_pid}.move{PARTIAL_TILE_SUFFIX}",
+            f".img_r02_c03.png{PARTIAL_TILE_SUFFIX}",
+        ]
+        for name in kept + removed:
+            (tmp_path / name).write_bytes(b"")
+
+        remove_partial_tiles(str(tmp_path))
+
+        assert sorted(os.listdir(tmp_path)) == sorted(kept)
+    finally:
+        running.communicate()
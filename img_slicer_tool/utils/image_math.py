@@ -47,6 +47,13 @@ def preview_rect_to_original_box(
     return x1, y1, x2, y2
 
 
+def grid_line_positions(width: float, height: float, rows: int, cols: int) -> Tuple[List[float], List[float]]:
+    """按行列数均分 width x height，返回 (水平线, 垂直线) 位置，不含边界。"""
+    row_step = height / rows
+    col_step = width / cols
+    return [row_step * i for i in range(1, rows)], [col_step * j for j in range(1, cols)]
+
+
 def preview_lines_to_original_boundaries(
     doc: ImageDocument,
     layout: SliceLayout,
@@ -66,8 +73,9 @@ def preview_lines_to_original_boundaries(
         yo = max(0, min(yo, doc.original_height))
         ys_original.append(yo)
 
-    xs_original = sorted(set(xs_original))
-    ys_original = sorted(set(ys_original))
+    # 边界已有序，取整与截断不改变顺序，按出现顺序去重即可。
+    xs_original = list(dict.fromkeys(xs_original))
+    ys_original = list(dict.fromkeys(ys_original))
 
     if len(xs_original) < 2 or len(ys_original) < 2:
         raise ValueError("切图边界不足，无法生成宫格")
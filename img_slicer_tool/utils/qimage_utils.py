@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+from PIL import Image
+from PySide6.QtGui import QImage
+
+"""Pillow 图像到 QImage 的转换。
+
+- 按模式映射到 Qt 原生格式（灰度、16 位灰度、索引色），避免一律转成 RGBA；
+- QImage 直接引用 NumPy 缓冲区并显式给出每行字节数，不再额外拷贝；
+- PySide6 构造 QImage 时会持有缓冲区对象的引用，QImage（及其隐式共享副本）
+  存活期间缓冲区不会被释放，可安全地跨线程传递。
+"""
+
+_DIRECT_FORMATS = {
+    "RGB": QImage.Format.Format_RGB888,
+    "RGBA": QImage.Format.Format_RGBA8888,
+    "RGBX": QImage.Format.Format_RGBX8888,
+    "L": QImage.Format.Format_Grayscale8,
+}
+_GRAYSCALE16_MODES = {"I;16", "I;16L", "I;16B", "I;16N", "I", "F"}
+
+
+def pil_image_to_qimage(pil_image: Image.Image) -> QImage:
+    mode = pil_image.mode
+
+    if mode in _DIRECT_FORMATS:
+        return _array_to_qimage(np.asarray(pil_image), _DIRECT_FORMATS[mode])
+    if mode == "1":
+        return _array_to_qimage(np.asarray(pil_image.convert("L")), QImage.Format.Format_Grayscale8)
+    if mode in _GRAYSCALE16_MODES:
+        return _array_to_qimage(_to_uint16(np.asarray(pil_image)), QImage.Format.Format_Grayscale16)
+    if mode == "P" and "transparency" not in pil_image.info and pil_image.palette is not None:
+        qimage = _array_to_qimage(np.asarray(pil_image), QImage.Format.Format_Indexed8)
+        qimage.setColorTable(_palette_color_table(pil_image))
+        return qimage
+    if mode == "CMYK":
+        return _array_to_qimage(_cmyk_to_rgb(np.asarray(pil_image)), QImage.Format.Format_RGB888)
+    if mode in ("YCbCr", "LAB", "HSV"):
+        return _array_to_qimage(np.asarray(pil_image.convert("RGB")), QImage.Format.Format_RGB888)
+
+    # LA / PA / 带透明色的 P 等模式在 Qt 中没有对应格式，统一转为 RGBA。
+    return _array_to_qimage(np.asarray(pil_image.convert("RGBA")), QImage.Format.Format_RGBA8888)
+
+
+def _array_to_qimage(array: np.ndarray, image_format: QImage.Format) -> QImage:
+    if not array.flags["C_CONTIGUOUS"]:
+        array = np.ascontiguousarray(array)
+    height, width = array.shape[:2]
+    bytes_per_line = array.strides[0]
+    # 传入 memoryview，PySide6 会持有它（进而持有 array）直到 QImage 数据释放。
+    return QImage(array.data, width, height, bytes_per_line, image_format)
+
+
+def _to_uint16(array: np.ndarray) -> np.ndarray:
+    if array.dtype == np.uint16:
+        return array
+    if array.dtype.kind == "u" and array.dtype.itemsize == 2:
+        # 大端 I;16B 转为本机字节序。
+        return array.astype(np.uint16)
+    return np.clip(array, 0, 65535).astype(np.uint16)
+
+
+def _palette_color_table(pil_image: Image.Image) -> List[int]:
+    palette = pil_image.getpalette("RGB") or []
+    table = []
+    for index in range(0, len(palette) - 2, 3):
+        r, g, b = palette[index : index + 3]
+        table.append(0xFF000000 | (r << 16) | (g << 8) | b)
+    # 像素值可能超出调色板长度，补齐到 256 项避免越界显示异常。
+    table.extend([0xFF000000] * (256 - len(table)))
+    return table
+
+
+def _cmyk_to_rgb(cmyk: np.ndarray) -> np.ndarray:
+    """与 Pillow cmyk2rgb 一致：rgb = (255 - k) - round(cmy * (255 - k) / 255)。"""
+    cmy = cmyk[..., :3].astype(np.uint32)
+    nk = 255 - cmyk[..., 3:4].astype(np.uint32)
+    product = cmy * nk + 128
+    muldiv = (product + (product >> 8)) >> 8
+    return (nk - muldiv).astype(np.uint8)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+"""pyvips 可选依赖的统一入口。
+
+pyvips 依赖系统中的 libvips，缺失时 pyvips 为 None，调用方需退回 Pillow 实现。
+"""
+
+try:
+    import pyvips
+except (ImportError, OSError):  # pragma: no cover - 取决于运行环境
+    pyvips = None
+
+
+def vips_image_to_pil(image: "pyvips.Image") -> Image.Image:
+    """将 pyvips 图像转换为 8 位的 Pillow 图像。"""
+    if image.interpretation == "cmyk":
+        image = image.colourspace("srgb")
+    elif image.interpretation in ("rgb16", "grey16"):
+        image = image.colourspace("srgb" if image.bands >= 3 else "b-w")
+    if image.format != "uchar":
+        image = image.cast("uchar")
+
+    modes = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+    mode = modes.get(image.bands)
+    if mode is None:
+        image = image.extract_band(0, n=3)
+        mode = "RGB"
+
+    data = image.write_to_memory()
+    return Image.frombuffer(mode, (image.width, image.height), data, "raw", mode, 0, 1)
+
+
+def vips_band_to_pil(image: "pyvips.Image", palette: Optional[Image.Image] = None) -> Image.Image:
+    """将 pyvips 图像转换为 Pillow 图像，像素与 Pillow 直接解码同一文件的结果一致。
+
+    切图输出使用：CMYK 与 16 位灰度保留原始像素；16 位 RGB(A) / LA 与 Pillow 一样
+    只保留高字节；其余按 vips_image_to_pil 转为 8 位。palette 为源图的调色板图像
+    （P 模式，可带 info["transparency"]），给出时把展开成 RGB(A) 的像素映射回调色板索引。
+    """
+    if image.format == "ushort" and image.bands > 1:
+        if image.interpretation == "cmyk":
+            interpretation = "cmyk"
+        else:
+            interpretation = "srgb" if image.bands >= 3 else "b-w"
+        image = (image >> 8).cast("uchar").copy(interpretation=interpretation)
+
+    if image.format == "uchar" and image.interpretation == "cmyk" and image.bands == 4:
+        mode = "CMYK"
+    elif image.format == "ushort" and image.bands == 1:
+        mode = "I;16"
+    else:
+        band = vips_image_to_pil(image)
+        mapped = _map_to_palette(band, palette) if palette is not None else None
+        return mapped if mapped is not None else band
+    data = image.write_to_memory()
+    return Image.frombuffer(mode, (image.width, image.height), data, "raw", mode, 0, 1)
+
+
+def vips_image_info(image: "pyvips.Image") -> Dict[str, Any]:
+    """pyvips 元数据中与 Pillow Image.info 对应的 ICC 配置（icc_profile）与 EXIF（exif）。"""
+    fields = set(image.get_fields())
+    info: Dict[str, Any] = {}
+    if "icc-profile-data" in fields:
+        info["icc_profile"] = image.get("icc-profile-data")
+    if "exif-data" in fields:
+        info["exif"] = image.get("exif-data")
+    return info
+
+
+def _map_to_palette(band: Image.Image, palette: Image.Image) -> Optional[Image.Image]:
+    """按颜色把 RGB(A) 图像映射回 palette 的索引；出现调色板外的颜色时返回 None。"""
+    entries = palette.getpalette("RGB")
+    colors = np.array(entries, dtype=np.uint8).reshape(-1, 3)
+    if len(colors) == 0:
+        return None
+    if band.mode == "RGBA":
+        alpha = np.full(len(colors), 255, dtype=np.uint8)
+        transparency = palette.info.get("transparency")
+        if isinstance(transparency, int) and transparency < len(colors):
+            alpha[transparency] = 0
+        elif isinstance(transparency, bytes):
+            count = min(len(transparency), len(colors))
+            alpha[:count] = np.frombuffer(transparency[:count], dtype=np.uint8)
+        colors = np.column_stack([colors, alpha])
+    elif band.mode != "RGB":
+        return None
+
+    keys = _color_keys(np.asarray(band))
+    palette_keys = _color_keys(colors)
+    # 颜色重复时取序号最小的调色板项。
+    order = np.argsort(palette_keys, kind="stable")
+    sorted_keys = palette_keys[order]
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    if not np.array_equal(sorted_keys[positions], keys):
+        return None
+
+    indices = np.ascontiguousarray(order[positions], dtype=np.uint8)
+    mapped = Image.frombuffer("P", band.size, indices.tobytes(), "raw", "P", 0, 1)
+    mapped.putpalette(entries)
+    if "transparency" in palette.info:
+        mapped.info["transparency"] = palette.info["transparency"]
+    return mapped
+
+
+def _color_keys(pixels: np.ndarray) -> np.ndarray:
+    """把最后一维的各通道拼成一个 uint32，便于整体比较颜色。"""
+    keys = np.zeros(pixels.shape[:-1], dtype=np.uint32)
+    for channel in range(pixels.shape[-1]):
+        keys = (keys << 8) | pixels[..., channel]
+    return keys
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    QRunnable,
+    QSize,
+    Qt,
+    QThreadPool,
+    Signal,
+)
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QAbstractItemView, QListView
+
+from services.image_loader import decode_thumbnail
+
+FILMSTRIP_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+FILMSTRIP_THUMBNAIL_SIZE = 96
+# 内存中最多保留的缩略图数量，滚出视野较久的会被丢弃、需要时重新生成。
+FILMSTRIP_THUMBNAIL_CACHE_LIMIT = 400
+
+
+def list_folder_images(folder: str) -> List[str]:
+    """按自然顺序（img2 排在 img10 之前）列出文件夹中的图片。"""
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    paths = [
+        os.path.join(folder, name)
+        for name in names
+        if os.path.splitext(name)[1].lower() in FILMSTRIP_IMAGE_EXTENSIONS
+        and os.path.isfile(os.path.join(folder, name))
+    ]
+    return sorted(paths, key=_natural_sort_key)
+
+
+def _natural_sort_key(path: str):
+    name = os.path.basename(path).lower()
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class _ThumbnailSignals(QObject):
+    thumbnailReady = Signal(int, str, object)  # generation, path, QImage
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, model: "FilmstripModel", generation: int, path: str) -> None:
+        super().__init__()
+        self._model = model
+        self._signals = model._signals
+        self._generation = generation
+        self._path = path
+
+    def run(self) -> None:
+        if not self._model.is_pending(self._generation, self._path):
+            return
+        try:
+            image = decode_thumbnail(self._path, FILMSTRIP_THUMBNAIL_SIZE)
+        except Exception:  # noqa: BLE001 - 无法生成缩略图时保留文件名显示
+            image = QImage()
+        self._signals.thumbnailReady.emit(self._generation, self._path, image)
+
+
+class FilmstripModel(QAbstractListModel):
+    """图片序列模型：缩略图在视图实际请求时才交给线程池生成。"""
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._paths: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._thumbnails: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._pending: Set[str] = set()
+        self._generation = 0
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount() - 1)))
+        self._signals = _ThumbnailSignals(self)
+        self._signals.thumbnailReady.connect(self._on_thumbnail_ready)
+
+    def set_paths(self, paths: Sequence[str]) -> None:
+        self.beginResetModel()
+        self._generation += 1
+        self._pool.clear()
+        self._paths = list(paths)
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+        self._thumbnails.clear()
+        self._pending.clear()
+        self.endResetModel()
+
+    def paths(self) -> List[str]:
+        return list(self._paths)
+
+    def path_at(self, row: int) -> Optional[str]:
+        if 0 <= row < len(self._paths):
+            return self._paths[row]
+        return None
+
+    def row_of(self, path: str) -> Optional[int]:
+        return self._rows.get(path)
+
+    def is_pending(self, generation: int, path: str) -> bool:
+        return generation == self._generation and path in self._pending
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802 - Qt override
+        if parent.isValid():
+            return 0
+        return len(self._paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):  # noqa: D401 - Qt override
+        if not index.isValid() or not (0 <= index.row() < len(self._paths)):
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.DecorationRole:
+            return self._thumbnail_for(path)
+        return None
+
+    def _thumbnail_for(self, path: str) -> Optional[QPixmap]:
+        pixmap = self._thumbnails.get(path)
+        if pixmap is not None:
+            self._thumbnails.move_to_end(path)
+            return pixmap
+        if path not in self._pending:
+            self._pending.add(path)
+            self._pool.start(_ThumbnailTask(self, self._generation, path))
+        return None
+
+    def _on_thumbnail_ready(self, generation: int, path: str, image: QImage) -> None:
+        if generation != self._generation:
+            return
+        self._pending.discard(path)
+        row = self._rows.get(path)
+        if row is None:
+            return
+        self._thumbnails[path] = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        while len(self._thumbnails) > FILMSTRIP_THUMBNAIL_CACHE_LIMIT:
+            self._thumbnails.popitem(last=False)
+        model_index = self.index(row)
+        self.dataChanged.emit(model_index, model_index, [Qt.DecorationRole])
+
+
+class FilmstripView(QListView):
+    """横向胶片条：统一尺寸的图标模式列表，只为可见项请求缩略图。"""
+
+    pathActivated = Signal(str)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.setObjectName("filmstrip")
+        self._model = FilmstripModel(self)
+        self.setModel(self._model)
+
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setUniformItemSizes(True)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setIconSize(QSize(FILMSTRIP_THUMBNAIL_SIZE, FILMSTRIP_THUMBNAIL_SIZE))
+        self.setGridSize(QSize(FILMSTRIP_THUMBNAIL_SIZE + 24, FILMSTRIP_THUMBNAIL_SIZE + 28))
+        self.setFixedHeight(FILMSTRIP_THUMBNAIL_SIZE + 48)
+        self.setTextElideMode(Qt.ElideMiddle)
+
+        self.clicked.connect(self._on_index_clicked)
+        self.activated.connect(self._on_index_clicked)
+
+    def set_paths(self, paths: Sequence[str]) -> None:
+        self._model.set_paths(paths)
+
+    def paths(self) -> List[str]:
+        return self._model.paths()
+
+    def path_at(self, row: int) -> Optional[str]:
+        return self._model.path_at(row)
+
+    def row_of(self, path: str) -> Optional[int]:
+        return self._model.row_of(path)
+
+    def count(self) -> int:
+        return self._model.rowCount()
+
+    def set_current_path(self, path: str) -> None:
+        """只同步高亮位置，不触发 pathActivated。"""
+        row = self._model.row_of(path)
+        if row is None:
+            self.clearSelection()
+            return
+        index = self._model.index(row)
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QAbstractItemView.EnsureVisible)
+
+    def _on_index_clicked(self, index: QModelIndex) -> None:
+        path = self._model.path_at(index.row())
+        if path is not None:
+            self.pathActivated.emit(path)
@@ -1,24 +1,35 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, List, Optional
+from array import array
+from typing import List, Optional, Sequence, Tuple
 
-from PySide6.QtCore import QPointF, Qt, QRectF, Signal
+from PySide6.QtCore import QPointF, Qt, QRectF, QTimer, Signal
 from PySide6.QtGui import (
     QDragEnterEvent,
     QDragMoveEvent,
     QDropEvent,
     QMouseEvent,
+    QPixmap,
+    QTransform,
     QWheelEvent,
 )
 from PySide6.QtWidgets import QGraphicsScene, QGraphicsView
 
+from models.cut_line_store import HORIZONTAL, VERTICAL, CutLineStore
+from models.edit_history import LineAdded, LineCommand, LineMoved, LineRemoved, LinesReplaced, LineSnapshot
 from models.image_document import ImageDocument
 from models.slice_layout import SliceLayout
-from views.overlay_items import CropRectItem, GuideLineItem
+from utils.image_math import grid_line_positions
+from views.overlay_items import CropRectItem, CutLinesItem
+from views.tiled_image_layer import TiledImageLayer
 
 SUPPORTED_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
 LINE_SELECTION_TOLERANCE = 6.0
+# 切割线以 (方向, 该方向有序位置中的序号) 标识。
+LineKey = Tuple[str, int]
+# 缩放/平移停止后再请求高清瓦片，避免滚轮过程中频繁排队。
+LOD_UPDATE_DELAY_MS = 80
 
 
 class ImageView(QGraphicsView):
@@ -27,7 +38,13 @@ class ImageView(QGraphicsView):
 
     cropRequested = Signal(float, float, float, float)
     imageDropped = Signal(str)
+    imagesDropped = Signal(list)
+    folderDropped = Signal(str)
     invalidFileDropped = Signal(str)
+    # 切割线增删、移动或整体重建后发出。
+    sliceLayoutChanged = Signal()
+    # 用户在画布上增删、拖动切割线完成后发出对应的撤销命令（LineAdded 等）。
+    lineEdited = Signal(object)
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
@@ -44,13 +61,20 @@ class ImageView(QGraphicsView):
         self._drag_start_pos_scene: Optional[QPointF] = None
         self.sliceMode: str = "manual"
         self.lineTool: str = "cross"
-        self.cutLines: List[Dict[str, object]] = []
-        self._line_items: List[GuideLineItem] = []
-        self._selected_line_index: Optional[int] = None
+        self._lines = CutLineStore()
+        # 全部切割线由一个图元绘制，随预览图一起创建。
+        self._lines_item: Optional[CutLinesItem] = None
+        self._selected_line: Optional[LineKey] = None
         self._grid_rows = 2
         self._grid_cols = 2
         self._last_scene_pos: Optional[QPointF] = None
-        self._dragged_line_index: Optional[int] = None
+        self._dragged_line: Optional[LineKey] = None
+        self._drag_origin: Optional[float] = None
+        self._tile_layer = TiledImageLayer(self._scene, self)
+        self._lod_timer = QTimer(self)
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.setInterval(LOD_UPDATE_DELAY_MS)
+        self._lod_timer.timeout.connect(self._update_tile_layer)
 
         self._init_view()
         self.setAcceptDrops(True)
@@ -65,7 +89,9 @@ class ImageView(QGraphicsView):
     def set_document(self, document: ImageDocument) -> None:
         self._document = document
         self.clear_cut_lines()
+        self._tile_layer.reset()
         self._scene.clear()
+        self._lines_item = None
         self.resetTransform()
         self._current_scale = 1.0
         self._crop_rect_item = None
@@ -76,35 +102,87 @@ class ImageView(QGraphicsView):
         pixmap = document.preview_pixmap
         self._pixmap_item = self._scene.addPixmap(pixmap)
         self._scene.setSceneRect(QRectF(pixmap.rect()))
+        self._lines_item = CutLinesItem(self._lines, QRectF(pixmap.rect()))
+        self._scene.addItem(self._lines_item)
 
         self.fitInView(self._pixmap_item, Qt.KeepAspectRatio)
         self._current_scale = 1.0
+        self._tile_layer.set_document(document)
+        self._schedule_tile_update()
 
         if self._mode == self.MODE_SLICE and self.sliceMode == "grid":
             self._regenerate_grid_lines()
 
+    def clear_document(self) -> None:
+        """清空画布，不显示任何文档。"""
+        self._document = None
+        self.clear_cut_lines()
+        self._tile_layer.reset()
+        self._scene.clear()
+        self._lines_item = None
+        self.resetTransform()
+        self._current_scale = 1.0
+        self._pixmap_item = None
+        self._crop_rect_item = None
+        self._is_dragging_crop = False
+        self._drag_start_pos_scene = None
+        self._last_scene_pos = None
+
+    def show_quick_preview(self, pixmap: QPixmap, preview_width: int, preview_height: int) -> None:
+        """加载过程中先拉伸显示低分辨率首帧，场景尺寸与最终预览一致。"""
+        self.clear_document()
+
+        placeholder = self._scene.addPixmap(pixmap)
+        placeholder.setTransformationMode(Qt.SmoothTransformation)
+        placeholder.setTransform(
+            QTransform.fromScale(preview_width / pixmap.width(), preview_height / pixmap.height())
+        )
+        scene_rect = QRectF(0, 0, preview_width, preview_height)
+        self._scene.setSceneRect(scene_rect)
+        self.fitInView(scene_rect, Qt.KeepAspectRatio)
+        self._current_scale = 1.0
+
     def wheelEvent(self, event: QWheelEvent) -> None:  # noqa: N802 - Qt override
         if event.modifiers() & Qt.ControlModifier:
             factor = 1.1 if event.angleDelta().y() > 0 else 0.9
             self._current_scale *= factor
             self.scale(factor, factor)
+            self._schedule_tile_update()
         else:
             super().wheelEvent(event)
 
+    def scrollContentsBy(self, dx: int, dy: int) -> None:  # noqa: N802 - Qt override
+        super().scrollContentsBy(dx, dy)
+        self._schedule_tile_update()
+
+    def resizeEvent(self, event) -> None:  # noqa: N802 - Qt override
+        super().resizeEvent(event)
+        self._schedule_tile_update()
+
+    def _schedule_tile_update(self) -> None:
+        if self._document is not None:
+            self._lod_timer.start()
+
+    def _update_tile_layer(self) -> None:
+        if self._document is None:
+            return
+        visible_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        self._tile_layer.update_viewport(visible_rect, self.transform().m11())
+
     def keyPressEvent(self, event) -> None:  # noqa: N802 - Qt override
         if event.key() == Qt.Key_Space and not self._is_space_pressed:
             self._is_space_pressed = True
             self.setDragMode(QGraphicsView.ScrollHandDrag)
         elif event.key() == Qt.Key_Delete:
             if self._mode == self.MODE_SLICE and self.sliceMode == "manual":
-                if self._selected_line_index is not None:
-                    self._remove_line_at(self._selected_line_index)
+                if self._selected_line is not None:
+                    self._remove_line(self._selected_line)
                     return
         elif event.key() == Qt.Key_H:
-            if self._handle_hotkey_line(GuideLineItem.HORIZONTAL):
+            if self._handle_hotkey_line(HORIZONTAL):
                 return
         elif event.key() == Qt.Key_V:
-            if self._handle_hotkey_line(GuideLineItem.VERTICAL):
+            if self._handle_hotkey_line(VERTICAL):
                 return
         super().keyPressEvent(event)
 
@@ -123,8 +201,7 @@ class ImageView(QGraphicsView):
             self._crop_rect_item = None
         self._is_dragging_crop = False
         self._drag_start_pos_scene = None
-        self._dragged_line_index = None
-        self._update_cursor()
+        self._finish_line_drag()
 
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:  # noqa: N802
         if self._drag_contains_local_file(event):
@@ -139,17 +216,25 @@ class ImageView(QGraphicsView):
             event.ignore()
 
     def dropEvent(self, event: QDropEvent) -> None:  # noqa: N802
-        file_path = self._extract_local_file(event)
-        if not file_path:
+        local_paths = self._extract_local_paths(event)
+        if not local_paths:
             event.ignore()
             return
 
-        if self._is_supported_image(file_path):
+        folders = [path for path in local_paths if os.path.isdir(path)]
+        images = [path for path in local_paths if os.path.isfile(path) and self._is_supported_image(path)]
+        if len(images) > 1:
+            event.acceptProposedAction()
+            self.imagesDropped.emit(images)
+        elif images:
+            event.acceptProposedAction()
+            self.imageDropped.emit(images[0])
+        elif folders:
             event.acceptProposedAction()
-            self.imageDropped.emit(file_path)
+            self.folderDropped.emit(folders[0])
         else:
             event.accept()
-            self.invalidFileDropped.emit(file_path)
+            self.invalidFileDropped.emit(local_paths[0])
 
     def mousePressEvent(self, event: QMouseEvent) -> None:  # noqa: N802 - Qt override
         if self._is_space_pressed:
@@ -184,7 +269,7 @@ class ImageView(QGraphicsView):
 
     def mouseMoveEvent(self, event: QMouseEvent) -> None:  # noqa: N802 - Qt override
         self._update_last_scene_pos(event)
-        if self._mode == self.MODE_SLICE and self._dragged_line_index is not None:
+        if self._mode == self.MODE_SLICE and self._dragged_line is not None:
             scene_pos = self.mapToScene(event.pos())
             self._drag_selected_line(scene_pos)
             return
@@ -207,10 +292,9 @@ class ImageView(QGraphicsView):
             super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:  # noqa: N802 - Qt override
-        if self._mode == self.MODE_SLICE and self._dragged_line_index is not None:
+        if self._mode == self.MODE_SLICE and self._dragged_line is not None:
             if event.button() == Qt.LeftButton:
-                self._dragged_line_index = None
-                self._update_cursor()
+                self._finish_line_drag()
             return
 
         if (
@@ -234,23 +318,11 @@ class ImageView(QGraphicsView):
             super().mouseReleaseEvent(event)
 
     def get_slice_layout(self) -> SliceLayout:
-        """Gather cutLines[] into a SliceLayout."""
-        layout = SliceLayout()
+        """导出位于预览图内部的切割线；线条按方向有序保存，无需再排序。"""
         if self._pixmap_item is None:
-            return layout
-
+            return SliceLayout()
         pixmap_rect = self._pixmap_item.boundingRect()
-        for line in self.cutLines:
-            value = float(line["pos"])
-            if line["type"] == GuideLineItem.HORIZONTAL:
-                if pixmap_rect.top() <= value <= pixmap_rect.bottom():
-                    layout.horizontal_lines.append(value)
-            else:
-                if pixmap_rect.left() <= value <= pixmap_rect.right():
-                    layout.vertical_lines.append(value)
-
-        layout.normalize(int(pixmap_rect.width()), int(pixmap_rect.height()))
-        return layout
+        return self._lines.to_layout(pixmap_rect.width(), pixmap_rect.height())
 
     def get_pixmap_rect(self) -> Optional[QRectF]:
         """返回当前预览图的场景矩形。"""
@@ -292,19 +364,83 @@ class ImageView(QGraphicsView):
         if self.sliceMode == "grid":
             self._regenerate_grid_lines()
 
+    def grid_size(self) -> Tuple[int, int]:
+        return self._grid_rows, self._grid_cols
+
+    def line_snapshot(self) -> LineSnapshot:
+        """当前切割线状态；线条与按切图方式、网格行列生成的结果一致时不保存位置。"""
+        lines = self.export_cut_lines()
+        if lines == self._generated_lines():
+            return LineSnapshot(self.sliceMode, self.grid_size())
+        return LineSnapshot(self.sliceMode, self.grid_size(), lines)
+
+    def restore_line_snapshot(self, snapshot: LineSnapshot) -> None:
+        """恢复切图方式、网格行列与切割线；快照未保存位置时按参数重新生成。"""
+        self.sliceMode = snapshot.mode
+        self._grid_rows, self._grid_cols = snapshot.grid
+        if snapshot.lines is None:
+            self._regenerate_grid_lines()
+        else:
+            self.restore_cut_lines(*snapshot.lines)
+
+    def _generated_lines(self) -> Tuple[array, array]:
+        """按当前切图方式与网格行列生成的切割线：网格模式均分画布，手动模式为空。"""
+        if self._pixmap_item is None or self.sliceMode != "grid":
+            return array("d"), array("d")
+        rect = self._pixmap_item.boundingRect()
+        horizontal, vertical = grid_line_positions(rect.width(), rect.height(), self._grid_rows, self._grid_cols)
+        return array("d", horizontal), array("d", vertical)
+
+    def apply_line_command(self, command: LineCommand, undo: bool) -> None:
+        """撤销（undo=True）或重做一条切割线命令，不再发出 lineEdited。
+
+        线条按位置查找，命令中的序号只作提示。
+        """
+        if isinstance(command, LinesReplaced):
+            self.restore_line_snapshot(command.before if undo else command.after)
+            return
+        self._set_selected_line(None)
+        orientation = command.orientation
+        if isinstance(command, LineMoved):
+            source, target = (command.new, command.old) if undo else (command.old, command.new)
+            index = self._lines.index_of(orientation, source, command.index)
+            if index is not None:
+                self._move_line(orientation, index, target)
+        elif isinstance(command, LineAdded) != undo:
+            self._insert_line(orientation, command.position)
+        else:
+            index = self._lines.index_of(orientation, command.position, command.index)
+            if index is not None:
+                self._take_line(orientation, index)
+        self.sliceLayoutChanged.emit()
+
     def clear_cut_lines(self) -> None:
         """清空当前切割线。"""
-        for item in self._line_items:
-            if item.scene() is not None:
-                self._scene.removeItem(item)
-        self.cutLines.clear()
-        self._line_items.clear()
-        self._selected_line_index = None
-        self._dragged_line_index = None
+        self._set_selected_line(None)
+        self._dragged_line = None
+        self._drag_origin = None
+        self._lines.clear()
+        if self._lines_item is not None:
+            self._lines_item.update()
         self._update_cursor()
+        self.sliceLayoutChanged.emit()
 
     def has_cut_lines(self) -> bool:
-        return bool(self.cutLines)
+        return len(self._lines) > 0
+
+    def export_cut_lines(self) -> Tuple[array, array]:
+        """以紧凑的 double 数组导出当前水平/垂直切割线位置（各自有序）。"""
+        return self._lines.export()
+
+    def restore_cut_lines(self, horizontal: Sequence[float], vertical: Sequence[float]) -> None:
+        """按给定位置重建切割线（不受当前工具限制），用于切换文档时恢复状态。"""
+        if self._pixmap_item is None:
+            self.clear_cut_lines()
+            return
+        self._replace_lines(
+            [self._clamp_position(HORIZONTAL, value) for value in horizontal],
+            [self._clamp_position(VERTICAL, value) for value in vertical],
+        )
 
     def _handle_hotkey_line(self, orientation: str) -> bool:
         if self._mode != self.MODE_SLICE or self.sliceMode != "manual":
@@ -312,7 +448,7 @@ class ImageView(QGraphicsView):
         scene_pos = self._default_scene_pos()
         if scene_pos is None:
             return False
-        position = scene_pos.y() if orientation == GuideLineItem.HORIZONTAL else scene_pos.x()
+        position = scene_pos.y() if orientation == HORIZONTAL else scene_pos.x()
         self._add_manual_line(orientation, position)
         return True
 
@@ -335,86 +471,75 @@ class ImageView(QGraphicsView):
             return
 
         if self.lineTool in ("horizontal", "cross"):
-            self._add_manual_line(GuideLineItem.HORIZONTAL, scene_pos.y())
+            self._add_manual_line(HORIZONTAL, scene_pos.y())
 
         if self.lineTool in ("vertical", "cross"):
-            self._add_manual_line(GuideLineItem.VERTICAL, scene_pos.x())
+            self._add_manual_line(VERTICAL, scene_pos.x())
 
     def _add_manual_line(self, orientation: str, position: float) -> None:
         if self._pixmap_item is None or self.sliceMode != "manual":
             return
-        if orientation not in (GuideLineItem.HORIZONTAL, GuideLineItem.VERTICAL):
+        if orientation not in (HORIZONTAL, VERTICAL):
             return
 
         line_value = self._clamp_position(orientation, position)
-        data = {"type": orientation, "pos": line_value, "selected": False}
-        item = GuideLineItem(orientation)
-        self.cutLines.append(data)
-        self._line_items.append(item)
-        self._scene.addItem(item)
-        self._update_line_geometry(len(self.cutLines) - 1)
+        # 先取消选中：插入会改变同方向线条的序号。
         self._set_selected_line(None)
+        index = self._insert_line(orientation, line_value)
+        self.sliceLayoutChanged.emit()
+        self.lineEdited.emit(LineAdded(orientation, index, line_value))
 
-    def _remove_line_at(self, index: int) -> None:
-        if not (0 <= index < len(self.cutLines)):
+    def _remove_line(self, line: LineKey) -> None:
+        orientation, index = line
+        if not (0 <= index < self._lines.count(orientation)):
             return
-        item = self._line_items.pop(index)
-        if item.scene() is not None:
-            self._scene.removeItem(item)
-        self.cutLines.pop(index)
         self._set_selected_line(None)
-
-    def _update_line_geometry(self, index: int) -> None:
-        if self._pixmap_item is None or not (0 <= index < len(self.cutLines)):
-            return
-        pixmap_rect = self._pixmap_item.boundingRect()
-        data = self.cutLines[index]
-        value = float(data["pos"])
-        value = self._clamp_position(data["type"], value)
-        data["pos"] = value
-        item = self._line_items[index]
-
-        if data["type"] == GuideLineItem.HORIZONTAL:
-            item.setLine(pixmap_rect.left(), value, pixmap_rect.right(), value)
-        else:
-            item.setLine(value, pixmap_rect.top(), value, pixmap_rect.bottom())
-
-        self._update_line_highlight(index)
-
-    def _update_line_highlight(self, index: int) -> None:
-        if not (0 <= index < len(self.cutLines)):
-            return
-        highlight = bool(self.cutLines[index].get("selected"))
-        self._line_items[index].set_highlighted(highlight)
-
-    def _set_selected_line(self, index: Optional[int]) -> None:
-        self._selected_line_index = index
-        for idx, line in enumerate(self.cutLines):
-            line["selected"] = idx == index
-            self._update_line_highlight(idx)
+        position = self._take_line(orientation, index)
+        self.sliceLayoutChanged.emit()
+        self.lineEdited.emit(LineRemoved(orientation, index, position))
+
+    def _insert_line(self, orientation: str, position: float) -> int:
+        index = self._lines.insert(orientation, position)
+        self._repaint_lines(orientation, position)
+        return index
+
+    def _take_line(self, orientation: str, index: int) -> float:
+        position = self._lines.remove(orientation, index)
+        self._repaint_lines(orientation, position)
+        return position
+
+    def _move_line(self, orientation: str, index: int, position: float) -> int:
+        """移动一条线并返回新的序号（越过相邻线条时序号会变化）。"""
+        old_position = self._lines.position(orientation, index)
+        new_index = self._lines.move(orientation, index, position)
+        self._repaint_lines(orientation, old_position, position)
+        return new_index
+
+    def _replace_lines(self, horizontal: List[float], vertical: List[float]) -> None:
+        """整体替换切割线（网格重建、恢复文档状态）。"""
+        self._set_selected_line(None)
+        self._dragged_line = None
+        self._drag_origin = None
+        self._lines.replace(horizontal, vertical)
+        if self._lines_item is not None:
+            self._lines_item.update()
+        self.sliceLayoutChanged.emit()
+
+    def _repaint_lines(self, orientation: str, *positions: float) -> None:
+        if self._lines_item is not None:
+            self._lines_item.update_lines(orientation, *positions)
+
+    def _set_selected_line(self, line: Optional[LineKey]) -> None:
+        """只重绘取消选中与新选中的两条线。"""
+        self._selected_line = line
+        if self._lines_item is not None:
+            self._lines_item.set_selected_line(line)
         self._update_cursor()
 
     def _select_line_near(self, scene_pos: QPointF) -> bool:
-        if self._pixmap_item is None:
-            return False
-        pixmap_rect = self._pixmap_item.boundingRect()
-        best_index: Optional[int] = None
-        best_distance = LINE_SELECTION_TOLERANCE
-
-        for idx, line in enumerate(self.cutLines):
-            if line["type"] == GuideLineItem.HORIZONTAL and pixmap_rect.left() <= scene_pos.x() <= pixmap_rect.right():
-                distance = abs(scene_pos.y() - float(line["pos"]))
-            elif line["type"] == GuideLineItem.VERTICAL and pixmap_rect.top() <= scene_pos.y() <= pixmap_rect.bottom():
-                distance = abs(scene_pos.x() - float(line["pos"]))
-            else:
-                continue
-
-            if distance <= best_distance:
-                best_distance = distance
-                best_index = idx
-
-        self._set_selected_line(best_index)
-        return best_index is not None
+        line = self._find_line_near(scene_pos)
+        self._set_selected_line(line)
+        return line is not None
 
     def _default_scene_pos(self) -> Optional[QPointF]:
         if self._last_scene_pos is not None:
@@ -434,94 +559,74 @@ class ImageView(QGraphicsView):
         if self._pixmap_item is None:
             return value
         rect = self._pixmap_item.boundingRect()
-        if orientation == GuideLineItem.HORIZONTAL:
+        if orientation == HORIZONTAL:
             return max(rect.top(), min(value, rect.bottom()))
         return max(rect.left(), min(value, rect.right()))
 
     def _regenerate_grid_lines(self) -> None:
-        self.clear_cut_lines()
         if self._pixmap_item is None or self.sliceMode != "grid":
+            self.clear_cut_lines()
             return
 
         rect = self._pixmap_item.boundingRect()
-        if self._grid_rows > 1:
-            step = rect.height() / self._grid_rows
-            for i in range(1, self._grid_rows):
-                pos = rect.top() + step * i
-                self.cutLines.append({"type": GuideLineItem.HORIZONTAL, "pos": pos, "selected": False})
-                item = GuideLineItem(GuideLineItem.HORIZONTAL)
-                self._line_items.append(item)
-                self._scene.addItem(item)
-                self._update_line_geometry(len(self.cutLines) - 1)
-
-        if self._grid_cols > 1:
-            step = rect.width() / self._grid_cols
-            for j in range(1, self._grid_cols):
-                pos = rect.left() + step * j
-                self.cutLines.append({"type": GuideLineItem.VERTICAL, "pos": pos, "selected": False})
-                item = GuideLineItem(GuideLineItem.VERTICAL)
-                self._line_items.append(item)
-                self._scene.addItem(item)
-                self._update_line_geometry(len(self.cutLines) - 1)
+        self._replace_lines(*grid_line_positions(rect.width(), rect.height(), self._grid_rows, self._grid_cols))
 
     def _try_begin_line_drag(self, scene_pos: QPointF) -> bool:
         if self._pixmap_item is None:
             return False
-        hit_index = self._find_line_index_near(scene_pos)
-        if hit_index is None:
+        line = self._find_line_near(scene_pos)
+        if line is None:
             return False
-        self._set_selected_line(hit_index)
-        self._dragged_line_index = hit_index
+        self._set_selected_line(line)
+        self._dragged_line = line
+        self._drag_origin = self._lines.position(*line)
         self._update_cursor()
         return True
 
-    def _drag_selected_line(self, scene_pos: QPointF) -> None:
-        if self._dragged_line_index is None or self._pixmap_item is None:
+    def _finish_line_drag(self) -> None:
+        line, origin = self._dragged_line, self._drag_origin
+        self._dragged_line = None
+        self._drag_origin = None
+        self._update_cursor()
+        if line is None or origin is None:
             return
-        line = self.cutLines[self._dragged_line_index]
-        if line["type"] == GuideLineItem.HORIZONTAL:
-            line["pos"] = self._clamp_position(GuideLineItem.HORIZONTAL, scene_pos.y())
-        else:
-            line["pos"] = self._clamp_position(GuideLineItem.VERTICAL, scene_pos.x())
-        self._update_line_geometry(self._dragged_line_index)
+        position = self._lines.position(*line)
+        if position != origin:
+            self.lineEdited.emit(LineMoved(line[0], line[1], origin, position))
 
-    def _find_line_index_near(self, scene_pos: QPointF) -> Optional[int]:
-        pixmap_rect = self.get_pixmap_rect()
-        if pixmap_rect is None:
+    def _drag_selected_line(self, scene_pos: QPointF) -> None:
+        if self._dragged_line is None or self._pixmap_item is None:
+            return
+        orientation, index = self._dragged_line
+        value = scene_pos.y() if orientation == HORIZONTAL else scene_pos.x()
+        index = self._move_line(orientation, index, self._clamp_position(orientation, value))
+        # 被拖动的线条保持选中，越过相邻线条后序号随之更新。
+        self._dragged_line = (orientation, index)
+        self._set_selected_line(self._dragged_line)
+        self.sliceLayoutChanged.emit()
+
+    def _find_line_near(self, scene_pos: QPointF) -> Optional[LineKey]:
+        if self._lines_item is None:
             return None
-        best_index: Optional[int] = None
-        best_distance = LINE_SELECTION_TOLERANCE
-
-        for idx, line in enumerate(self.cutLines):
-            if line["type"] == GuideLineItem.HORIZONTAL and pixmap_rect.left() <= scene_pos.x() <= pixmap_rect.right():
-                distance = abs(scene_pos.y() - float(line["pos"]))
-            elif line["type"] == GuideLineItem.VERTICAL and pixmap_rect.top() <= scene_pos.y() <= pixmap_rect.bottom():
-                distance = abs(scene_pos.x() - float(line["pos"]))
-            else:
-                continue
-
-            if distance <= best_distance:
-                best_distance = distance
-                best_index = idx
-
-        return best_index
+        return self._lines_item.line_at(scene_pos, LINE_SELECTION_TOLERANCE)
 
     def _drag_contains_local_file(self, event: QDragEnterEvent | QDragMoveEvent) -> bool:
-        file_path = self._extract_local_file(event)
-        return bool(file_path)
+        return bool(self._extract_local_paths(event))
 
-    def _extract_local_file(
+    def _extract_local_paths(
         self,
         event: QDragEnterEvent | QDragMoveEvent | QDropEvent,
-    ) -> Optional[str]:
+    ) -> List[str]:
+        """返回拖入的全部本地文件与文件夹路径（保持拖入顺序）。"""
         if not event.mimeData().hasUrls():
-            return None
+            return []
+        paths: List[str] = []
         for url in event.mimeData().urls():
             if url.isLocalFile():
                 local_path = url.toLocalFile()
-                if os.path.isfile(local_path):
-                    return local_path
-        return None
+                if os.path.isfile(local_path) or os.path.isdir(local_path):
+                    paths.append(local_path)
+        return paths
 
     def _is_supported_image(self, path: str) -> bool:
         _, ext = os.path.splitext(path)
@@ -532,10 +637,10 @@ class ImageView(QGraphicsView):
             self.viewport().setCursor(Qt.ArrowCursor)
             return
 
-        if self._dragged_line_index is not None:
+        if self._dragged_line is not None:
             self.viewport().setCursor(Qt.ClosedHandCursor)
         elif self.sliceMode == "grid" or self.lineTool == "select":
-            cursor = Qt.OpenHandCursor if self._selected_line_index is not None else Qt.ArrowCursor
+            cursor = Qt.OpenHandCursor if self._selected_line is not None else Qt.ArrowCursor
             self.viewport().setCursor(cursor)
         else:
             self.viewport().setCursor(Qt.CrossCursor)
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from PySide6.QtCore import QPointF, Qt, QRectF
-from PySide6.QtGui import QColor, QBrush, QPen
-from PySide6.QtWidgets import QGraphicsLineItem, QGraphicsRectItem
+import math
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QLineF, QPointF, Qt, QRectF
+from PySide6.QtGui import QBrush, QColor, QPainter, QPen
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsRectItem, QStyleOptionGraphicsItem
+
+from models.cut_line_store import HORIZONTAL, VERTICAL, CutLineStore
 
 
 class CropRectItem(QGraphicsRectItem):
@@ -24,40 +30,112 @@ class CropRectItem(QGraphicsRectItem):
         self.setFlag(QGraphicsRectItem.ItemIsMovable, False)
 
 
-class GuideLineItem(QGraphicsLineItem):
-    """切图线条，支持高亮显示。"""
-
-    HORIZONTAL = "horizontal"
-    VERTICAL = "vertical"
+class CutLinesItem(QGraphicsItem):
+    """在一个图元中绘制全部切割线，并负责切割线的命中测试。
 
-    def __init__(self, orientation: str, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
-        if orientation not in (self.HORIZONTAL, self.VERTICAL):
-            raise ValueError("orientation must be 'horizontal' or 'vertical'")
-        self.orientation = orientation
+    线条位置直接读取 CutLineStore 的有序数组：绘制时二分出暴露区域内的线条，
+    按普通/高亮两种样式各调用一次 drawLines，线段裁剪到暴露区域；命中测试同样
+    使用二分查找。线条增删、移动后调用 update_lines() 只重绘受影响的窄条。
+    """
 
-        self._apply_pen(highlighted=False)
-        self.setZValue(9)
-        # 自定义高亮方案，因此禁用场景级的选中/拖动行为。
-        self.setFlag(QGraphicsLineItem.ItemIsMovable, False)
-        self.setFlag(QGraphicsLineItem.ItemIsSelectable, False)
-
-    def _apply_pen(self, highlighted: bool) -> None:
-        pen = QPen(QColor(255, 170, 0) if highlighted else QColor(255, 0, 0))
-        pen.setWidth(3 if highlighted else 1)
-        pen.setStyle(Qt.SolidLine if highlighted else Qt.DashLine)
-        self.setPen(pen)
+    # 虚线为 4 实 2 空（以线宽为单位），裁剪后的起点对齐到整周期，平移时花纹不跳动。
+    _DASH_PERIOD = 6.0
 
-    def set_highlighted(self, highlighted: bool) -> None:
-        """切换线条高亮效果。"""
-        self._apply_pen(highlighted)
+    def __init__(self, store: CutLineStore, rect: QRectF, parent=None) -> None:
+        super().__init__(parent)
+        self._store = store
+        self._rect = QRectF(rect)
+        self._selected: Optional[Tuple[str, int]] = None
 
-    def scene_coordinate_value(self) -> float:
-        """返回线条在场景中的关键坐标。"""
-        line = self.line()
-        p1 = self.mapToScene(line.p1())
-        p2 = self.mapToScene(line.p2())
+        self._pen = QPen(QColor(255, 0, 0))
+        self._pen.setWidth(1)
+        self._pen.setStyle(Qt.DashLine)
+        self._highlight_pen = QPen(QColor(255, 170, 0))
+        self._highlight_pen.setWidth(3)
+        self._highlight_pen.setStyle(Qt.SolidLine)
+        # 高亮线宽的一半再留 1 像素，作为重绘与包围盒的边距。
+        self._margin = self._highlight_pen.widthF() / 2 + 1
 
-        if self.orientation == self.HORIZONTAL:
-            return (p1.y() + p2.y()) / 2.0
-        return (p1.x() + p2.x()) / 2.0
+        self.setZValue(9)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        # 需要 option.exposedRect 才能只绘制暴露区域内的线条。
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    def boundingRect(self) -> QRectF:  # noqa: N802 - Qt override
+        margin = self._margin
+        return self._rect.adjusted(-margin, -margin, margin, margin)
+
+    def set_selected_line(self, line: Optional[Tuple[str, int]]) -> None:
+        """切换高亮线条，只重绘取消高亮与新高亮的两条线。"""
+        previous, self._selected = self._selected, line
+        if previous == line:
+            return
+        for key in (previous, line):
+            if key is not None and 0 <= key[1] < self._store.count(key[0]):
+                self.update_lines(key[0], self._store.position(*key))
+
+    def update_lines(self, orientation: str, *positions: float) -> None:
+        """重绘位于 positions 处的线条所在的窄条（线条已移走时清除旧的像素）。"""
+        bounds = self.boundingRect()
+        band = 2 * self._margin
+        for position in positions:
+            if orientation == HORIZONTAL:
+                self.update(QRectF(bounds.left(), position - self._margin, bounds.width(), band))
+            else:
+                self.update(QRectF(position - self._margin, bounds.top(), band, bounds.height()))
+
+    def line_at(self, pos: QPointF, tolerance: float) -> Optional[Tuple[str, int]]:
+        """返回距 pos 不超过 tolerance 的最近切割线 (方向, 序号)。"""
+        rect = self._rect
+        best: Optional[Tuple[str, int]] = None
+        best_distance = tolerance
+        for orientation, value, inside in (
+            (HORIZONTAL, pos.y(), rect.left() <= pos.x() <= rect.right()),
+            (VERTICAL, pos.x(), rect.top() <= pos.y() <= rect.bottom()),
+        ):
+            if not inside:
+                continue
+            hit = self._store.nearest(orientation, value, best_distance)
+            if hit is not None and (best is None or hit[1] < best_distance):
+                best = (orientation, hit[0])
+                best_distance = hit[1]
+        return best
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        exposed = option.exposedRect
+        margin = self._margin
+        lines: List[QLineF] = []
+        highlighted: List[QLineF] = []
+        for orientation in (HORIZONTAL, VERTICAL):
+            if orientation == HORIZONTAL:
+                low, high = exposed.top() - margin, exposed.bottom() + margin
+                start = self._dash_aligned(self._rect.left(), exposed.left())
+                end = min(self._rect.right(), exposed.right())
+            else:
+                low, high = exposed.left() - margin, exposed.right() + margin
+                start = self._dash_aligned(self._rect.top(), exposed.top())
+                end = min(self._rect.bottom(), exposed.bottom())
+            if start > end:
+                continue
+            values = self._store.positions(orientation)
+            selected = self._selected[1] if self._selected is not None and self._selected[0] == orientation else -1
+            for index in range(bisect_left(values, low), bisect_right(values, high)):
+                value = values[index]
+                if orientation == HORIZONTAL:
+                    line = QLineF(start, value, end, value)
+                else:
+                    line = QLineF(value, start, value, end)
+                (highlighted if index == selected else lines).append(line)
+
+        if lines:
+            painter.setPen(self._pen)
+            painter.drawLines(lines)
+        if highlighted:
+            painter.setPen(self._highlight_pen)
+            painter.drawLines(highlighted)
+
+    def _dash_aligned(self, origin: float, exposed_start: float) -> float:
+        if exposed_start <= origin:
+            return origin
+        period = self._DASH_PERIOD * self._pen.widthF()
+        return origin + math.floor((exposed_start - origin) / period) * period
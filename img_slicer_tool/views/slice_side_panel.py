@@ -3,6 +3,7 @@ from __future__ import annotations
 from PySide6.QtCore import Signal
 from PySide6.QtWidgets import (
     QButtonGroup,
+    QComboBox,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
@@ -15,6 +16,16 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from services.encoder_profiles import (
+    DEFAULT_PROFILE,
+    FORMAT_LABELS,
+    FORMAT_PNG,
+    FORMAT_SOURCE,
+    PROFILE_LABELS,
+    available_formats,
+)
+from services.tile_sinks import CONTAINER_DIRECTORY, CONTAINER_LABELS
+
 
 class SliceSidePanel(QWidget):
     """切图模式左侧工作栏。"""
@@ -23,6 +34,7 @@ class SliceSidePanel(QWidget):
     gridValueChanged = Signal(int, int)
     lineToolChanged = Signal(str)
     executeRequested = Signal()
+    encoderSettingsChanged = Signal(str, str)  # output_format, profile
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
@@ -46,6 +58,7 @@ class SliceSidePanel(QWidget):
         layout.addWidget(self._build_grid_section())
         layout.addWidget(self._build_manual_tools_section())
         layout.addWidget(self._build_select_tool_section())
+        layout.addWidget(self._build_output_section())
         layout.addStretch(1)
 
         self._execute_button = QPushButton("执行切图", self)
@@ -120,6 +133,74 @@ class SliceSidePanel(QWidget):
         v_layout.addWidget(select_btn)
         return self._select_group
 
+    def _build_output_section(self) -> QWidget:
+        group = QGroupBox("输出设置", self)
+        form = QFormLayout(group)
+        self._format_combo = QComboBox(group)
+        for key in available_formats():
+            self._format_combo.addItem(FORMAT_LABELS[key], key)
+        self._profile_combo = QComboBox(group)
+        for key, label in PROFILE_LABELS.items():
+            self._profile_combo.addItem(label, key)
+        self._profile_combo.setCurrentIndex(self._profile_combo.findData(DEFAULT_PROFILE))
+        self._profile_combo.setToolTip("快速：编码最快；均衡：默认画质；最小体积：更慢但文件更小")
+        self._budget_spin = QSpinBox(group)
+        self._budget_spin.setRange(0, 100_000)
+        self._budget_spin.setSingleStep(50)
+        self._budget_spin.setSuffix(" KB")
+        self._budget_spin.setSpecialValueText("不限")
+        self._budget_spin.setToolTip("单个切片的体积上限，超出时自动降低质量；仅 JPEG / WebP / AVIF 输出有效")
+
+        self._format_combo.currentIndexChanged.connect(self._on_encoder_settings_changed)
+        self._profile_combo.currentIndexChanged.connect(self._on_encoder_settings_changed)
+        self._container_combo = QComboBox(group)
+        for key, label in CONTAINER_LABELS.items():
+            self._container_combo.addItem(label, key)
+        self._container_combo.setToolTip("切片数量很多时，写入单个 ZIP / tar / MBTiles 文件可避免大量小文件的开销")
+
+        self._budget_spin.valueChanged.connect(self._on_encoder_settings_changed)
+        self._container_combo.currentIndexChanged.connect(self._on_encoder_settings_changed)
+
+        form.addRow(QLabel("格式:", group), self._format_combo)
+        form.addRow(QLabel("编码:", group), self._profile_combo)
+        form.addRow(QLabel("体积上限:", group), self._budget_spin)
+        form.addRow(QLabel("输出到:", group), self._container_combo)
+
+        self._estimate_label = QLabel(group)
+        self._estimate_label.setWordWrap(True)
+        self._estimate_label.setStyleSheet("color: palette(mid);")
+        form.addRow(self._estimate_label)
+        return group
+
+    def output_format(self) -> str:
+        return self._format_combo.currentData() or FORMAT_SOURCE
+
+    def encoder_profile(self) -> str:
+        return self._profile_combo.currentData() or DEFAULT_PROFILE
+
+    def tile_budget_kb(self) -> int:
+        """单个切片的体积上限（KB），0 表示不限。"""
+        return self._budget_spin.value()
+
+    def output_container(self) -> str:
+        return self._container_combo.currentData() or CONTAINER_DIRECTORY
+
+    def set_export_estimate(self, text: str) -> None:
+        """显示当前布局的导出预估；传空字符串时隐藏。"""
+        self._estimate_label.setText(text)
+        self._estimate_label.setVisible(bool(text))
+
+    def set_tile_budget_kb(self, value: int) -> None:
+        self._budget_spin.setValue(value)
+
+    def set_encoder_settings(self, output_format: str, profile: str) -> None:
+        format_index = self._format_combo.findData(output_format)
+        profile_index = self._profile_combo.findData(profile)
+        if format_index >= 0:
+            self._format_combo.setCurrentIndex(format_index)
+        if profile_index >= 0:
+            self._profile_combo.setCurrentIndex(profile_index)
+
     def set_slice_mode(self, mode: str) -> None:
         if mode not in {"grid", "manual"}:
             return
@@ -171,3 +252,7 @@ class SliceSidePanel(QWidget):
         if not checked or self._block_tool_change:
             return
         self.lineToolChanged.emit(tool)
+
+    def _on_encoder_settings_changed(self) -> None:
+        self._budget_spin.setEnabled(self.output_format() != FORMAT_PNG)
+        self.encoderSettingsChanged.emit(self.output_format(), self.encoder_profile())
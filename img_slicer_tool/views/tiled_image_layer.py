@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRectF, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap, QTransform
+from PySide6.QtWidgets import QGraphicsPixmapItem, QGraphicsScene
+
+from models.image_document import ImageDocument
+from services.region_reader import read_region, release_region_source
+from utils.qimage_utils import pil_image_to_qimage
+
+# 每个瓦片在其所在级别中的边长（像素）。
+LOD_TILE_SIZE = 512
+# 瓦片位于预览底图之上、裁剪框与切图线之下。
+LOD_TILE_Z_VALUE = 1
+
+TileKey = Tuple[int, int, int]  # (level, col, row)
+
+
+class _TileSignals(QObject):
+    tileDecoded = Signal(int, object, object)  # generation, key, QImage
+    tileFailed = Signal(int, object)
+
+
+class _RegionTileTask(QRunnable):
+    def __init__(
+        self,
+        layer: "TiledImageLayer",
+        generation: int,
+        key: TileKey,
+        path: str,
+        box: Tuple[int, int, int, int],
+    ) -> None:
+        super().__init__()
+        self._layer = layer
+        self._signals = layer._signals
+        self._generation = generation
+        self._key = key
+        self._path = path
+        self._box = box
+
+    def run(self) -> None:
+        # 排队期间视口可能已经移走，此时无需再解码。
+        if not self._layer.is_wanted(self._generation, self._key):
+            return
+        try:
+            level = self._key[0]
+            region = read_region(self._path, self._box, 2**level)
+            image = pil_image_to_qimage(region)
+        except Exception:  # noqa: BLE001 - 瓦片失败时保留预览底图即可
+            self._signals.tileFailed.emit(self._generation, self._key)
+            return
+        self._signals.tileDecoded.emit(self._generation, self._key, image)
+
+
+class TiledImageLayer(QObject):
+    """按视口请求原图区域瓦片的多级细节层。
+
+    级别 k 表示相对原图缩小 2^k 倍；只有当该级别比预览图更清晰时才会请求瓦片。
+    场景中只保留当前视口需要的瓦片，其余立即移除。
+    """
+
+    def __init__(self, scene: QGraphicsScene, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._scene = scene
+        self._document: Optional[ImageDocument] = None
+        self._generation = 0
+        self._items: Dict[TileKey, QGraphicsPixmapItem] = {}
+        self._wanted: Set[TileKey] = set()
+        self._pending: Set[TileKey] = set()
+        self._failed: Set[TileKey] = set()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _TileSignals(self)
+        self._signals.tileDecoded.connect(self._on_tile_decoded)
+        self._signals.tileFailed.connect(self._on_tile_failed)
+
+    def set_document(self, document: Optional[ImageDocument]) -> None:
+        self.reset()
+        self._document = document
+
+    def reset(self) -> None:
+        """移除全部瓦片并使在途请求失效；需在 scene.clear() 之前调用。"""
+        self._generation += 1
+        self._pool.clear()
+        for item in self._items.values():
+            if item.scene() is not None:
+                self._scene.removeItem(item)
+        self._items.clear()
+        self._wanted.clear()
+        self._pending.clear()
+        self._failed.clear()
+        if self._document is not None:
+            release_region_source(self._document.path)
+        self._document = None
+
+    def is_wanted(self, generation: int, key: TileKey) -> bool:
+        return generation == self._generation and key in self._wanted
+
+    def update_viewport(self, visible_rect: QRectF, view_scale: float) -> None:
+        """visible_rect 为场景（预览）坐标，view_scale 为每个预览像素对应的屏幕像素数。"""
+        doc = self._document
+        if doc is None or view_scale <= 0:
+            return
+
+        level = self._level_for(doc, view_scale)
+        wanted: Set[TileKey] = set()
+        if level is not None:
+            wanted = self._tiles_for_rect(doc, level, visible_rect)
+
+        self._wanted = wanted
+        for key in list(self._items):
+            if key not in wanted:
+                item = self._items.pop(key)
+                if item.scene() is not None:
+                    self._scene.removeItem(item)
+        self._pending &= wanted
+
+        for key in sorted(wanted - self._items.keys() - self._pending - self._failed):
+            self._pending.add(key)
+            box = doc.to_source_box(self._tile_box(doc, key))
+            self._pool.start(_RegionTileTask(self, self._generation, key, doc.path, box))
+
+    def _level_for(self, doc: ImageDocument, view_scale: float) -> Optional[int]:
+        # 每个屏幕像素覆盖的原图像素数。
+        original_per_device = min(doc.scale_x, doc.scale_y) / view_scale
+        level = max(0, int(math.floor(math.log2(max(original_per_device, 1.0)))))
+        if 2**level >= min(doc.scale_x, doc.scale_y):
+            return None
+        return level
+
+    def _tiles_for_rect(self, doc: ImageDocument, level: int, rect: QRectF) -> Set[TileKey]:
+        span = LOD_TILE_SIZE * 2**level
+        x1 = max(0.0, rect.left() * doc.scale_x)
+        y1 = max(0.0, rect.top() * doc.scale_y)
+        x2 = min(float(doc.original_width), rect.right() * doc.scale_x)
+        y2 = min(float(doc.original_height), rect.bottom() * doc.scale_y)
+        if x2 <= x1 or y2 <= y1:
+            return set()
+
+        cols = range(int(x1 // span), int(math.ceil(x2 / span)))
+        rows = range(int(y1 // span), int(math.ceil(y2 / span)))
+        return {(level, col, row) for row in rows for col in cols}
+
+    def _tile_box(self, doc: ImageDocument, key: TileKey) -> Tuple[int, int, int, int]:
+        level, col, row = key
+        span = LOD_TILE_SIZE * 2**level
+        return (
+            col * span,
+            row * span,
+            min(doc.original_width, (col + 1) * span),
+            min(doc.original_height, (row + 1) * span),
+        )
+
+    def _on_tile_decoded(self, generation: int, key: TileKey, image: QImage) -> None:
+        doc = self._document
+        if doc is None or not self.is_wanted(generation, key):
+            return
+        self._pending.discard(key)
+        if key in self._items:
+            return
+
+        level = key[0]
+        x1, y1, _, _ = self._tile_box(doc, key)
+        item = QGraphicsPixmapItem(QPixmap.fromImage(image))
+        item.setZValue(LOD_TILE_Z_VALUE)
+        item.setPos(x1 / doc.scale_x, y1 / doc.scale_y)
+        item.setTransform(QTransform.fromScale(2**level / doc.scale_x, 2**level / doc.scale_y))
+        self._scene.addItem(item)
+        self._items[key] = item
+
+    def _on_tile_failed(self, generation: int, key: TileKey) -> None:
+        if generation == self._generation:
+            self._pending.discard(key)
+            self._failed.add(key)